@@ -0,0 +1,26 @@
+"""
+Gunicorn settings picked up automatically by `gunicorn statsprofile.asgi:application`.
+
+Sets up prometheus_client multiprocess mode so /metrics/ aggregates samples from
+every uvicorn worker. Run management commands (e.g. import_csv_data) with the
+same PROMETHEUS_MULTIPROC_DIR to have their counters show up as well.
+"""
+import os
+import shutil
+import tempfile
+
+# Must be set before any worker imports prometheus_client.
+multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'statsprofile-metrics')
+)
+
+
+def on_starting(server):
+    # Samples left over from a previous master would be merged into the new one.
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import PlayerMetric, MetricsHistory, MetricsRange, PlayerProfile
+from .models import (
+    PlayerMetric, MetricsHistory, ImportReject, MetricsRange, GrowthCurve, PlayerProfile, AnonymousMetricRollup,
+    WatchlistEntry, WatchNotification, EventSummary, PlayerIdentityLink, Observation, ImportJob,
+)
+from . import identity
 
 @admin.register(PlayerMetric)
 class PlayerMetricAdmin(admin.ModelAdmin):
@@ -41,6 +45,24 @@ class MetricsHistoryAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(ImportReject)
+class ImportRejectAdmin(admin.ModelAdmin):
+    list_display = ('source', 'line_number', 'reasons', 'created_at')
+    list_filter = ('source',)
+    search_fields = ('source',)
+    ordering = ('-created_at', 'line_number')
+    readonly_fields = ('source', 'line_number', 'reasons', 'data', 'created_at')
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('source', 'status', 'adapter', 'line', 'imported', 'rejected', 'failed', 'started_at', 'finished_at')
+    list_filter = ('status', 'adapter')
+    search_fields = ('source', 'file_hash')
+    ordering = ('-started_at',)
+    readonly_fields = tuple(field.name for field in ImportJob._meta.fields)
+
+
 @admin.register(MetricsRange)
 class MetricsRangeAdmin(admin.ModelAdmin):
     list_display = ('metricType', 'Min', 'Max', 'Avg', 'playerAge')
@@ -57,11 +79,85 @@ class MetricsRangeAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(GrowthCurve)
+class GrowthCurveAdmin(admin.ModelAdmin):
+    list_display = ('metricType', 'fromAge', 'toAge', 'intercept', 'slope', 'residualStd', 'samples', 'fitted_at')
+    list_filter = ('metricType', 'fromAge')
+    ordering = ('metricType', 'fromAge')
+    readonly_fields = ('fitted_at',)
+
+@admin.register(AnonymousMetricRollup)
+class AnonymousMetricRollupAdmin(admin.ModelAdmin):
+    list_display = ('month', 'metricType', 'playerAge', 'count', 'minimum', 'maximum', 'average')
+    list_filter = ('metricType', 'playerAge')
+    date_hierarchy = 'month'
+    ordering = ('-month', 'metricType', 'playerAge')
+
+@admin.register(WatchlistEntry)
+class WatchlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'profile', 'created_at')
+    search_fields = ('user__username', 'profile__user__username')
+    raw_id_fields = ('user', 'profile')
+    ordering = ('-created_at',)
+
+@admin.register(WatchNotification)
+class WatchNotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'metric', 'history', 'created_at', 'sent_at')
+    list_filter = ('sent_at',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user', 'metric', 'history')
+    ordering = ('-created_at',)
+
+@admin.register(EventSummary)
+class EventSummaryAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event_date', 'participants', 'rows', 'updated_at')
+    search_fields = ('event_id',)
+    date_hierarchy = 'event_date'
+    readonly_fields = ('updated_at',)
+    ordering = ('-event_date',)
+
+@admin.register(PlayerIdentityLink)
+class PlayerIdentityLinkAdmin(admin.ModelAdmin):
+    """Review queue for match_player_identities: filter on Pending review and confirm or reject"""
+    list_display = ('player_id', 'profile', 'profile__graduation_year', 'score', 'margin', 'evidence', 'status',
+                    'reviewed_by')
+    list_filter = ('status', 'profile__graduation_year')
+    search_fields = ('=player_id', 'profile__user__username')
+    raw_id_fields = ('profile',)
+    readonly_fields = ('score', 'margin', 'evidence', 'reviewed_by', 'reviewed_at', 'created_at', 'updated_at')
+    list_select_related = ('profile__user', 'reviewed_by')
+    ordering = ('-score',)
+    actions = ('confirm_links', 'reject_links')
+
+    @admin.action(description='Confirm selected links')
+    def confirm_links(self, request, queryset):
+        confirmed = identity.confirm(queryset, user=request.user)
+        skipped = queryset.count() - confirmed
+        self.message_user(request, f'Confirmed {confirmed} link(s)' + (
+            f'; skipped {skipped} already confirmed or whose player is linked elsewhere' if skipped else ''
+        ))
+
+    @admin.action(description='Reject selected links')
+    def reject_links(self, request, queryset):
+        self.message_user(request, f'Rejected {identity.reject(queryset, user=request.user)} link(s)')
+
+@admin.register(Observation)
+class ObservationAdmin(admin.ModelAdmin):
+    list_display = ('metric', 'value', 'age', 'date', 'source', 'entity')
+    list_filter = ('source', 'metric', 'age')
+    search_fields = ('=entity',)
+    ordering = ('metric', 'age', 'value')
+    # Derived from MetricsHistory and PlayerMetric; edit those instead.
+    readonly_fields = ('source', 'source_id', 'entity', 'metric', 'value', 'age', 'date')
+
 @admin.register(PlayerProfile)
 class PlayerProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'get_positions_display', 'team', 'graduation_year')
-    search_fields = ('user__username', 'team', 'positions')
-    list_filter = ('graduation_year',)
+    search_fields = ('user__username', 'team', 'positions__code')
+    list_filter = ('graduation_year', 'positions')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user').prefetch_related('positions')
     
     def get_positions_display(self, obj):
         return obj.get_positions_display()
@@ -0,0 +1,28 @@
+"""
+Player ages derived from a graduating class.
+
+Neither the combine exports nor MetricsHistory carry a birth date, so a
+player's age on a date is estimated from their high school class: graduates
+are about 18, and a class ages a year each July. Ages are clamped to the
+12-20 span MetricsRange covers.
+"""
+MIN_AGE = 12
+MAX_AGE = 20
+GRADUATION_AGE = 18
+# Month in which a class moves up a year (the summer before the school year)
+BIRTHDAY_MONTH = 7
+
+
+def age_for(grad_year, on_date):
+    """Typical age of a player in a graduating class on a given date (grads are ~18)"""
+    age = GRADUATION_AGE - (grad_year - on_date.year) - (1 if on_date.month < BIRTHDAY_MONTH else 0)
+    return max(MIN_AGE, min(MAX_AGE, age))
+
+
+def history_age(playerage, grad_year, event_date):
+    """A MetricsHistory row's age: playerage when set, otherwise derived from the grad year"""
+    if playerage:
+        return playerage
+    if grad_year and event_date:
+        return age_for(grad_year, event_date)
+    return None
@@ -0,0 +1,345 @@
+"""
+Vectorized analytics over MetricsHistory.
+
+MetricsFrame holds the numeric MetricsHistory columns as contiguous NumPy
+arrays with a validity mask per column. It loads from the columnar snapshot
+(see main.snapshots) or straight from the database. Grouped statistics (count,
+min, max, mean, std, quantiles, correlations) per age or grad year are then
+computed for every group at once from a single sort, with no per-group
+Python loop or GROUP BY query.
+"""
+import itertools
+
+import numpy as np
+
+from . import snapshots
+from .models import MetricsHistory
+
+METRIC_COLUMNS = [
+    'exitVelo', 'maxFB', 'sixtyyard', 'popTime', 'ifVelo', 'ofVelo', 'cVelo',
+    'changeUp', 'curve', 'slider', 'height', 'weight',
+]
+GROUP_COLUMNS = ['playerage', 'gradYear']
+ID_COLUMNS = ['player_id', 'event_id']
+
+# Metrics where a lower value is better.
+LOWER_IS_BETTER = {'sixtyyard', 'popTime'}
+
+# PlayerMetric.metricType -> MetricsHistory column.
+METRIC_TYPE_COLUMNS = {
+    '60': 'sixtyyard',
+    'fbvelo': 'maxFB',
+    'exitvelo': 'exitVelo',
+    'ofvelo': 'ofVelo',
+    'ifvelo': 'ifVelo',
+}
+
+
+def column_dtype(name):
+    return np.int64 if name in ID_COLUMNS else np.float32
+
+
+class MetricsFrame:
+    """
+    Column store of MetricsHistory values.
+
+    ``values[name]`` is a float32 array (int64 for ID_COLUMNS, which float32
+    cannot hold exactly above 2**24) and ``valid[name]`` a boolean array that
+    is False where the value is null or the 0 "not measured" sentinel.
+    """
+
+    def __init__(self, values, valid, event_date=None):
+        self.values = values
+        self.valid = valid
+        self.event_date = event_date
+        self.size = len(next(iter(values.values()))) if values else 0
+
+    @classmethod
+    def from_snapshot(cls, directory=None, since=None, until=None):
+        names = METRIC_COLUMNS + GROUP_COLUMNS + ID_COLUMNS
+        data = snapshots.load_columns(names + ['event_date'], directory, since, until)
+        values = {}
+        valid = {}
+        for name in names:
+            column, mask = data[name]
+            # Copy out of the read-only memmap; _finish zeroes invalid slots in place.
+            values[name] = np.array(column, dtype=column_dtype(name))
+            valid[name] = np.ones(len(column), dtype=bool) if mask is None else ~np.asarray(mask)
+        return cls._finish(values, valid, np.asarray(data['event_date'][0]))
+
+    @classmethod
+    def from_database(cls, queryset=None, chunk_size=20000):
+        """Stream values_list rows into preallocated arrays, one chunk at a time"""
+        queryset = MetricsHistory.objects.all() if queryset is None else queryset
+        names = METRIC_COLUMNS + GROUP_COLUMNS + ID_COLUMNS
+        total = queryset.count()
+        values = {name: np.empty(total, dtype=column_dtype(name)) for name in names}
+        event_date = np.empty(total, dtype=np.int64)
+        rows = queryset.order_by().values_list(*names, 'event_date').iterator(chunk_size=chunk_size)
+
+        offset = 0
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            # Rows added since count() are ignored rather than overflowing.
+            chunk = chunk[:total - offset]
+            end = offset + len(chunk)
+            for index, name in enumerate(names):
+                if name in ID_COLUMNS:
+                    # NOT NULL columns, read exactly as integers
+                    values[name][offset:end] = np.fromiter(
+                        (row[index] for row in chunk), dtype=np.int64, count=len(chunk),
+                    )
+                    continue
+                values[name][offset:end] = np.fromiter(
+                    (np.nan if row[index] is None else row[index] for row in chunk),
+                    dtype=np.float32, count=len(chunk),
+                )
+            event_date[offset:end] = np.fromiter(
+                (row[-1].timestamp() for row in chunk), dtype=np.int64, count=len(chunk),
+            )
+            offset = end
+            if offset >= total:
+                break
+
+        values = {name: column[:offset] for name, column in values.items()}
+        valid = {
+            name: np.ones(offset, dtype=bool) if name in ID_COLUMNS else ~np.isnan(column)
+            for name, column in values.items()
+        }
+        return cls._finish(values, valid, event_date[:offset].astype('datetime64[s]'))
+
+    @classmethod
+    def _finish(cls, values, valid, event_date=None):
+        for name in METRIC_COLUMNS:
+            valid[name] &= values[name] > 0
+        for name in values:
+            values[name][~valid[name]] = 0
+        return cls(values, valid, event_date)
+
+    def filter(self, selector):
+        """Return a new frame restricted to rows where ``selector`` is True"""
+        event_date = self.event_date[selector] if self.event_date is not None else None
+        return MetricsFrame(
+            {name: column[selector] for name, column in self.values.items()},
+            {name: column[selector] for name, column in self.valid.items()},
+            event_date,
+        )
+
+    def _grouping(self, by):
+        """Sort order, unique group keys and group start offsets for a grouping column"""
+        keep = self.valid[by]
+        rows = np.flatnonzero(keep)
+        keys = self.values[by][rows].astype(np.int64)
+        order = np.argsort(keys, kind='stable')
+        rows = rows[order]
+        groups, starts = np.unique(keys[order], return_index=True)
+        return rows, groups, starts
+
+    def group_stats(self, metrics=None, by='playerage', quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        """
+        Return {metric: {group: {'count', 'min', 'max', 'mean', 'std', 'quantiles'}}}
+        for every metric and group. Groups without a measurement are omitted.
+        """
+        metrics = metrics or METRIC_COLUMNS
+        rows, groups, starts = self._grouping(by)
+        result = {}
+        if not rows.size:
+            return {metric: {} for metric in metrics}
+
+        for metric in metrics:
+            values = self.values[metric][rows].astype(np.float64)
+            valid = self.valid[metric][rows]
+            counts = np.add.reduceat(valid.astype(np.int64), starts)
+            sums = np.add.reduceat(np.where(valid, values, 0), starts)
+            squares = np.add.reduceat(np.where(valid, values * values, 0), starts)
+            mins = np.minimum.reduceat(np.where(valid, values, np.inf), starts)
+            maxs = np.maximum.reduceat(np.where(valid, values, -np.inf), starts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = sums / counts
+                stds = np.sqrt(np.maximum(squares / counts - means * means, 0))
+            group_quantiles = self._grouped_quantiles(values, valid, starts, counts, quantiles)
+
+            result[metric] = {
+                int(group): {
+                    'count': int(counts[i]),
+                    'min': round(float(mins[i]), 2),
+                    'max': round(float(maxs[i]), 2),
+                    'mean': round(float(means[i]), 2),
+                    'std': round(float(stds[i]), 3),
+                    'quantiles': [round(float(q), 2) for q in group_quantiles[i]],
+                }
+                for i, group in enumerate(groups) if counts[i]
+            }
+        return result
+
+    @staticmethod
+    def _grouped_quantiles(values, valid, starts, counts, quantiles):
+        """
+        Linear-interpolated quantiles for every group at once.
+
+        Rows are already ordered by group; a lexsort on (value, group) with
+        invalid values pushed to the end of their group puts each group's
+        measured values first and in order, so each quantile is a pair of
+        index lookups.
+        """
+        group_ids = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(values))))
+        sort_values = np.where(valid, values, np.inf)
+        ordered = sort_values[np.lexsort((sort_values, group_ids))]
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        positions = (np.maximum(counts, 1) - 1)[:, None] * quantiles[None, :]
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.ceil(positions).astype(np.int64)
+        fraction = positions - lower
+        base = starts[:, None]
+        low_values = ordered[np.minimum(base + lower, len(ordered) - 1)]
+        high_values = ordered[np.minimum(base + upper, len(ordered) - 1)]
+        with np.errstate(invalid='ignore'):
+            return low_values + (high_values - low_values) * fraction
+
+    def correlations(self, metrics=None, by='playerage'):
+        """
+        Pearson correlation matrices per group over rows where both metrics
+        were measured: {group: {'metrics': [...], 'matrix': [[...]]}}.
+        """
+        metrics = metrics or METRIC_COLUMNS
+        rows, groups, starts = self._grouping(by)
+        if not rows.size:
+            return {}
+        values = {m: self.values[m][rows].astype(np.float64) for m in metrics}
+        valid = {m: self.valid[m][rows] for m in metrics}
+
+        size = len(metrics)
+        matrix = np.full((len(groups), size, size), np.nan)
+        for i, a in enumerate(metrics):
+            matrix[:, i, i] = 1.0
+            for j in range(i + 1, size):
+                b = metrics[j]
+                both = valid[a] & valid[b]
+                x = np.where(both, values[a], 0)
+                y = np.where(both, values[b], 0)
+                n = np.add.reduceat(both.astype(np.float64), starts)
+                sx, sy = np.add.reduceat(x, starts), np.add.reduceat(y, starts)
+                sxx, syy = np.add.reduceat(x * x, starts), np.add.reduceat(y * y, starts)
+                sxy = np.add.reduceat(x * y, starts)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    cov = sxy - sx * sy / n
+                    r = cov / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+                r[n < 3] = np.nan
+                matrix[:, i, j] = matrix[:, j, i] = r
+
+        return {
+            int(group): {
+                'metrics': list(metrics),
+                'matrix': [[None if np.isnan(v) else round(float(v), 3) for v in row] for row in matrix[g]],
+            }
+            for g, group in enumerate(groups)
+        }
+
+    def percentile_table(self, metric, by='playerage', points=101):
+        """
+        Return {group: array of ``points`` values at evenly spaced quantiles},
+        the lookup table for turning a value into a percentile rank.
+        """
+        stats = self.group_stats([metric], by=by, quantiles=np.linspace(0, 1, points))[metric]
+        return {group: np.asarray(entry['quantiles']) for group, entry in stats.items()}
+
+
+def percentile_rank(table, value, lower_is_better=False):
+    """Percentile (0-100) of ``value`` against a percentile_table() row"""
+    if table is None or not len(table):
+        return None
+    rank = np.searchsorted(table, value, side='right') / len(table) * 100
+    rank = min(100.0, max(0.0, rank))
+    return int(round(100 - rank if lower_is_better else rank))
+
+
+# Ages are packed into the low bits of a combined (player_id, age) sort key.
+_AGE_BITS = 6
+
+
+def latest_by_player_age(frame, columns):
+    """
+    Return (player_ids, ages, raw) sorted by player then age, where ``raw``
+    holds each (player, age)'s latest measured value of every column, NaN
+    where it was never measured at that age.
+    """
+    has_age = frame.valid['playerage'] & frame.valid['player_id']
+    players = frame.values['player_id'][has_age].astype(np.int64)
+    ages = frame.values['playerage'][has_age].astype(np.int64)
+    dates = frame.event_date[has_age].astype(np.int64)
+    keys = (players << _AGE_BITS) | ages
+    order = np.lexsort((dates, keys))
+    keys = keys[order]
+
+    unique_keys = np.unique(keys)
+    raw = np.full((len(unique_keys), len(columns)), np.nan, dtype=np.float32)
+    rows = np.flatnonzero(has_age)[order]
+    for index, column in enumerate(columns):
+        measured = np.flatnonzero(frame.valid[column][rows])
+        if not measured.size:
+            continue
+        measured_keys = keys[measured]
+        # Rows are sorted by (key, date): the last measured row of each key is the latest.
+        last = measured[np.append(measured_keys[1:] != measured_keys[:-1], True)]
+        slots = np.searchsorted(unique_keys, keys[last])
+        raw[slots, index] = frame.values[column][rows[last]]
+
+    return unique_keys >> _AGE_BITS, unique_keys & ((1 << _AGE_BITS) - 1), raw
+
+
+def load_frame(directory=None):
+    """Frame from the snapshot when one exists, otherwise from the database"""
+    if snapshots.read_manifest(directory)['partitions']:
+        return MetricsFrame.from_snapshot(directory)
+    return MetricsFrame.from_database()
+
+
+def metric_range(metric, group_by='playerage', directory=None, frame=None):
+    """Return {group: {'min', 'max', 'avg', 'count'}} for a metric column"""
+    frame = frame or load_frame(directory)
+    stats = frame.group_stats([metric], by=group_by, quantiles=())[metric]
+    return {
+        group: {'min': entry['min'], 'max': entry['max'], 'avg': entry['mean'], 'count': entry['count']}
+        for group, entry in stats.items()
+    }
+
+
+def metric_quantiles(metric, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9), group_by='playerage', directory=None, frame=None):
+    """Return {group: [value at each quantile]} for a metric column"""
+    frame = frame or load_frame(directory)
+    stats = frame.group_stats([metric], by=group_by, quantiles=quantiles)[metric]
+    return {group: entry['quantiles'] for group, entry in stats.items()}
+
+
+def leaderboard(metric, limit=10, ascending=None, age=None, directory=None, frame=None):
+    """
+    Top ``limit`` measurements of a metric as dicts with player_id, event_id
+    and value. Timed metrics (60 yard, pop time) rank lowest first unless
+    ``ascending`` says otherwise.
+    """
+    frame = frame or load_frame(directory)
+    if ascending is None:
+        ascending = metric in LOWER_IS_BETTER
+    valid = frame.valid[metric].copy()
+    if age is not None:
+        valid &= frame.values['playerage'] == age
+    index = np.flatnonzero(valid)
+    if not index.size:
+        return []
+
+    selected = frame.values[metric][index]
+    order = selected if ascending else -selected
+    count = min(limit, index.size)
+    top = np.argpartition(order, count - 1)[:count]
+    top = top[np.argsort(order[top], kind='stable')]
+    return [
+        {
+            'player_id': int(frame.values['player_id'][row]),
+            'event_id': int(frame.values['event_id'][row]),
+            'event_date': str(frame.event_date[row]) if frame.event_date is not None else None,
+            'value': round(float(frame.values[metric][row]), 2),
+        }
+        for row in index[top]
+    ]
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def install_directory_index(sender, using, **kwargs):
+    from django.db import connections, router
+    from . import directory
+    if router.allow_migrate(using, sender.label):
+        directory.install_search_index(connections[using])
 
 
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        from . import observations  # noqa: F401  (PlayerMetric -> Observation receiver)
+        post_migrate.connect(install_directory_index, sender=self)
@@ -0,0 +1,218 @@
+"""
+Player directory search over PlayerProfile.
+
+Every profile carries a denormalized ``search_text`` (name, username, team,
+school, city, state, graduation year and positions as lowercase words) and a
+``sort_name``, both rebuilt by PlayerProfile.save(). A query matches profiles
+containing a word starting with each query word, in any field.
+
+How that match is indexed depends on the database:
+
+* Postgres: a GIN index on to_tsvector('simple', search_text), queried with
+  prefix tsqueries (``smith:* & tx:*``). Core full-text search, so no
+  extension is needed.
+* SQLite: an external-content FTS5 table kept in sync by triggers, queried
+  with prefix terms.
+
+Anywhere else (or SQLite built without FTS5) it falls back to
+``LIKE '% word%'`` filters, which give the same matches unindexed.
+
+Results are ordered by (sort_name, id) and paged with a keyset cursor rather
+than OFFSET, so page 500 costs the same as page 1.
+"""
+import base64
+import json
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from . import metrics
+from .models import PlayerProfile, search_words
+
+PAGE_SIZE = 25
+SUGGEST_LIMIT = 8
+SUGGEST_CACHE_SECONDS = 60
+# Profiles tested row by row before a query is treated as narrow; see search().
+PROBE_ROWS = 2000
+
+TABLE = PlayerProfile._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+SEARCH_INDEX = f'{TABLE}_search_gin'
+TSVECTOR = "to_tsvector('simple', search_text)"
+
+
+def install_search_index(connection):
+    """
+    Create the search index for this database if it is missing. Idempotent;
+    runs from the migration and again after every migrate, because SQLite
+    drops the FTS triggers whenever a migration rebuilds main_playerprofile.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON {TABLE} USING gin ({TSVECTOR})')
+        elif connection.vendor == 'sqlite' and _fts5_available(cursor):
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                           [f'{FTS_TABLE}_%'])
+            if cursor.fetchone()[0] == 3:
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"search_text, content='{TABLE}', content_rowid='id')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN '
+                f'INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN '
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+                f'END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_text ON {TABLE} BEGIN '
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+                f'INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX}')
+        elif connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def _fts5_available(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def _has_fts_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def contains_words(queryset, words):
+    """Per-row word-prefix filter; cheap on a few rows, a full scan on a table"""
+    for word in words:
+        queryset = queryset.filter(search_text__contains=' ' + word)
+    return queryset
+
+
+def match(queryset, words):
+    """Restrict ``queryset`` to profiles with a word starting with each of ``words``, index first"""
+    connection = connections[queryset.db]
+    # Words are [a-z0-9]+ only, so neither query syntax needs further escaping.
+    if connection.vendor == 'postgresql':
+        expression = ' & '.join(f'{word}:*' for word in words)
+        return queryset.filter(RawSQL(f"{TSVECTOR} @@ to_tsquery('simple', %s)", [expression],
+                                      output_field=BooleanField()))
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        expression = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                                             [expression]))
+    return contains_words(queryset, words)
+
+
+def encode_cursor(profile):
+    raw = json.dumps([profile.sort_name, profile.pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(sort_name, id) from a cursor string, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        sort_name, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return str(sort_name), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def _match_page(queryset, words, cursor, limit):
+    """
+    Primary keys of the first ``limit`` matches after ``cursor``, taken from
+    the search index and ordered over those matches alone. Left to itself,
+    Postgres misjudges how many rows a prefix query matches and walks the
+    whole sort index instead, so the match is fenced off with OFFSET 0.
+    """
+    connection = connections[queryset.db]
+    sql, params = match(queryset.order_by(), words).values('pk', 'sort_name').query.sql_with_params()
+    fence = ' OFFSET 0' if connection.vendor == 'postgresql' else ''
+    where = 'WHERE (m.sort_name, m.pk) > (%s, %s)' if cursor else ''
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            f'SELECT m.pk FROM ({sql}{fence}) m {where} ORDER BY m.sort_name, m.pk LIMIT %s',
+            [*params, *(cursor or ()), limit],
+        )
+        return [row[0] for row in db_cursor.fetchall()]
+
+
+def search(query='', state=None, graduation_year=None, position=None, after=None, limit=PAGE_SIZE,
+           using=None):
+    """
+    One page of directory results: (profiles, next_cursor). ``after`` is the
+    cursor returned with the previous page; next_cursor is None on the last.
+    """
+    queryset = PlayerProfile.objects.select_related('user')
+    if using:
+        queryset = queryset.using(using)
+    if state:
+        queryset = queryset.filter(state=state)
+    if graduation_year:
+        queryset = queryset.filter(graduation_year=graduation_year)
+    if position:
+        # Joins PlayerPosition on its (position, profile) index.
+        queryset = queryset.filter(positions=position)
+    cursor = decode_cursor(after)
+    following = queryset
+    if cursor:
+        sort_name, pk = cursor
+        # The redundant sort_name__gte gives the planner an index range to start from.
+        following = queryset.filter(Q(sort_name__gt=sort_name) | Q(pk__gt=pk), sort_name__gte=sort_name)
+    following = following.order_by('sort_name', 'pk')
+
+    words = search_words(query)
+    if words:
+        # A query matching much of the directory ("pl") fills a page within the
+        # next few hundred profiles, so test a window of them row by row first.
+        # Anything narrower goes to the search index.
+        window = list(following.values_list('pk', 'search_text')[:PROBE_ROWS])
+        hits = [pk for pk, text in window if all(' ' + word in text for word in words)][:limit + 1]
+        if len(hits) <= limit and len(window) == PROBE_ROWS:
+            hits = _match_page(queryset, words, cursor, limit + 1)
+        following = following.filter(pk__in=hits)
+    profiles = list(following.prefetch_related('positions')[:limit + 1])
+    next_cursor = encode_cursor(profiles[limit - 1]) if len(profiles) > limit else None
+    return profiles[:limit], next_cursor
+
+
+def suggest(query, limit=SUGGEST_LIMIT, using=None):
+    """Typeahead matches for ``query`` as plain dicts, cached briefly per normalized query"""
+    words = search_words(query)
+    if not words:
+        return []
+
+    def load():
+        profiles, _ = search(' '.join(words), limit=limit, using=using)
+        return [
+            {
+                'username': profile.user.username,
+                'name': profile.user.get_full_name() or profile.user.username,
+                'team': profile.team,
+                'school': profile.school,
+                'graduation_year': profile.graduation_year,
+                'positions': profile.get_positions_list(),
+            }
+            for profile in profiles
+        ]
+
+    key = f'directory_suggest:{limit}:{"+".join(words)}'
+    return metrics.cache_get_or_set('directory_suggest', key, load, timeout=SUGGEST_CACHE_SECONDS)
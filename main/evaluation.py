@@ -0,0 +1,141 @@
+"""
+Batch evaluation of (metricType, age, value) triples against MetricsRange.
+
+load_tables() reads every MetricsRange row once into dense arrays indexed by
+(metric type, age): min/avg/max and the quantile table compute_metric_ranges
+stores with each range. The arrays are small and cached under a key built
+from the newest MetricsRange.updated and the row count, so a recompute or an
+admin edit reaches every worker on its next lookup. evaluate_batch() then
+costs one small aggregate query: it maps every triple to its bucket and
+computes percentiles and in-batch ranks with array operations, however many
+triples there are.
+
+Percentiles match analytics.percentile_rank(). Ranges saved without a
+quantile table (entered by hand in the admin) fall back to the linear min/max
+scale of views.calculate_percentile(). Either way a higher percentile is
+better, so the 60 yard dash is flipped.
+"""
+import numpy as np
+from django.db.models import Count, Max
+
+from . import metrics
+from .analytics import LOWER_IS_BETTER, METRIC_TYPE_COLUMNS
+from .models import MetricsRange
+
+CACHE_KEY = 'metrics_range_tables'
+CACHE_TIMEOUT = 60 * 60
+MAX_BATCH = 10000
+QUANTILE_POINTS = 101
+QUANTILES = np.linspace(0, 1, QUANTILE_POINTS)
+
+METRIC_TYPES = list(METRIC_TYPE_COLUMNS)
+MIN_AGE = MetricsRange.AGE_CHOICES[0][0]
+AGES = len(MetricsRange.AGE_CHOICES)
+
+
+def build_tables(ranges):
+    """
+    Dense lookup arrays from MetricsRange rows: 'bounds' is (types, ages, 3)
+    min/avg/max and 'quantiles' is (types, ages, QUANTILE_POINTS), NaN where
+    there is no range or no quantile table.
+    """
+    bounds = np.full((len(METRIC_TYPES), AGES, 3), np.nan)
+    quantiles = np.full((len(METRIC_TYPES), AGES, QUANTILE_POINTS), np.nan)
+    for metric_type, age, low, average, high, table in ranges:
+        if metric_type not in METRIC_TYPES or not 0 <= age - MIN_AGE < AGES:
+            continue
+        slot = METRIC_TYPES.index(metric_type), age - MIN_AGE
+        bounds[slot] = float(low), float(average), float(high)
+        if len(table or ()) == QUANTILE_POINTS:
+            quantiles[slot] = table
+    return {'bounds': bounds, 'quantiles': quantiles}
+
+
+def load_tables():
+    """build_tables() over every MetricsRange, cached under the ranges' current version"""
+    def build():
+        return build_tables(MetricsRange.objects.values_list('metricType', 'playerAge', 'Min', 'Avg', 'Max', 'quantiles'))
+    return metrics.cache_get_or_set('metrics_range_tables', cache_key(), build, timeout=CACHE_TIMEOUT)
+
+
+def cache_key():
+    """CACHE_KEY versioned by the newest MetricsRange.updated and the row count, which also catches deletes"""
+    version = MetricsRange.objects.aggregate(updated=Max('updated'), count=Count('id'))
+    stamp = version['updated'].timestamp() if version['updated'] else 0
+    return f'{CACHE_KEY}:{version["count"]}:{stamp}'
+
+
+def evaluate_batch(metric_types, ages, values, tables=None):
+    """
+    Evaluate parallel sequences of metric types, ages and values. Returns one
+    dict per triple with the bucket's min/avg/max, the percentile (0-100) and
+    the rank among the batch's triples of the same metric type by percentile
+    (1 is best, ties share a rank). Fields are None where no range exists.
+
+    Raises ValueError for unknown metric types, non-numeric input or sequences
+    of different lengths.
+    """
+    tables = tables if tables is not None else load_tables()
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+    ages = np.asarray(ages, dtype=np.float64).reshape(-1)
+    if not len(metric_types) == len(ages) == len(values):
+        raise ValueError('metric types, ages and values must have the same length')
+    if not np.isfinite(values).all() or not np.isfinite(ages).all():
+        raise ValueError('ages and values must be finite numbers')
+    unknown = set(metric_types) - set(METRIC_TYPES)
+    if unknown:
+        raise ValueError(f'unknown metric type(s): {", ".join(sorted(map(str, unknown)))}')
+    if not len(values):
+        return []
+
+    lookup = {metric_type: index for index, metric_type in enumerate(METRIC_TYPES)}
+    types = np.fromiter((lookup[metric_type] for metric_type in metric_types), dtype=np.int64, count=len(values))
+    age_slots = ages.astype(np.int64) - MIN_AGE
+    in_range = (age_slots >= 0) & (age_slots < AGES)
+    age_slots = np.clip(age_slots, 0, AGES - 1)
+
+    bounds = tables['bounds'][types, age_slots]
+    bounds[~in_range] = np.nan
+    low, average, high = bounds[:, 0], bounds[:, 1], bounds[:, 2]
+    table = tables['quantiles'][types, age_slots]
+    has_table = in_range & ~np.isnan(table[:, 0])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Rows are sorted, so counting entries <= value is searchsorted(side='right') per row.
+        ranked = (table <= values[:, None]).sum(axis=1) / QUANTILE_POINTS * 100
+        # The epsilon keeps float error from flooring 13.0 to 12, which Decimal maths would not.
+        linear = np.floor((np.clip(values, low, high) - low) / (high - low) * 100 + 1e-9)
+    percentile = np.where(has_table, ranked, linear)
+    percentile[~np.isfinite(percentile)] = np.nan
+    flip = np.isin(types, [lookup[m] for m, column in METRIC_TYPE_COLUMNS.items() if column in LOWER_IS_BETTER])
+    percentile = np.where(flip, 100 - percentile, percentile)
+    percentile = np.where(has_table, np.round(percentile), percentile)
+
+    rank = _rank_within_type(types, percentile)
+    # Converting whole columns with tolist() keeps the per-item work to building the dicts.
+    columns = zip(
+        metric_types, ages.astype(np.int64).tolist(), values.tolist(),
+        (~np.isnan(low)).tolist(), _numbers(low), _numbers(average), _numbers(high),
+        _numbers(percentile, digits=None), np.where(rank < 0, None, rank).tolist(),
+    )
+    keys = ('metricType', 'age', 'value', 'has_data', 'min', 'avg', 'max', 'percentile', 'rank')
+    return [dict(zip(keys, row)) for row in columns]
+
+
+def _rank_within_type(types, percentile):
+    """Competition rank by descending percentile within each type, -1 where there is no percentile"""
+    scored = ~np.isnan(percentile)
+    # Percentiles are 0-100, so offsetting each type by 1000 keeps the groups apart in one sort.
+    keys = types[scored] * 1000 + percentile[scored]
+    ordered = np.sort(keys)
+    group_end = np.searchsorted(ordered, types[scored] * 1000 + 500, side='right')
+    rank = np.full(len(types), -1, dtype=np.int64)
+    rank[scored] = group_end - np.searchsorted(ordered, keys, side='right') + 1
+    return rank
+
+
+def _numbers(array, digits=2):
+    """Python floats rounded to ``digits`` (ints when None), None for NaN"""
+    if digits is None:
+        return [None if value != value else int(value) for value in array.tolist()]
+    return [None if value != value else round(value, digits) for value in array.tolist()]
@@ -0,0 +1,158 @@
+"""
+Per-event rollups of MetricsHistory.
+
+EventSummary holds, for each event_id, the participant count, per-metric
+distributions (count, min, max, mean, quantiles) and the top performers of
+each metric. Event pages and the event API read only that table.
+
+refresh() recomputes a set of events from their MetricsHistory rows in one
+vectorized pass over a MetricsFrame. import_csv_data calls it with the
+event_ids it wrote, so an import touches only its own events; a participant
+count or a median cannot be updated by adding to the old value, so each
+touched event is recomputed whole. rebuild_event_summaries backfills every
+event.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+
+from .analytics import LOWER_IS_BETTER, METRIC_COLUMNS, MetricsFrame
+from .models import EventSummary, MetricsHistory
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 10
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# Body measurements get distributions but no leaderboard.
+RANKED_METRICS = [metric for metric in METRIC_COLUMNS if metric not in ('height', 'weight')]
+BATCH_SIZE = 500
+METRIC_LABELS = {
+    'exitVelo': 'Exit Velo', 'maxFB': 'Max FB', 'sixtyyard': '60 Yard', 'popTime': 'Pop Time',
+    'ifVelo': 'IF Velo', 'ofVelo': 'OF Velo', 'cVelo': 'C Velo', 'changeUp': 'Change Up',
+    'curve': 'Curve', 'slider': 'Slider', 'height': 'Height', 'weight': 'Weight',
+}
+
+
+def summarize(frame):
+    """Unsaved EventSummary objects for every event in ``frame``"""
+    has_event = frame.valid['event_id']
+    if not has_event.any():
+        return []
+    events = frame.values['event_id'][has_event].astype(np.int64)
+    players = frame.values['player_id'][has_event].astype(np.int64)
+    groups, slots, counts = np.unique(events, return_inverse=True, return_counts=True)
+    # Distinct (event, player) pairs, counted per event.
+    pairs = np.unique(np.stack([events, players], axis=1), axis=0)
+    participants = np.bincount(np.searchsorted(groups, pairs[:, 0]), minlength=len(groups))
+    first_dates = np.full(len(groups), np.iinfo(np.int64).max)
+    np.minimum.at(first_dates, slots, frame.event_date[has_event].astype(np.int64))
+
+    stats = frame.group_stats(METRIC_COLUMNS, by='event_id', quantiles=QUANTILES)
+    top = {metric: _top_performers(frame, metric) for metric in RANKED_METRICS}
+
+    summaries = []
+    for index, event_id in enumerate(groups.tolist()):
+        summaries.append(EventSummary(
+            event_id=event_id,
+            event_date=datetime.fromtimestamp(int(first_dates[index]), tz=dt_timezone.utc),
+            participants=int(participants[index]),
+            rows=int(counts[index]),
+            stats={
+                metric: {key: value for key, value in stats[metric][event_id].items() if key != 'std'}
+                for metric in METRIC_COLUMNS if event_id in stats[metric]
+            },
+            top={metric: top[metric][event_id] for metric in RANKED_METRICS if event_id in top[metric]},
+        ))
+    return summaries
+
+
+def _top_performers(frame, metric):
+    """{event_id: [{'player_id', 'gradYear', 'value'}]}, each player's best value once, best first"""
+    index = np.flatnonzero(frame.valid[metric] & frame.valid['event_id'])
+    if not index.size:
+        return {}
+    events = frame.values['event_id'][index].astype(np.int64)
+    players = frame.values['player_id'][index].astype(np.int64)
+    values = frame.values[metric][index].astype(np.float64)
+    score = values if metric in LOWER_IS_BETTER else -values
+
+    # Best row per (event, player) first, then keep the first of each pair.
+    order = np.lexsort((score, players, events))
+    first = np.append(True, (events[order][1:] != events[order][:-1]) | (players[order][1:] != players[order][:-1]))
+    best = order[first]
+    # Rank those by score within each event and keep the top TOP_N.
+    best = best[np.lexsort((score[best], events[best]))]
+    best_events = events[best]
+    starts = np.flatnonzero(np.append(True, best_events[1:] != best_events[:-1]))
+    rank = np.arange(best.size) - np.repeat(starts, np.diff(np.append(starts, best.size)))
+    best = best[rank < TOP_N]
+
+    top = {}
+    grad_years = frame.values['gradYear']
+    grad_valid = frame.valid['gradYear']
+    for row in best.tolist():
+        source = index[row]
+        top.setdefault(int(events[row]), []).append({
+            'player_id': int(players[row]),
+            'gradYear': int(grad_years[source]) if grad_valid[source] else None,
+            'value': round(float(values[row]), 2),
+        })
+    return top
+
+
+def refresh(event_ids, batch_size=BATCH_SIZE):
+    """Recompute the summaries of ``event_ids``, dropping events that no longer have rows"""
+    event_ids = sorted({int(event_id) for event_id in event_ids})
+    written = 0
+    for start in range(0, len(event_ids), batch_size):
+        batch = event_ids[start:start + batch_size]
+        frame = MetricsFrame.from_database(MetricsHistory.objects.filter(event_id__in=batch))
+        summaries = summarize(frame)
+        EventSummary.objects.filter(event_id__in=batch).exclude(
+            event_id__in=[summary.event_id for summary in summaries]
+        ).delete()
+        EventSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['event_id'],
+            update_fields=['event_date', 'participants', 'rows', 'stats', 'top', 'updated_at'],
+        )
+        written += len(summaries)
+    return written
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Recompute every event's summary and remove summaries of events with no rows left"""
+    event_ids = list(MetricsHistory.objects.order_by().values_list('event_id', flat=True).distinct())
+    EventSummary.objects.exclude(event_id__in=MetricsHistory.objects.values('event_id')).delete()
+    written = refresh(event_ids, batch_size=batch_size)
+    logger.info('Rebuilt %d event summaries', written)
+    return written
+
+
+def metric_rows(summary):
+    """A summary's metrics in METRIC_COLUMNS order as [{'metric', 'label', 'stats', 'top'}] for templates"""
+    return [
+        {
+            'metric': metric,
+            'label': METRIC_LABELS[metric],
+            'stats': summary.stats[metric],
+            'top': summary.top.get(metric, []),
+        }
+        for metric in METRIC_COLUMNS if metric in summary.stats
+    ]
+
+
+def as_json(summary):
+    """The API representation of an EventSummary"""
+    return {
+        'event_id': summary.event_id,
+        'event_date': summary.event_date.isoformat(),
+        'participants': summary.participants,
+        'rows': summary.rows,
+        'quantiles': list(QUANTILES),
+        'metrics': summary.stats,
+        'top_performers': summary.top,
+        'updated_at': summary.updated_at.isoformat(),
+    }
@@ -0,0 +1,179 @@
+"""
+Streaming CSV / NDJSON exports of MetricsHistory and PlayerMetric.
+
+Rows are read with values_list().iterator(chunk_size=...) and encoded one at a
+time, so memory stays flat and the first bytes go out before the query has
+been fully read, however many rows match.
+"""
+import csv
+import itertools
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+from .models import MetricsHistory, PlayerMetric
+
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = {
+    'history': [
+        'id', 'player_id', 'event_id', 'event_date', 'gradYear', 'playerage', 'height', 'weight',
+        'ifVelo', 'ofVelo', 'cVelo', 'popTime', 'exitVelo', 'sixtyyard', 'maxFB',
+        'changeUp', 'curve', 'slider', 'updated_at',
+    ],
+    'metrics': [
+        'id', 'user__username', 'metricType', 'metric', 'playerAge', 'gradClass',
+        'dateCaptured', 'capturedBy', 'created_at',
+    ],
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def _int(value):
+    value = str(value or '').strip()
+    return int(value) if value.isdigit() else None
+
+
+def filter_metrics_history(params, queryset=None):
+    """
+    Apply the metrics_history filters (search, player_id, event_id) plus
+    grad_year and since/until event dates from a GET-style mapping.
+    """
+    queryset = MetricsHistory.objects.all() if queryset is None else queryset
+
+    search_query = params.get('search', '')
+    if search_query:
+        queryset = queryset.filter(
+            Q(player_id__icontains=search_query) |
+            Q(event_id__icontains=search_query) |
+            Q(gradYear__icontains=search_query)
+        )
+    if _int(params.get('player_id')) is not None:
+        queryset = queryset.filter(player_id=_int(params.get('player_id')))
+    if _int(params.get('event_id')) is not None:
+        queryset = queryset.filter(event_id=_int(params.get('event_id')))
+    if _int(params.get('grad_year')) is not None:
+        queryset = queryset.filter(gradYear=_int(params.get('grad_year')))
+    if parse_date(params.get('since') or ''):
+        queryset = queryset.filter(event_date__date__gte=parse_date(params['since']))
+    if parse_date(params.get('until') or ''):
+        queryset = queryset.filter(event_date__date__lte=parse_date(params['until']))
+    return queryset
+
+
+def filter_player_metrics(params, queryset=None):
+    """Filter PlayerMetric by metric_type, age, grad_class, username, position and since/until capture dates"""
+    queryset = PlayerMetric.objects.all() if queryset is None else queryset
+
+    if params.get('metric_type'):
+        queryset = queryset.filter(metricType=params['metric_type'])
+    if _int(params.get('age')) is not None:
+        queryset = queryset.filter(playerAge=_int(params.get('age')))
+    if _int(params.get('grad_class')) is not None:
+        queryset = queryset.filter(gradClass=_int(params.get('grad_class')))
+    if params.get('username'):
+        queryset = queryset.filter(user__username=params['username'])
+    if params.get('position'):
+        queryset = queryset.filter(user__player_profile__positions=params['position'])
+    if parse_date(params.get('since') or ''):
+        queryset = queryset.filter(dateCaptured__gte=parse_date(params['since']))
+    if parse_date(params.get('until') or ''):
+        queryset = queryset.filter(dateCaptured__lte=parse_date(params['until']))
+    return queryset
+
+
+class _LineBuffer:
+    """File-like object that hands back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(fields, rows):
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), default=str) + '\n'
+
+
+def _gzip(chunks, flush_bytes=64 * 1024):
+    """Gzip a stream of bytes, flushing compressed output every ~flush_bytes of input"""
+    compressor = zlib.compressobj(wbits=31)
+    pending = 0
+    for chunk in chunks:
+        output = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            output += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if output:
+            yield output
+    yield compressor.flush()
+
+
+def _batched(lines, batch_bytes=16 * 1024):
+    """Join small encoded lines into larger chunks to cut per-write overhead"""
+    buffer = []
+    size = 0
+    for line in lines:
+        encoded = line.encode('utf-8')
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= batch_bytes:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def stream_export(queryset, fields, fmt='csv', compress=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the export of ``queryset`` as encoded bytes.
+
+    Ordering is by primary key so the database can stream straight off the
+    index instead of sorting every matching row first.
+    """
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+    lines = _csv_lines(fields, rows) if fmt == 'csv' else _ndjson_lines(fields, rows)
+    chunks = _batched(lines)
+    return _gzip(chunks) if compress else chunks
+
+
+async def as_async_chunks(chunks, batch=16):
+    """
+    Wrap a sync chunk iterator for StreamingHttpResponse under ASGI.
+
+    Django buffers a synchronous iterator into a list before sending it over
+    ASGI, which would hold the whole export in memory. Pulling small batches
+    through sync_to_async keeps streaming, and thread_sensitive=True keeps
+    the cursor on the thread that owns the database connection.
+    """
+    iterator = iter(chunks)
+
+    def next_batch():
+        return list(itertools.islice(iterator, batch))
+
+    while True:
+        items = await sync_to_async(next_batch, thread_sensitive=True)()
+        if not items:
+            break
+        for item in items:
+            yield item
+
+
+def export_filename(kind, fmt, compress):
+    extension = FORMATS[fmt][1]
+    return f'{kind}.{extension}.gz' if compress else f'{kind}.{extension}'
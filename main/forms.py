@@ -120,21 +120,26 @@ class PlayerProfileForm(forms.ModelForm):
             self.fields['first_name'].initial = self.instance.user.first_name
             self.fields['last_name'].initial = self.instance.user.last_name
         # Set initial positions from the model instance
-        if self.instance and self.instance.positions:
+        if self.instance and self.instance.pk:
             self.fields['positions'].initial = self.instance.get_positions_list()
 
     def save(self, commit=True):
         profile = super().save(commit=False)
-        # Handle positions field
+        # Positions are PlayerPosition rows, so they can only be linked once
+        # the profile is saved (immediately, or from save_m2m when commit=False)
         positions_data = self.cleaned_data.get('positions', [])
-        if positions_data:
-            profile.positions = ','.join(positions_data)
-        else:
-            profile.positions = None
         if profile.user:
             profile.user.first_name = self.cleaned_data['first_name']
             profile.user.last_name = self.cleaned_data['last_name']
             profile.user.save()
         if commit:
             profile.save()
+            profile.positions.set(positions_data)
+        else:
+            save_m2m = self.save_m2m
+
+            def save_positions():
+                save_m2m()
+                profile.positions.set(positions_data)
+            self.save_m2m = save_positions
         return profile
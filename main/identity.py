@@ -0,0 +1,284 @@
+"""
+Identity resolution between MetricsHistory player_ids and PlayerProfiles.
+
+match_block() proposes links for one graduation year at a time: a combine
+player and a site user with different grad years are never compared, so the
+work is the sum of the per-year blocks rather than every player against every
+profile. Within a block the players and profiles are summarized into feature
+arrays and scored against each other in chunks of profiles with array
+operations:
+
+* height and weight (the combine player's latest measurement against the
+  profile fields);
+* each metric type's best value against the player's best self-entered
+  PlayerMetric of that type.
+
+Each compared feature scores exp(-d^2 / 2 sigma^2) and the link score is
+their weighted mean. Features either side lacks count as misses up to
+MIN_EVIDENCE, so a pair agreeing on height alone cannot score high.
+MetricsHistory has no name or school columns, so those cannot take part.
+
+A pair becomes a pending PlayerIdentityLink when the player and the profile
+are each other's best match, the score is at least min_score and it beats
+the runner-up on both sides by min_margin, so a profile that fits several
+players equally well is not proposed. Staff confirm or reject links from the admin; confirm() keeps one
+confirmed link per player_id.
+"""
+import logging
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .analytics import LOWER_IS_BETTER, METRIC_TYPE_COLUMNS, MetricsFrame
+from .models import MetricsHistory, PlayerIdentityLink, PlayerMetric, PlayerProfile
+
+logger = logging.getLogger(__name__)
+
+# (feature, sigma, weight); a feature is a MetricsHistory column. Sigmas are
+# a few recording steps wide, so a near miss still scores well but an exact
+# match scores clearly better than a neighbour's.
+FEATURES = [
+    ('height', 0.75, 2.0),
+    ('weight', 4.0, 2.0),
+    ('maxFB', 2.0, 1.0),
+    ('exitVelo', 2.0, 1.0),
+    ('sixtyyard', 0.1, 1.0),
+    ('ifVelo', 2.0, 1.0),
+    ('ofVelo', 2.0, 1.0),
+]
+# Height, weight and one metric; a pair with only height and weight to go on
+# scores at most 4 / 5, under MIN_SCORE.
+MIN_EVIDENCE = 5.0
+MIN_SCORE = 0.85
+# How far a match must beat the runner-up on both sides.
+MIN_MARGIN = 0.02
+CHUNK_SIZE = 512
+PROFILE_FIELDS = {'height': 'height_inches', 'weight': 'weight_lbs'}
+# Rounding for the evidence shown to reviewers.
+DIGITS = {'sixtyyard': 2}
+
+
+def player_features(frame):
+    """(player_ids, {feature: float array}) with NaN where a player has no value"""
+    if not frame.size:
+        return np.array([], dtype=np.int64), {feature: np.array([]) for feature, _, _ in FEATURES}
+    players = frame.values['player_id'].astype(np.int64)
+    order = np.lexsort((frame.event_date.astype(np.int64), players))
+    player_ids, starts = np.unique(players[order], return_index=True)
+
+    features = {}
+    for feature, _, _ in FEATURES:
+        values = frame.values[feature][order].astype(np.float64)
+        valid = frame.valid[feature][order]
+        if feature in PROFILE_FIELDS:
+            # Latest measurement: the last valid row of each player's date-ordered run.
+            position = np.where(valid, np.arange(len(order)), -1)
+            last = np.maximum.reduceat(position, starts)
+            features[feature] = np.where(last >= starts, values[np.maximum(last, 0)], np.nan)
+        elif feature in LOWER_IS_BETTER:
+            best = np.minimum.reduceat(np.where(valid, values, np.inf), starts)
+            features[feature] = np.where(np.isfinite(best), best, np.nan)
+        else:
+            best = np.maximum.reduceat(np.where(valid, values, -np.inf), starts)
+            features[feature] = np.where(np.isfinite(best), best, np.nan)
+    return player_ids, features
+
+
+def profile_features(profiles):
+    """(profile_ids, {feature: float array}) for a PlayerProfile queryset"""
+    rows = list(profiles.order_by('pk').values_list('pk', 'user_id', *PROFILE_FIELDS.values()))
+    profile_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    slot = {row[1]: index for index, row in enumerate(rows)}
+    features = {feature: np.full(len(rows), np.nan) for feature, _, _ in FEATURES}
+    for position, feature in enumerate(PROFILE_FIELDS, start=2):
+        features[feature] = np.array([np.nan if row[position] is None else row[position] for row in rows], dtype=np.float64)
+
+    columns = {metric_type: column for metric_type, column in METRIC_TYPE_COLUMNS.items()
+               if column in features}
+    best = (
+        PlayerMetric.objects.filter(user_id__in=profiles.values('user_id'), metricType__in=columns, metric__gt=0)
+        .order_by().values_list('user_id', 'metricType').annotate(low=Min('metric'), high=Max('metric'))
+    )
+    for user_id, metric_type, low, high in best:
+        column = columns[metric_type]
+        features[column][slot[user_id]] = float(low if column in LOWER_IS_BETTER else high)
+    return profile_ids, features
+
+
+def score(profile, player):
+    """Score matrix (profiles x players) for two feature dicts"""
+    shape = (len(next(iter(profile.values()))), len(next(iter(player.values()))))
+    total = np.zeros(shape, dtype=np.float32)
+    evidence = np.zeros(shape, dtype=np.float32)
+    for feature, sigma, weight in FEATURES:
+        mine, theirs = profile[feature], player[feature]
+        mine_known, theirs_known = ~np.isnan(mine), ~np.isnan(theirs)
+        if not mine_known.any() or not theirs_known.any():
+            continue
+        compared = np.outer(mine_known * np.float32(weight), theirs_known.astype(np.float32))
+        # In place and in float32: this loop is where matching spends its time.
+        similarity = np.subtract.outer(
+            (np.where(mine_known, mine, 0) / sigma).astype(np.float32),
+            (np.where(theirs_known, theirs, 0) / sigma).astype(np.float32),
+        )
+        np.square(similarity, out=similarity)
+        similarity *= -0.5
+        np.exp(similarity, out=similarity)
+        similarity *= compared
+        total += similarity
+        evidence += compared
+    return total / np.maximum(evidence, MIN_EVIDENCE)
+
+
+def scorable(features, min_score=MIN_SCORE):
+    """Mask of the rows with enough known features to reach ``min_score`` against anyone"""
+    known = sum(~np.isnan(features[feature]) * weight for feature, _, weight in FEATURES)
+    return known >= min_score * MIN_EVIDENCE
+
+
+def candidates(profile, player, min_score=MIN_SCORE, min_margin=MIN_MARGIN, chunk_size=CHUNK_SIZE):
+    """
+    (profile index, player index, score, margin) arrays of the pairs that are
+    each other's best match, score at least ``min_score`` and beat both sides'
+    runner-up by at least ``min_margin``.
+    """
+    profiles = len(next(iter(profile.values())))
+    players = len(next(iter(player.values())))
+    if not profiles or not players:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float32), np.array([], dtype=np.float32)
+    # The best player of every profile, with its lead over the second best...
+    best_player = np.empty(profiles, dtype=np.int64)
+    best_score = np.empty(profiles, dtype=np.float32)
+    profile_margin = np.empty(profiles, dtype=np.float32)
+    # ...and the two best scores over all profiles of every player.
+    best_profile = np.zeros(players, dtype=np.int64)
+    top_two = np.zeros((2, players), dtype=np.float32)
+    columns = np.arange(players)
+    for start in range(0, profiles, chunk_size):
+        chunk = {feature: values[start:start + chunk_size] for feature, values in profile.items()}
+        matrix = score(chunk, player)
+        rows = np.arange(len(matrix))
+        best_player[start:start + len(matrix)] = best = matrix.argmax(axis=1)
+        best_score[start:start + len(matrix)] = matrix[rows, best]
+        if players > 1:
+            second = -np.partition(-matrix, 1, axis=1)[:, 1]
+        else:
+            second = np.zeros(len(matrix), dtype=np.float32)
+        profile_margin[start:start + len(matrix)] = matrix[rows, best] - second
+
+        chunk_best = matrix.argmax(axis=0)
+        chunk_first = matrix[chunk_best, columns]
+        chunk_second = -np.partition(-matrix, 1, axis=0)[1] if len(matrix) > 1 else np.zeros(players, np.float32)
+        improved = chunk_first > top_two[0]
+        best_profile = np.where(improved, chunk_best + start, best_profile)
+        top_two = np.vstack([
+            np.maximum(chunk_first, top_two[0]),
+            np.where(improved, np.maximum(top_two[0], chunk_second), np.maximum(top_two[1], chunk_first)),
+        ])
+
+    rows = np.arange(profiles)
+    margin = np.minimum(profile_margin, (top_two[0] - top_two[1])[best_player])
+    keep = (best_profile[best_player] == rows) & (best_score >= min_score) & (margin >= min_margin)
+    return rows[keep], best_player[keep], best_score[keep], margin[keep]
+
+
+def _evidence(profile, player, row, column):
+    evidence = {}
+    for feature, _, _ in FEATURES:
+        mine, theirs = profile[feature][row], player[feature][column]
+        if not (np.isnan(mine) or np.isnan(theirs)):
+            evidence[feature] = [round(float(value), DIGITS.get(feature)) for value in (mine, theirs)]
+    return evidence
+
+
+def match_block(grad_year, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+    """Propose links for one graduation year, replacing its pending ones; returns how many"""
+    confirmed = PlayerIdentityLink.objects.filter(status=PlayerIdentityLink.CONFIRMED)
+    history = MetricsHistory.objects.filter(gradYear=grad_year).exclude(player_id__in=confirmed.values('player_id'))
+    profiles = PlayerProfile.objects.filter(graduation_year=grad_year).exclude(
+        pk__in=confirmed.values('profile_id')
+    )
+    player_ids, player = player_features(MetricsFrame.from_database(history))
+    profile_ids, profile = profile_features(profiles)
+    # Rows that cannot reach min_score against anyone are left out of the comparison.
+    keep = scorable(player, min_score)
+    player_ids, player = player_ids[keep], {feature: values[keep] for feature, values in player.items()}
+    keep = scorable(profile, min_score)
+    profile_ids, profile = profile_ids[keep], {feature: values[keep] for feature, values in profile.items()}
+    rows, columns, scores, margins = candidates(profile, player, min_score=min_score, min_margin=min_margin)
+
+    links = [
+        PlayerIdentityLink(
+            player_id=int(player_ids[column]),
+            profile_id=int(profile_ids[row]),
+            score=round(link_score, 4),
+            margin=round(margin, 4),
+            evidence=_evidence(profile, player, row, column),
+        )
+        for row, column, link_score, margin in zip(rows.tolist(), columns.tolist(), scores.tolist(), margins.tolist())
+    ]
+    with transaction.atomic():
+        PlayerIdentityLink.objects.filter(
+            status=PlayerIdentityLink.PENDING, profile__graduation_year=grad_year
+        ).delete()
+        # Pairs already reviewed keep their status; only their score and evidence move.
+        PlayerIdentityLink.objects.bulk_create(
+            links,
+            update_conflicts=True,
+            unique_fields=['player_id', 'profile'],
+            update_fields=['score', 'margin', 'evidence', 'updated_at'],
+        )
+    logger.info('Class of %s: %d players x %d profiles, %d links proposed',
+                grad_year, len(player_ids), len(profile_ids), len(links))
+    return len(links)
+
+
+def grad_years():
+    """Graduation years present on both sides"""
+    history = set(MetricsHistory.objects.exclude(gradYear=None).order_by().values_list('gradYear', flat=True).distinct())
+    profiles = PlayerProfile.objects.exclude(graduation_year=None).order_by().values_list('graduation_year', flat=True)
+    return sorted(history & set(profiles.distinct()))
+
+
+def confirm(links, user=None):
+    """Confirm links best score first, skipping player_ids already confirmed; returns how many"""
+    confirmed = 0
+    now = timezone.now()
+    with transaction.atomic():
+        taken = set(PlayerIdentityLink.objects.filter(status=PlayerIdentityLink.CONFIRMED)
+                    .values_list('player_id', flat=True))
+        for link in links.exclude(status=PlayerIdentityLink.CONFIRMED).order_by('-score').select_for_update():
+            if link.player_id in taken:
+                continue
+            link.status = PlayerIdentityLink.CONFIRMED
+            link.reviewed_by = user
+            link.reviewed_at = now
+            link.save(update_fields=['status', 'reviewed_by', 'reviewed_at', 'updated_at'])
+            taken.add(link.player_id)
+            confirmed += 1
+            # The player is resolved, so its other candidates leave the queue.
+            PlayerIdentityLink.objects.filter(player_id=link.player_id, status=PlayerIdentityLink.PENDING).update(
+                status=PlayerIdentityLink.REJECTED, reviewed_by=user, reviewed_at=now,
+            )
+    return confirmed
+
+
+def reject(links, user=None):
+    return links.exclude(status=PlayerIdentityLink.REJECTED).update(
+        status=PlayerIdentityLink.REJECTED, reviewed_by=user, reviewed_at=timezone.now(),
+    )
+
+
+def linked_player_ids(profile):
+    return PlayerIdentityLink.objects.filter(profile=profile, status=PlayerIdentityLink.CONFIRMED).values('player_id')
+
+
+def linked_usernames(player_ids, using=None):
+    """{player_id: username} for the confirmed links among ``player_ids``"""
+    links = PlayerIdentityLink.objects.filter(player_id__in=player_ids, status=PlayerIdentityLink.CONFIRMED)
+    if using:
+        links = links.using(using)
+    return dict(links.values_list('player_id', 'profile__user__username'))
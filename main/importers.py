@@ -0,0 +1,345 @@
+"""
+Vendor adapters for MetricsHistory imports.
+
+An adapter describes one export layout: ``columns`` maps each MetricsHistory
+field to the header (or alternative headers) it comes from, and
+``date_column``, ``date_formats`` and ``converters`` say how to read the
+cells. Files are opened with a streaming reader chosen by extension (CSV row
+by row, Excel through openpyxl's read-only mode), and detect() picks the
+adapter whose headers the file has. settings.IMPORT_ADAPTERS lists the
+adapters as dotted paths, like IMPORT_VALIDATORS.
+
+Every adapter feeds the same write path: parse_chunk() turns a batch of raw
+rows into a validation.ImportChunk of NumPy columns, and build_objects()
+turns the accepted rows into MetricsHistory instances for one bulk insert. A
+new vendor is a new mapping, not a new import loop.
+
+Resuming works on rows, not bytes: an ImportJob's checkpoint is the last
+committed line, and a resumed run skips that many rows of the same reader,
+which works for Excel files as well as CSV.
+"""
+import csv
+import hashlib
+import os
+import re
+from datetime import date, datetime
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import validation
+from .ages import age_for
+from .models import MetricsHistory
+
+DECIMAL_FIELDS = {'popTime', 'sixtyyard'}
+EXCEL_EXTENSIONS = {'.xlsx', '.xlsm'}
+
+DEFAULT_ADAPTERS = [
+    'main.importers.MergeAdapter',
+    'main.importers.PerfectGameAdapter',
+    'main.importers.PlayerMetrixAdapter',
+    'main.importers.PrepBaseballAdapter',
+]
+
+
+def normalize_header(header):
+    """Header comparison ignores case, spacing and punctuation"""
+    return re.sub(r'[^a-z0-9]+', '', str(header or '').lower())
+
+
+def parse_number(value):
+    """A numeric cell as float, NaN if empty or invalid"""
+    if value is None or isinstance(value, bool):
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return np.nan
+
+
+def parse_feet_inches(value):
+    """Height as inches from 74, "6-2", "6'2" or 6' 2"; NaN if unreadable"""
+    number = parse_number(value)
+    if not np.isnan(number):
+        return number
+    match = re.fullmatch(r"\s*(\d)\s*(?:-|'|ft)\s*(\d{1,2}(?:\.\d+)?)\s*(?:\"|in)?\s*", str(value or ''))
+    if not match:
+        return np.nan
+    return int(match.group(1)) * 12 + float(match.group(2))
+
+
+class Adapter:
+    """An export layout: header mapping plus cell parsing"""
+    name = ''
+    label = ''
+    # MetricsHistory field -> header, or a tuple of accepted headers
+    columns = {}
+    date_column = ()
+    date_formats = ('%m/%d/%Y %H:%M', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d')
+    # MetricsHistory field -> callable(cell) -> float, for cells that are not plain numbers
+    converters = {}
+
+    def __init__(self):
+        self._lookup = {}
+
+    @staticmethod
+    def _names(headers):
+        return (headers,) if isinstance(headers, str) else tuple(headers)
+
+    def bind(self, headers):
+        """Resolve the mapping against a file's headers; returns the fields found"""
+        present = {normalize_header(header): header for header in headers}
+        self._lookup = {}
+        for field, names in list(self.columns.items()) + [('event_date', self.date_column)]:
+            for name in self._names(names):
+                if normalize_header(name) in present:
+                    self._lookup[field] = present[normalize_header(name)]
+                    break
+        return set(self._lookup)
+
+    def score(self, headers):
+        """How many mapped headers the file has, or None when it lacks an ID column"""
+        found = self.bind(headers)
+        if not set(validation.REQUIRED_COLUMNS) <= found:
+            return None
+        return len(found)
+
+    def number(self, field, row):
+        header = self._lookup.get(field)
+        if header is None:
+            return np.nan
+        return self.converters.get(field, parse_number)(row.get(header))
+
+    def event_date(self, row):
+        """The row's event date; empty means now, unparseable returns None"""
+        header = self._lookup.get('event_date')
+        value = row.get(header) if header else None
+        if isinstance(value, datetime):
+            return value if timezone.is_aware(value) else timezone.make_aware(value)
+        if isinstance(value, date):
+            return timezone.make_aware(datetime(value.year, value.month, value.day))
+        value = str(value or '').strip()
+        if not value:
+            return timezone.now()
+        for fmt in self.date_formats:
+            try:
+                return timezone.make_aware(datetime.strptime(value, fmt))
+            except ValueError:
+                continue
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class MergeAdapter(Adapter):
+    """merge.csv, the combined players/events export"""
+    name = 'merge'
+    label = 'merge.csv'
+    columns = {
+        'height': 'height',
+        'weight': 'weight',
+        'ifVelo': 'ifVelo',
+        'ofVelo': 'ofVelo',
+        'cVelo': 'cVelo',
+        'exitVelo': 'exitVelo',
+        'maxFB': 'maxFB',
+        'popTime': 'popTime',
+        'sixtyyard': 'sixtyyard',
+        'changeUp': 'changeUp',
+        'curve': 'curve',
+        'slider': 'slider',
+        'event_id': 'event_id',
+        'player_id': 'player_id',
+        'gradYear': 'players.gradYear',
+    }
+    date_column = 'events.date'
+
+
+class PerfectGameAdapter(Adapter):
+    name = 'perfect_game'
+    label = 'Perfect Game'
+    columns = {
+        'height': ('Height', 'Ht'),
+        'weight': ('Weight', 'Wt'),
+        'ifVelo': ('IF Velo', 'Infield Velo'),
+        'ofVelo': ('OF Velo', 'Outfield Velo'),
+        'cVelo': ('C Velo', 'Catcher Velo'),
+        'exitVelo': ('Exit Velo', 'Exit Velocity'),
+        'maxFB': ('FB Velo', 'Fastball Velo', 'FB Max'),
+        'popTime': ('Pop Time', 'C Pop'),
+        'sixtyyard': ('60 Yd', '60 Yard', '60'),
+        'changeUp': ('CH Velo', 'Changeup'),
+        'curve': ('CB Velo', 'Curveball'),
+        'slider': ('SL Velo', 'Slider'),
+        'event_id': ('PG Event ID', 'Event ID'),
+        'player_id': ('PG Player ID', 'PG ID'),
+        'gradYear': ('Grad Year', 'Class', 'HS Grad Year'),
+    }
+    date_column = ('Event Date', 'Date')
+    converters = {'height': parse_feet_inches}
+
+
+class PlayerMetrixAdapter(Adapter):
+    name = 'player_metrix'
+    label = 'Player Metrix'
+    columns = {
+        'height': ('height_in', 'Height (in)'),
+        'weight': ('weight_lbs', 'Weight (lbs)'),
+        'ifVelo': ('infield_velo_mph',),
+        'ofVelo': ('outfield_velo_mph',),
+        'cVelo': ('catcher_velo_mph',),
+        'exitVelo': ('exit_velo_mph', 'bat_exit_velo_mph'),
+        'maxFB': ('fastball_max_mph',),
+        'popTime': ('pop_time_sec',),
+        'sixtyyard': ('sixty_yard_sec', 'sixty_sec'),
+        'changeUp': ('changeup_mph',),
+        'curve': ('curveball_mph',),
+        'slider': ('slider_mph',),
+        'event_id': ('session_id',),
+        'player_id': ('athlete_id',),
+        'gradYear': ('grad_year', 'class_of'),
+    }
+    date_column = ('session_date', 'tested_at')
+
+
+class PrepBaseballAdapter(Adapter):
+    name = 'prep_baseball'
+    label = 'Prep Baseball'
+    columns = {
+        'height': ('HT', 'Height'),
+        'weight': ('WT', 'Weight'),
+        'ifVelo': ('INF Velo', 'IF'),
+        'ofVelo': ('OF Velo', 'OF'),
+        'cVelo': ('C Velo', 'C'),
+        'exitVelo': ('Exit Velo', 'EV'),
+        'maxFB': ('FB Max', 'FB'),
+        'popTime': ('Pop', 'Pop Time'),
+        'sixtyyard': ('60 Time', '60'),
+        'changeUp': ('CH',),
+        'curve': ('CB',),
+        'slider': ('SL',),
+        'event_id': ('Event #', 'Event Number'),
+        'player_id': ('PBR ID', 'Player #'),
+        'gradYear': ('Grad', 'Grad Year'),
+    }
+    date_column = ('Event Date', 'Date')
+    converters = {'height': parse_feet_inches}
+
+
+def get_adapters():
+    return [import_string(path)() for path in getattr(settings, 'IMPORT_ADAPTERS', DEFAULT_ADAPTERS)]
+
+
+def get_adapter(name):
+    for adapter in get_adapters():
+        if adapter.name == name:
+            return adapter
+    raise LookupError(f'unknown import adapter {name!r}')
+
+
+def detect(headers, adapters=None):
+    """The adapter matching the most of ``headers``, or None if none has the ID columns"""
+    best, best_score = None, None
+    for adapter in adapters if adapters is not None else get_adapters():
+        score = adapter.score(headers)
+        if score is not None and (best_score is None or score > best_score):
+            best, best_score = adapter, score
+    if best is not None:
+        best.bind(headers)
+    return best
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 hex digest of a file, read in blocks; ImportJob matches files by it"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv(path):
+    """(open file, headers, row dicts) streamed from a CSV file"""
+    handle = open(path, 'r', encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(handle)
+    return handle, reader.fieldnames or [], reader
+
+
+def _cell(value):
+    # Cells go into ImportReject.data as JSON, so dates become ISO strings.
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def read_excel(path):
+    """(workbook, headers, row dicts) streamed from the first sheet of an .xlsx workbook"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError('Reading Excel files needs openpyxl (pip install openpyxl)') from e
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    headers = [str(value) if value is not None else '' for value in next(rows, ())]
+
+    def records():
+        for values in rows:
+            if any(value is not None for value in values):
+                yield {header: _cell(value) for header, value in zip(headers, values)}
+    return workbook, headers, records()
+
+
+def open_rows(path):
+    """(closeable, headers, row iterator) for a CSV or Excel file, picked by extension"""
+    if os.path.splitext(path)[1].lower() in EXCEL_EXTENSIONS:
+        return read_excel(path)
+    return read_csv(path)
+
+
+def parse_chunk(adapter, batch):
+    """Turn (line number, row) pairs into a validation.ImportChunk"""
+    rows = [row for _, row in batch]
+    columns = {
+        field: np.fromiter((adapter.number(field, row) for row in rows), dtype=np.float64, count=len(rows))
+        for field in MergeAdapter.columns
+    }
+    dates = [adapter.event_date(row) for row in rows]
+    columns['event_date'] = np.fromiter(
+        (value.timestamp() if value else np.nan for value in dates), dtype=np.float64, count=len(rows)
+    )
+    chunk = validation.ImportChunk(columns, rows, [line for line, _ in batch])
+    chunk.event_dates = dates
+    return chunk
+
+
+def build_objects(chunk):
+    """MetricsHistory instances for the rows that passed validation"""
+    accepted = chunk.accepted
+    values = {}
+    for field in MergeAdapter.columns:
+        column = chunk.columns[field][accepted]
+        missing = np.isnan(column).tolist()
+        # Whole-column conversion; the per-row work below is only assembling kwargs.
+        if field in DECIMAL_FIELDS:
+            converted = np.round(column, 2).tolist()
+        else:
+            converted = np.nan_to_num(column).astype(np.int64).tolist()
+        values[field] = [None if gap else value for gap, value in zip(missing, converted)]
+
+    objects = []
+    fields = list(values)
+    for index, row in zip(accepted.tolist(), zip(*values.values())):
+        kwargs = dict(zip(fields, row))
+        event_date = chunk.event_dates[index]
+        grad_year = kwargs['gradYear']
+        # No vendor exports an age, so it is derived from the class.
+        objects.append(MetricsHistory(
+            event_date=event_date,
+            playerage=age_for(grad_year, event_date) if grad_year else 0,
+            **kwargs,
+        ))
+    return objects
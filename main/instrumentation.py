@@ -0,0 +1,173 @@
+import bisect
+import contextvars
+import threading
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+
+# Holds the RequestTimings for the request currently being served. A context
+# variable works for both the WSGI thread pool and the ASGI event loop.
+current_timings = contextvars.ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Per-request counters filled in by the middleware and template backend"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_name = None
+        self.query_count = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Hook passed to connection.execute_wrapper() to time ORM queries"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - started
+            self.query_count += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+class TimedTemplate(Template):
+    """Django template that adds its render time to the current request"""
+
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+
+        # Nested renders ({% include %} via get_template) are only counted
+        # once, by the outermost template.
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            if timings.template_depth == 0:
+                timings.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend returning TimedTemplate instances"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+# Upper bounds (milliseconds) of the latency histogram buckets. The last
+# bucket is open-ended.
+LATENCY_BUCKETS_MS = (
+    5, 10, 25, 50, 75, 100, 150, 250, 400, 600, 1000, 1500, 2500, 5000, 10000,
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with interpolated percentiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, pct):
+        """Estimate the pct-th percentile assuming a uniform spread per bucket"""
+        if not self.count:
+            return None
+        rank = self.count * pct / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index else 0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                fraction = (rank - seen) / bucket_count
+                return round(min(lower + (upper - lower) * fraction, self.max), 2)
+            seen += bucket_count
+        return round(self.max, 2)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 2) if self.count else None,
+            'max_ms': round(self.max, 2),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets_ms': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+        }
+
+
+class ViewStats:
+    """Latency, query and size aggregates for a single view"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.queries = 0
+        self.query_ms = 0.0
+        self.template_ms = 0.0
+        self.response_bytes = 0
+        self.errors = 0
+
+    def summary(self):
+        count = self.latency.count or 1
+        summary = self.latency.summary()
+        summary.update({
+            'avg_queries': round(self.queries / count, 2),
+            'avg_query_ms': round(self.query_ms / count, 2),
+            'avg_template_ms': round(self.template_ms / count, 2),
+            'avg_response_bytes': int(self.response_bytes / count),
+            'errors': self.errors,
+        })
+        return summary
+
+
+class StatsRegistry:
+    """Process-wide, thread-safe collection of ViewStats keyed by view name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, total_ms, queries, query_ms, template_ms, response_bytes, status_code):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = ViewStats()
+            stats.latency.observe(total_ms)
+            stats.queries += queries
+            stats.query_ms += query_ms
+            stats.template_ms += template_ms
+            stats.response_bytes += response_bytes
+            if status_code >= 500:
+                stats.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = StatsRegistry()
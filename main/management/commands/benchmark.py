@@ -0,0 +1,238 @@
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from main import events, synthetic
+from main.models import ImportJob, ImportReject, MetricsHistory, Observation, PlayerMetric, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the main request paths and import_csv_data at several data sizes '
+        'and store the results as JSON so runs can be compared between commits'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='10000',
+            help='Comma-separated MetricsHistory row counts to benchmark at, e.g. 10000,1000000,10000000'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Wipe MetricsHistory and synthetic users and regenerate data for each size. '
+                 'Use a dedicated DATABASE_URL: this deletes data.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed calls per request path (default: 20)'
+        )
+        parser.add_argument(
+            '--import-rows',
+            type=int,
+            default=5000,
+            help='Rows in the CSV used to time import_csv_data (default: 5000)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='benchmarks',
+            help='Directory for JSON results (default: benchmarks/)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for data generation and request sampling (default: 0)'
+        )
+        parser.add_argument(
+            '--compare',
+            nargs=2,
+            metavar=('BASE', 'HEAD'),
+            help='Compare two result files instead of running benchmarks'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            self.compare(*options['compare'])
+            return
+
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        if not options['reset'] and len(sizes) > 1:
+            raise CommandError('Benchmarking several sizes regenerates data; pass --reset.')
+
+        self.rng = random.Random(options['seed'])
+        results = {}
+        for size in sizes:
+            if options['reset']:
+                self.prepare_data(size, options['seed'])
+            label = str(size) if options['reset'] else f'current ({MetricsHistory.objects.count()} rows)'
+            self.stdout.write(f'Benchmarking at {label}...')
+            results[label] = self.run_cases(options['repeat'], options['import_rows'], options['seed'])
+            for case, stats in results[label].items():
+                self.stdout.write(
+                    f'  {case:<32} median {stats["median_ms"]:>9.2f} ms  p95 {stats["p95_ms"]:>9.2f} ms  '
+                    f'queries {str(stats["queries"]):>5}  errors {stats["errors"]}'
+                )
+
+        path = self.save(results, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def prepare_data(self, size, seed):
+        self.stdout.write(f'Generating {size} history rows and {max(100, size // 100)} users...')
+        call_command('generate_synthetic_data', clear=True, history=size, users=max(100, size // 100), seed=seed,
+                     stdout=io.StringIO())
+
+    def run_cases(self, repeat, import_rows, seed):
+        users = list(User.objects.filter(username__startswith=synthetic.SYNTHETIC_USERNAME_PREFIX)
+                     .values_list('username', flat=True)[:1000])
+        if not users:
+            raise CommandError('No synthetic users found; run with --reset or generate_synthetic_data --users N first.')
+        metric_ids = list(PlayerMetric.objects.filter(user__username__in=users).values_list('id', flat=True)[:1000])
+        grad_years = list(MetricsHistory.objects.values_list('gradYear', flat=True).distinct()[:20]) or [2027]
+        last_page = max(1, (MetricsHistory.objects.count() + 24) // 25)
+
+        anonymous = Client()
+        logged_in = Client()
+        logged_in.force_login(User.objects.get(username=users[0]))
+
+        cases = {
+            'profile_by_username': lambda: anonymous.get(f'/{self.rng.choice(users)}/'),
+            'results': lambda: anonymous.get(f'/results/{self.rng.choice(metric_ids)}/'),
+            'metrics_history_search': lambda: anonymous.get('/history/', {'search': self.rng.choice(grad_years)}),
+            'metrics_history_deep_page': lambda: anonymous.get('/history/', {'page': last_page - self.rng.randint(0, 10)}),
+            'add': lambda: logged_in.post('/add/', {
+                'playerAge': 16,
+                'dateCaptured': date.today().isoformat(),
+                'capturedBy': 'Self Captured',
+                'metric_exitvelo': f'{self.rng.uniform(60, 95):.1f}',
+                'metric_60': f'{self.rng.uniform(6.5, 8.5):.2f}',
+            }),
+        }
+        results = {name: self.time_case(func, repeat) for name, func in cases.items()}
+        results['import_csv_data'] = self.time_import(import_rows, seed)
+        return results
+
+    def time_case(self, func, repeat):
+        durations = []
+        errors = 0
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                try:
+                    response = func()
+                    if response.status_code >= 400:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                durations.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+        return self.summarize(durations, errors=errors, queries=queries)
+
+    def time_import(self, rows, seed):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            path = handle.name
+        try:
+            call_command('generate_synthetic_data', history=rows, csv=path, seed=seed + 1, stdout=io.StringIO())
+            last_id = MetricsHistory.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            last_job = ImportJob.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            started = time.perf_counter()
+            # Every size imports the same synthetic file, which would otherwise be skipped as a duplicate.
+            call_command('import_csv_data', file=path, force=True, stdout=io.StringIO())
+            elapsed = time.perf_counter() - started
+            imported = MetricsHistory.objects.filter(id__gt=last_id).count()
+            self.undo_import(last_id, last_job, os.path.basename(path))
+        finally:
+            os.unlink(path)
+        stats = self.summarize([elapsed * 1000], errors=rows - imported, queries=None)
+        stats['rows'] = rows
+        stats['rows_per_sec'] = round(imported / elapsed, 1) if elapsed else None
+        return stats
+
+    def undo_import(self, last_id, last_job, source):
+        """Remove what the timed import wrote, so the next size starts from the data it generated"""
+        jobs = ImportJob.objects.filter(id__gt=last_job)
+        event_ids = {event_id for job in jobs for event_id in job.event_ids}
+        MetricsHistory.objects.filter(id__gt=last_id).delete()
+        Observation.objects.filter(source=Observation.HISTORY, source_id__gt=last_id).delete()
+        ImportReject.objects.filter(source=source).delete()
+        jobs.delete()
+        # Drops the summaries of events the import created and restores any it changed.
+        events.refresh(event_ids)
+
+    def summarize(self, durations, errors, queries):
+        ordered = sorted(durations)
+        return {
+            'calls': len(ordered),
+            'min_ms': round(ordered[0], 3),
+            'median_ms': round(statistics.median(ordered), 3),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            'mean_ms': round(statistics.fmean(ordered), 3),
+            'queries': queries,
+            'errors': errors,
+        }
+
+    def save(self, results, output):
+        if not os.path.isabs(output):
+            output = os.path.join(settings.BASE_DIR, output)
+        os.makedirs(output, exist_ok=True)
+        commit = self.git_commit()
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(output, f'{stamp}-{commit[:8]}.json')
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'commit': commit,
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'results': results,
+            }, handle, indent=2)
+        return path
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return 'unknown'
+
+    def compare(self, base_path, head_path):
+        with open(base_path, encoding='utf-8') as handle:
+            base = json.load(handle)
+        with open(head_path, encoding='utf-8') as handle:
+            head = json.load(handle)
+        self.stdout.write(f'{base["commit"][:8]} -> {head["commit"][:8]} (median ms)')
+        for size, cases in head['results'].items():
+            self.stdout.write(f'{size}:')
+            for case, stats in cases.items():
+                before = base['results'].get(size, {}).get(case)
+                if not before:
+                    self.stdout.write(f'  {case:<32} {"":>10} -> {stats["median_ms"]:>10.2f}  (new)')
+                    continue
+                ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+                style = self.style.ERROR if ratio > 1.1 else self.style.SUCCESS if ratio < 0.9 else str
+                self.stdout.write(style(
+                    f'  {case:<32} {before["median_ms"]:>10.2f} -> {stats["median_ms"]:>10.2f}  x{ratio:.2f}'
+                ))
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import Greatest, Least, TruncMonth
+from django.utils import timezone
+from main.models import AnonymousMetricRollup, PlayerMetric
+
+
+class Command(BaseCommand):
+    help = 'Roll up anonymous PlayerMetric rows older than the retention period into monthly totals and delete them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ANONYMOUS_METRIC_RETENTION_DAYS,
+            help='Compact anonymous rows created more than this many days ago '
+                 '(default: ANONYMOUS_METRIC_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows rolled up and deleted per transaction (default: 5000)'
+        )
+        parser.add_argument(
+            '--no-rollup',
+            action='store_true',
+            help='Delete the rows without adding them to AnonymousMetricRollup'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report how many rows would be compacted without changing anything'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = PlayerMetric.objects.filter(user=None, created_at__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} anonymous row(s) created before {cutoff:%Y-%m-%d} would be compacted')
+            return
+
+        compacted = 0
+        while True:
+            # Small transactions keep locks short on a table every profile page reads.
+            with transaction.atomic():
+                ids = list(expired.order_by('id').values_list('id', flat=True)[:options['chunk_size']])
+                if not ids:
+                    break
+                if not options['no_rollup']:
+                    self.roll_up(ids)
+                PlayerMetric.objects.filter(id__in=ids).delete()
+            compacted += len(ids)
+            self.stdout.write(f'  compacted {compacted} row(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Compacted {compacted} anonymous row(s) created before {cutoff:%Y-%m-%d}'))
+
+    def roll_up(self, ids):
+        groups = (
+            PlayerMetric.objects.filter(id__in=ids)
+            .annotate(month=TruncMonth('created_at', output_field=models.DateField()))
+            .values('metricType', 'playerAge', 'month')
+            .annotate(count=Count('id'), total=Sum('metric'), minimum=Min('metric'), maximum=Max('metric'))
+            .order_by()
+        )
+        for group in groups:
+            rollup, created = AnonymousMetricRollup.objects.select_for_update().get_or_create(
+                metricType=group['metricType'],
+                playerAge=group['playerAge'],
+                month=group['month'],
+                defaults={key: group[key] for key in ('count', 'total', 'minimum', 'maximum')},
+            )
+            if not created:
+                AnonymousMetricRollup.objects.filter(pk=rollup.pk).update(
+                    count=F('count') + group['count'],
+                    total=F('total') + group['total'],
+                    minimum=Least('minimum', group['minimum']),
+                    maximum=Greatest('maximum', group['maximum']),
+                )
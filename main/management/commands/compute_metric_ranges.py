@@ -0,0 +1,90 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from main import analytics, evaluation, observations
+from main.models import MetricsRange
+
+
+class Command(BaseCommand):
+    help = 'Recompute MetricsRange (min/max/avg and quantiles per metric type and age) from MetricsHistory in one vectorized pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            choices=['auto', 'snapshot', 'database', 'observations'],
+            default='auto',
+            help='Read the columnar snapshot, the database, the snapshot when one exists (default: auto), '
+                 'or the Observation store, which adds users\' own PlayerMetric entries'
+        )
+        parser.add_argument(
+            '--dir',
+            type=str,
+            help='Snapshot directory (default: settings.ANALYTICS_SNAPSHOT_DIR)'
+        )
+        parser.add_argument(
+            '--min-count',
+            type=int,
+            default=1,
+            help='Skip ages with fewer measurements than this (default: 1)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the computed ranges as JSON instead of saving them'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['source'] == 'snapshot':
+            frame = analytics.MetricsFrame.from_snapshot(options['dir'])
+        elif options['source'] == 'database':
+            frame = analytics.MetricsFrame.from_database()
+        elif options['source'] == 'observations':
+            frame = observations.to_frame(observations.Observation.objects.filter(
+                metric__in=analytics.METRIC_TYPE_COLUMNS.values()
+            ))
+        else:
+            frame = analytics.load_frame(options['dir'])
+        loaded = time.perf_counter()
+
+        columns = list(analytics.METRIC_TYPE_COLUMNS.values())
+        stats = frame.group_stats(columns, by='playerage', quantiles=evaluation.QUANTILES)
+        computed = time.perf_counter()
+
+        ages = {age for age, _ in MetricsRange.AGE_CHOICES}
+        ranges = [
+            MetricsRange(
+                metricType=metric_type,
+                playerAge=age,
+                Min=Decimal(str(entry['min'])),
+                Max=Decimal(str(entry['max'])),
+                Avg=Decimal(str(entry['mean'])),
+                quantiles=entry['quantiles'],
+            )
+            for metric_type, column in analytics.METRIC_TYPE_COLUMNS.items()
+            for age, entry in stats[column].items()
+            if age in ages and entry['count'] >= options['min_count']
+        ]
+
+        if options['dry_run']:
+            self.stdout.write(json.dumps(
+                [{'metricType': r.metricType, 'playerAge': r.playerAge, 'min': str(r.Min),
+                  'max': str(r.Max), 'avg': str(r.Avg)} for r in ranges],
+                indent=2,
+            ))
+            return
+
+        MetricsRange.objects.bulk_create(
+            ranges,
+            update_conflicts=True,
+            unique_fields=['metricType', 'playerAge'],
+            update_fields=['Min', 'Max', 'Avg', 'quantiles', 'updated'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Saved {len(ranges)} ranges from {frame.size} rows '
+                f'(load {loaded - started:.2f}s, compute {computed - loaded:.2f}s)'
+            )
+        )
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from main import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream MetricsHistory or PlayerMetric rows to a CSV or NDJSON file (optionally gzipped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=sorted(exports.EXPORT_FIELDS),
+            help='history (MetricsHistory) or metrics (PlayerMetric)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(exports.FORMATS),
+            default='csv',
+            help='Output format (default: csv)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Gzip the output on the fly'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Output file (default: stdout)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=exports.DEFAULT_CHUNK_SIZE,
+            help=f'Rows fetched per database round trip (default: {exports.DEFAULT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='Filter like the web export, e.g. --filter grad_year=2027 --filter since=2024-01-01'
+        )
+
+    def handle(self, *args, **options):
+        params = {}
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Filters must look like NAME=VALUE, got {item!r}')
+            params[name] = value
+
+        if options['kind'] == 'history':
+            queryset = exports.filter_metrics_history(params)
+        else:
+            queryset = exports.filter_player_metrics(params)
+
+        chunks = exports.stream_export(
+            queryset, exports.EXPORT_FIELDS[options['kind']], fmt=options['format'],
+            compress=options['gzip'], chunk_size=options['chunk_size'],
+        )
+
+        started = time.perf_counter()
+        written = 0
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(
+                f'Wrote {written} bytes to {os.path.abspath(options["output"])} '
+                f'in {time.perf_counter() - started:.1f}s'
+            ))
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from main import analytics, projections
+from main.models import GrowthCurve
+
+
+class Command(BaseCommand):
+    help = 'Fit per-age growth curves for each metric from MetricsHistory and store them in GrowthCurve'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            choices=['auto', 'snapshot', 'database'],
+            default='auto',
+            help='Read the columnar snapshot, the database, or the snapshot when one exists (default: auto)'
+        )
+        parser.add_argument(
+            '--dir',
+            type=str,
+            help='Snapshot directory (default: settings.ANALYTICS_SNAPSHOT_DIR)'
+        )
+        parser.add_argument(
+            '--min-samples',
+            type=int,
+            default=30,
+            help='Skip age transitions with fewer player pairs than this (default: 30)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the fitted coefficients without saving them'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['source'] == 'snapshot':
+            frame = analytics.MetricsFrame.from_snapshot(options['dir'])
+        elif options['source'] == 'database':
+            frame = analytics.MetricsFrame.from_database()
+        else:
+            frame = analytics.load_frame(options['dir'])
+        curves = projections.fit_curves(frame, min_samples=options['min_samples'])
+
+        for curve in curves:
+            self.stdout.write(
+                f'  {curve.metricType:<9} {curve.fromAge}->{curve.toAge}  '
+                f'y = {curve.intercept:.3f} + {curve.slope:.3f}x  '
+                f'(sd {curve.residualStd:.3f}, n={curve.samples})'
+            )
+        if options['dry_run']:
+            return
+
+        with transaction.atomic():
+            GrowthCurve.objects.all().delete()
+            GrowthCurve.objects.bulk_create(curves)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Fitted {len(curves)} growth curves from {frame.size} rows in {time.perf_counter() - started:.1f}s'
+            )
+        )
@@ -0,0 +1,107 @@
+import csv
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from main import events, observations, synthetic
+from main.models import EventSummary, MetricsHistory, Observation
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, profiles, player metrics and MetricsHistory rows for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=0,
+            help='Number of synthetic users (with PlayerProfile and PlayerMetric series) to create'
+        )
+        parser.add_argument(
+            '--metrics-per-user',
+            type=int,
+            default=6,
+            help='PlayerMetric rows per synthetic user (default: 6)'
+        )
+        parser.add_argument(
+            '--history',
+            type=int,
+            default=0,
+            help='Number of MetricsHistory rows to create'
+        )
+        parser.add_argument(
+            '--csv',
+            type=str,
+            help='Write the MetricsHistory rows to this CSV (merge.csv layout) instead of the database'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed, so runs are reproducible (default: 0)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert (default: 5000)'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete synthetic users and all MetricsHistory rows first'
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            synthetic.delete_synthetic_players()
+            MetricsHistory.objects.all().delete()
+            EventSummary.objects.all().delete()
+            Observation.objects.filter(source=Observation.HISTORY).delete()
+            observations.prune()
+            self.stdout.write(self.style.WARNING('Cleared synthetic users and MetricsHistory data'))
+
+        if options['users']:
+            started = time.perf_counter()
+            users, metrics = synthetic.create_players(
+                options['users'],
+                metrics_per_user=options['metrics_per_user'],
+                seed=options['seed'],
+                batch_size=max(1, options['batch_size'] // max(1, options['metrics_per_user'])),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Created {users} users and {metrics} player metrics in {time.perf_counter() - started:.1f}s'
+            ))
+            # bulk_create sends no post_save, so the new metrics are synced here.
+            self.stdout.write(f'Wrote {observations.sync_player_metrics()} player observations')
+
+        if options['history']:
+            started = time.perf_counter()
+            if options['csv']:
+                path = options['csv']
+                if not os.path.isabs(path):
+                    path = os.path.join(settings.BASE_DIR, path)
+                written = self.write_csv(path, options['history'], options['seed'])
+                target = path
+            else:
+                written = synthetic.create_history(
+                    options['history'], seed=options['seed'], batch_size=options['batch_size']
+                )
+                target = 'MetricsHistory'
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {written} history rows to {target} in {time.perf_counter() - started:.1f}s'
+            ))
+            if not options['csv']:
+                self.stdout.write(f'Rebuilt {events.rebuild()} event summaries')
+                self.stdout.write(f'Wrote {observations.sync_history()} history observations')
+
+    def write_csv(self, path, count, seed):
+        written = 0
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=synthetic.CSV_COLUMNS)
+            writer.writeheader()
+            for row in synthetic.history_rows(count, seed=seed):
+                writer.writerow(row)
+                written += 1
+        return written
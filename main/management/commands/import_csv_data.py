@@ -1,33 +1,67 @@
-import csv
+import itertools
 import os
-from datetime import datetime
+import time
+import numpy as np
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from main.models import MetricsHistory
+from main.models import EventSummary, MetricsHistory, ImportJob, ImportReject, Observation
+from main import events, importers, metrics, observations, partitioning, validation
 
 
 class Command(BaseCommand):
-    help = 'Import player metrics data from merge.csv file'
+    help = 'Import player metrics data from merge.csv or a vendor CSV/Excel export'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--file',
             type=str,
             default='merge.csv',
-            help='Path to the CSV file (default: merge.csv)'
+            help='Path to the CSV or Excel file (default: merge.csv)'
+        )
+        parser.add_argument(
+            '--adapter',
+            choices=[adapter.name for adapter in importers.get_adapters()],
+            help='Export layout of the file (default: detected from the header row)'
         )
         parser.add_argument(
             '--clear',
             action='store_true',
             help='Clear existing data before importing'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows parsed, validated and inserted per chunk (default: 1000)'
+        )
+        parser.add_argument(
+            '--replace-season',
+            type=int,
+            action='append',
+            default=[],
+            metavar='YEAR',
+            help='Remove existing rows for this event year before importing (repeatable). '
+                 'Truncates the partition when MetricsHistory is partitioned.'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the unfinished ImportJob of this file after its last committed chunk'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Import even if this file was already imported or has an unfinished ImportJob'
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
         clear_existing = options['clear']
+        resume = options['resume']
         
-        # Construct full path to CSV file
+        # Construct full path to the file
         if not os.path.isabs(file_path):
             file_path = os.path.join(settings.BASE_DIR, file_path)
         
@@ -36,96 +70,187 @@ class Command(BaseCommand):
                 self.style.ERROR(f'File not found: {file_path}')
             )
             return
+        if resume and (clear_existing or options['replace_season']):
+            self.stdout.write(
+                self.style.ERROR('--resume cannot be combined with --clear or --replace-season')
+            )
+            return
+        
+        source = os.path.basename(file_path)
+        file_hash = importers.file_hash(file_path)
+        jobs = ImportJob.objects.filter(file_hash=file_hash)
+        unfinished = jobs.exclude(status=ImportJob.COMPLETED).first()
+        job = unfinished if resume else None
+        # Clearing removes what earlier runs wrote, so the file may be imported again.
+        if not (options['force'] or clear_existing):
+            done = jobs.filter(status=ImportJob.COMPLETED).first()
+            if done:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'Skipping {source}: already imported by job {done.pk} ({done.finished_at:%Y-%m-%d %H:%M})'
+                    )
+                )
+                return
+            if unfinished and not resume:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f'Job {unfinished.pk} stopped {source} after line {unfinished.line}. '
+                        'Rerun with --resume to continue it, or --force to import from the start.'
+                    )
+                )
+                return
+        if resume and job is None:
+            self.stdout.write(f'No unfinished import of {source}, starting from the beginning')
+        
+        # Pick the adapter before anything is cleared
+        closeable, headers, rows = importers.open_rows(file_path)
+        adapter_name = job.adapter if job else options['adapter']
+        if adapter_name:
+            adapter = importers.get_adapter(adapter_name)
+            if adapter.score(headers) is None:
+                adapter = None
+        else:
+            adapter = importers.detect(headers)
+        if adapter is None:
+            closeable.close()
+            self.stdout.write(
+                self.style.ERROR(f'No import adapter recognises the columns of {file_path}')
+            )
+            return
+        self.stdout.write(f'Reading {source} as {adapter.label}')
+        
+        partitioned = partitioning.is_partitioned()
+        # Events written or cleared by this run; their EventSummary rows are recomputed at the end.
+        touched_events = set()
         
         # Clear existing data if requested
         if clear_existing:
-            MetricsHistory.objects.all().delete()
+            if partitioned:
+                partitioning.truncate_all()
+            else:
+                MetricsHistory.objects.all().delete()
+            EventSummary.objects.all().delete()
+            Observation.objects.filter(source=Observation.HISTORY).delete()
             self.stdout.write(
                 self.style.WARNING('Cleared existing MetricsHistory data')
             )
+        for year in options['replace_season']:
+            touched_events.update(
+                MetricsHistory.objects.filter(event_date__gte=partitioning.year_bounds(year)[0],
+                                              event_date__lt=partitioning.year_bounds(year)[1])
+                .order_by().values_list('event_id', flat=True).distinct()
+            )
+            if partitioned and year in partitioning.existing_years():
+                partitioning.truncate_partition(year)
+            else:
+                MetricsHistory.objects.filter(event_date__gte=partitioning.year_bounds(year)[0],
+                                              event_date__lt=partitioning.year_bounds(year)[1]).delete()
+            Observation.objects.filter(source=Observation.HISTORY, date__year=year).delete()
+            self.stdout.write(
+                self.style.WARNING(f'Cleared existing MetricsHistory data for {year}')
+            )
+        
+        if job is None:
+            job = ImportJob.objects.create(
+                source=source, file_hash=file_hash, file_size=os.path.getsize(file_path), adapter=adapter.name,
+            )
+        else:
+            job.status = ImportJob.RUNNING
+            job.save(update_fields=['status', 'updated_at'])
+            self.stdout.write(f'Resuming job {job.pk} after line {job.line} ({job.imported} records already imported)')
         
-        # Import data
+        # Import data in chunks: parse, validate, then bulk insert
         imported_count = 0
         skipped_count = 0
+        error_count = 0
+        rejected_count = 0
+        batch_size = options['batch_size']
+        validators = validation.get_validators()
+        started = time.perf_counter()
         
-        with open(file_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
+        try:
+            # Line 1 is the header; a resumed job skips the rows it already committed.
+            numbered = itertools.islice(enumerate(rows, start=2), job.line - 1, None)
+            while True:
+                batch = list(itertools.islice(numbered, batch_size))
+                if not batch:
+                    break
+                
+                chunk = importers.parse_chunk(adapter, batch)
+                validation.validate(chunk, validators)
+                written = set(chunk.columns['event_id'][chunk.accepted].astype(np.int64).tolist())
+                
                 try:
-                    # Parse date
-                    event_date_str = row.get('events.date', '').strip()
-                    if event_date_str:
-                        try:
-                            event_date = datetime.strptime(event_date_str, '%m/%d/%Y %H:%M')
-                            event_date = timezone.make_aware(event_date)
-                        except ValueError:
-                            try:
-                                event_date = datetime.strptime(event_date_str, '%m/%d/%Y')
-                                event_date = timezone.make_aware(event_date)
-                            except ValueError:
-                                self.stdout.write(
-                                    self.style.WARNING(f'Invalid date format: {event_date_str}')
-                                )
-                                skipped_count += 1
-                                continue
-                    else:
-                        event_date = timezone.now()
-                    
-                    # Create MetricsHistory object
-                    metrics_history = MetricsHistory(
-                        height=self._parse_int(row.get('height')),
-                        weight=self._parse_int(row.get('weight')),
-                        ifVelo=self._parse_int(row.get('ifVelo')),
-                        ofVelo=self._parse_int(row.get('ofVelo')),
-                        cVelo=self._parse_int(row.get('cVelo')),
-                        exitVelo=self._parse_int(row.get('exitVelo')),
-                        maxFB=self._parse_int(row.get('maxFB')),
-                        popTime=self._parse_decimal(row.get('popTime')),
-                        sixtyyard=self._parse_decimal(row.get('sixtyyard')),
-                        changeUp=self._parse_int(row.get('changeUp')),
-                        curve=self._parse_int(row.get('curve')),
-                        slider=self._parse_int(row.get('slider')),
-                        event_id=self._parse_int(row.get('event_id')),
-                        player_id=self._parse_int(row.get('player_id')),
-                        gradYear=self._parse_int(row.get('players.gradYear')),
-                        event_date=event_date,
-                    )
-                    
-                    metrics_history.save()
-                    imported_count += 1
-                    
-                    if imported_count % 100 == 0:
-                        self.stdout.write(f'Imported {imported_count} records...')
-                        
+                    with transaction.atomic():
+                        objects = importers.build_objects(chunk)
+                        if partitioned:
+                            partitioning.copy_into_partitions(objects)
+                        else:
+                            MetricsHistory.objects.bulk_create(objects)
+                        ImportReject.objects.bulk_create([
+                            ImportReject(
+                                source=source,
+                                line_number=chunk.line_numbers[index],
+                                reasons=reasons,
+                                data=chunk.rows[index],
+                            )
+                            for index, reasons in sorted(chunk.reasons.items())
+                        ])
+                        # The checkpoint commits with the rows, so a resume never repeats or skips a chunk.
+                        progress = {
+                            'line': batch[-1][0],
+                            'chunks': job.chunks + 1,
+                            'imported': job.imported + len(chunk.accepted),
+                            'rejected': job.rejected + len(chunk.reasons),
+                            'event_ids': sorted(written.union(job.event_ids)),
+                        }
+                        ImportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now(), **progress)
                 except Exception as e:
                     self.stdout.write(
-                        self.style.ERROR(f'Error importing row: {e}')
+                        self.style.ERROR(f'Error importing rows {batch[0][0]}-{batch[-1][0]}: {e}')
                     )
-                    skipped_count += 1
-                    continue
+                    skipped_count += len(chunk)
+                    error_count += len(chunk)
+                    # Stop here: later chunks would move the checkpoint past this one.
+                    job.status = ImportJob.FAILED
+                    job.failed += len(chunk)
+                    job.errors.append({'lines': [batch[0][0], batch[-1][0]], 'error': str(e)})
+                    break
+                
+                for field, value in progress.items():
+                    setattr(job, field, value)
+                imported_count += len(chunk.accepted)
+                rejected_count += len(chunk.reasons)
+                skipped_count += len(chunk.reasons)
+                self.stdout.write(f'Imported {imported_count} records...')
+        finally:
+            closeable.close()
+        
+        if job.status != ImportJob.FAILED:
+            job.status = ImportJob.COMPLETED
+            job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'failed', 'errors', 'finished_at', 'updated_at'])
+        touched_events.update(job.event_ids)
         
+        elapsed = time.perf_counter() - started
+        summarized = events.refresh(touched_events)
+        self.stdout.write(f'Refreshed {summarized} event summaries ({len(touched_events)} events touched)')
+        synced = observations.sync_history(MetricsHistory.objects.filter(event_id__in=touched_events))
+        self.stdout.write(f'Wrote {synced} observations')
+        metrics.observe_import('import_csv_data', imported_count, skipped_count, error_count, elapsed)
+        
+        if job.status == ImportJob.FAILED:
+            self.stdout.write(
+                self.style.ERROR(
+                    f'Job {job.pk} stopped after line {job.line} with {job.imported} records imported. '
+                    'Rerun with --resume to continue from there.'
+                )
+            )
+            return
         self.stdout.write(
             self.style.SUCCESS(
                 f'Successfully imported {imported_count} records. '
-                f'Skipped {skipped_count} records.'
+                f'Skipped {skipped_count} records ({rejected_count} quarantined in ImportReject). '
+                f'({imported_count / elapsed if elapsed else 0:.0f} rows/sec)'
             )
         )
-    
-    def _parse_int(self, value):
-        """Parse integer value, return None if empty or invalid"""
-        if not value or value.strip() == '':
-            return None
-        try:
-            return int(float(value))
-        except (ValueError, TypeError):
-            return None
-    
-    def _parse_decimal(self, value):
-        """Parse decimal value, return None if empty or invalid"""
-        if not value or value.strip() == '':
-            return None
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return None
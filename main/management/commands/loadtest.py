@@ -0,0 +1,337 @@
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from main import synthetic
+from main.models import MetricsHistory, PlayerMetric, User
+
+DEFAULT_MIX = 'profile=50,evaluate=20,history=20,add=10'
+
+
+class Command(BaseCommand):
+    help = (
+        'Boot statsprofile.asgi:application under uvicorn (or gunicorn + UvicornWorker) '
+        'and drive mixed traffic against it, reporting throughput, latency percentiles '
+        'and error rates per endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=16,
+            help='Number of concurrent simulated clients (default: 16)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30,
+            help='Seconds to generate load for (default: 30)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=int(os.environ.get('WEB_CONCURRENCY', 1)),
+            help='Server worker processes (default: $WEB_CONCURRENCY or 1)'
+        )
+        parser.add_argument(
+            '--server',
+            choices=['uvicorn', 'gunicorn'],
+            default='uvicorn',
+            help='Boot the app with uvicorn directly or with gunicorn + UvicornWorker as on Render'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Port for the booted server (default: 8765)'
+        )
+        parser.add_argument(
+            '--url',
+            type=str,
+            help='Target an already running server instead of booting one'
+        )
+        parser.add_argument(
+            '--mix',
+            type=str,
+            default=DEFAULT_MIX,
+            help=f'Traffic weights per scenario (default: {DEFAULT_MIX})'
+        )
+        parser.add_argument(
+            '--seed-users',
+            type=int,
+            default=0,
+            help='Generate this many synthetic users before the run'
+        )
+        parser.add_argument(
+            '--seed-history',
+            type=int,
+            default=0,
+            help='Generate this many MetricsHistory rows before the run'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for data generation and traffic (default: 0)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the report as JSON to this path'
+        )
+
+    def handle(self, *args, **options):
+        if options['seed_users'] or options['seed_history']:
+            self.stdout.write('Seeding data...')
+            call_command('generate_synthetic_data', users=options['seed_users'], history=options['seed_history'],
+                         seed=options['seed'], stdout=self.stdout)
+
+        mix = self.parse_mix(options['mix'])
+        fixtures = self.load_fixtures(options['concurrency'], options['seed'])
+
+        server = None
+        base_url = options['url']
+        if not base_url:
+            base_url = f'http://127.0.0.1:{options["port"]}'
+            server = self.start_server(options['server'], options['workers'], options['port'])
+        try:
+            self.wait_until_ready(base_url, server)
+            self.stdout.write(
+                f'Running {options["duration"]:.0f}s of load with {options["concurrency"]} clients '
+                f'against {base_url} ({options["workers"]} {options["server"]} worker(s))...'
+            )
+            samples, elapsed = self.run_load(base_url, mix, fixtures, options['concurrency'],
+                                             options['duration'], options['seed'])
+        finally:
+            if server is not None:
+                self.stop_server(server)
+
+        report = self.build_report(samples, elapsed, options)
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+
+    def parse_mix(self, spec):
+        mix = {}
+        for part in spec.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in SCENARIOS:
+                raise CommandError(f'Unknown scenario {name!r}; choose from {", ".join(SCENARIOS)}')
+            mix[name] = float(weight or 1)
+        return mix
+
+    def load_fixtures(self, concurrency, seed):
+        """Pick users, metric ids and search terms, and log in one user per client"""
+        users = list(User.objects.filter(username__startswith=synthetic.SYNTHETIC_USERNAME_PREFIX)[:max(200, concurrency)])
+        if not users:
+            users = list(User.objects.filter(is_active=True)[:max(200, concurrency)])
+        if not users:
+            raise CommandError('No users to browse; seed some with --seed-users N.')
+        rng = random.Random(seed)
+        return {
+            'usernames': [user.username for user in users],
+            'metric_ids': list(PlayerMetric.objects.values_list('id', flat=True)[:1000]),
+            'grad_years': list(MetricsHistory.objects.values_list('gradYear', flat=True).distinct()[:20]) or [2027],
+            'player_ids': list(MetricsHistory.objects.values_list('player_id', flat=True)[:500]),
+            'sessions': [self.create_session(rng.choice(users)) for _ in range(concurrency)],
+        }
+
+    def create_session(self, user):
+        """Log a user in by writing a session row the server will accept"""
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session.session_key
+
+    def start_server(self, server, workers, port):
+        if server == 'gunicorn':
+            command = [
+                sys.executable, '-m', 'gunicorn', 'statsprofile.asgi:application',
+                '-k', 'uvicorn.workers.UvicornWorker', '--workers', str(workers),
+                '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+            ]
+        else:
+            command = [
+                sys.executable, '-m', 'uvicorn', 'statsprofile.asgi:application',
+                '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port),
+                '--log-level', 'warning', '--no-access-log',
+            ]
+        self.server_log = tempfile.NamedTemporaryFile('w+', prefix='loadtest-server-', suffix='.log', delete=False)
+        self.stdout.write(f'Starting {" ".join(command[2:])} (log: {self.server_log.name})')
+        return subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=self.server_log, stderr=subprocess.STDOUT)
+
+    def wait_until_ready(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server is not None and server.poll() is not None:
+                raise CommandError(
+                    f'Server exited with code {server.returncode} during startup; see {self.server_log.name}'
+                )
+            try:
+                requests.get(f'{base_url}/', timeout=2)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.25)
+        raise CommandError(f'Server at {base_url} did not answer within {timeout}s')
+
+    def stop_server(self, server):
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    def run_load(self, base_url, mix, fixtures, concurrency, duration, seed):
+        samples = defaultdict(list)
+        lock = threading.Lock()
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        started = time.monotonic()
+        deadline = started + duration
+
+        def client(index):
+            rng = random.Random(seed * 1000 + index)
+            anonymous = requests.Session()
+            member = requests.Session()
+            member.cookies.set(settings.SESSION_COOKIE_NAME, fixtures['sessions'][index])
+            local = defaultdict(list)
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                request_started = time.perf_counter()
+                try:
+                    ok = SCENARIOS[name](anonymous, member, base_url, fixtures, rng)
+                except requests.RequestException:
+                    ok = False
+                local[name].append(((time.perf_counter() - request_started) * 1000, ok))
+            with lock:
+                for name, values in local.items():
+                    samples[name].extend(values)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client, range(concurrency)))
+        return samples, time.monotonic() - started
+
+    def build_report(self, samples, elapsed, options):
+        endpoints = {}
+        all_latencies = []
+        all_errors = 0
+        for name, values in sorted(samples.items()):
+            latencies = sorted(latency for latency, _ in values)
+            errors = sum(1 for _, ok in values if not ok)
+            all_latencies.extend(latencies)
+            all_errors += errors
+            endpoints[name] = self.summarize(latencies, errors, elapsed)
+        return {
+            'server': options['url'] or options['server'],
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'duration_s': round(elapsed, 2),
+            'endpoints': endpoints,
+            'total': self.summarize(sorted(all_latencies), all_errors, elapsed),
+        }
+
+    def summarize(self, latencies, errors, elapsed):
+        if not latencies:
+            return {'requests': 0}
+
+        def pct(value):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * value / 100))], 2)
+
+        return {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'error_rate': round(errors / len(latencies), 4),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'p50_ms': pct(50),
+            'p90_ms': pct(90),
+            'p95_ms': pct(95),
+            'p99_ms': pct(99),
+            'max_ms': round(latencies[-1], 2),
+        }
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"endpoint":<12} {"reqs":>7} {"req/s":>8} {"err%":>6} {"p50":>8} {"p90":>8} {"p95":>8} {"p99":>8}'
+        )
+        for name, stats in list(report['endpoints'].items()) + [('TOTAL', report['total'])]:
+            if not stats['requests']:
+                continue
+            self.stdout.write(
+                f'{name:<12} {stats["requests"]:>7} {stats["throughput_rps"]:>8.1f} '
+                f'{stats["error_rate"] * 100:>5.1f}% {stats["p50_ms"]:>8.1f} {stats["p90_ms"]:>8.1f} '
+                f'{stats["p95_ms"]:>8.1f} {stats["p99_ms"]:>8.1f}'
+            )
+
+
+def post_form(session, url, data):
+    """GET a form page for its CSRF cookie, then POST to it"""
+    if 'csrftoken' not in session.cookies:
+        session.get(url, timeout=30)
+    token = session.cookies.get('csrftoken', '')
+    return session.post(url, data={**data, 'csrfmiddlewaretoken': token},
+                        headers={'X-CSRFToken': token, 'Referer': url}, allow_redirects=False, timeout=30)
+
+
+def profile_scenario(anonymous, member, base_url, fixtures, rng):
+    """Anonymous public profile view"""
+    response = anonymous.get(f'{base_url}/{rng.choice(fixtures["usernames"])}/', timeout=30)
+    return response.status_code == 200
+
+
+def evaluate_scenario(anonymous, member, base_url, fixtures, rng):
+    metric_type, low, high = rng.choice([('exitvelo', 55, 100), ('fbvelo', 55, 95), ('60', 6.5, 9.0)])
+    response = post_form(anonymous, f'{base_url}/evaluate/', {
+        'metricType': metric_type, 'metric': f'{rng.uniform(low, high):.2f}', 'playerAge': rng.randint(13, 18),
+    })
+    # A valid submit redirects to the signed results URL; an invalid form re-renders with 200.
+    return response.status_code == 302
+
+
+def history_scenario(anonymous, member, base_url, fixtures, rng):
+    params = {'search': rng.choice(fixtures['grad_years'])}
+    if fixtures['player_ids'] and rng.random() < 0.3:
+        params = {'player_id': rng.choice(fixtures['player_ids'])}
+    response = anonymous.get(f'{base_url}/history/', params=params, timeout=30)
+    return response.status_code == 200
+
+
+def add_scenario(anonymous, member, base_url, fixtures, rng):
+    """Logged-in capture through the add view"""
+    response = post_form(member, f'{base_url}/add/', {
+        'playerAge': rng.randint(13, 18),
+        'dateCaptured': date.today().isoformat(),
+        'capturedBy': 'Self Captured',
+        'metric_exitvelo': f'{rng.uniform(60, 95):.1f}',
+        'metric_60': f'{rng.uniform(6.5, 8.5):.2f}',
+    })
+    return response.status_code == 302
+
+
+SCENARIOS = {
+    'profile': profile_scenario,
+    'evaluate': evaluate_scenario,
+    'history': history_scenario,
+    'add': add_scenario,
+}
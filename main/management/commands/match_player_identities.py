@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from main import identity
+from main.models import PlayerIdentityLink
+
+
+class Command(BaseCommand):
+    help = ('Propose links between MetricsHistory player_ids and player profiles, one graduation year '
+            'at a time, for review in the admin. Pending links of each year processed are replaced')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grad-year',
+            type=int,
+            action='append',
+            default=[],
+            metavar='YEAR',
+            help='Only match this graduation year (repeatable; default: every year on both sides)'
+        )
+        parser.add_argument(
+            '--min-score',
+            type=float,
+            default=identity.MIN_SCORE,
+            help=f'Lowest score (0-1) proposed for review (default: {identity.MIN_SCORE})'
+        )
+        parser.add_argument(
+            '--min-margin',
+            type=float,
+            default=identity.MIN_MARGIN,
+            help=f'How far a match must beat the runner-up on both sides (default: {identity.MIN_MARGIN})'
+        )
+
+    def handle(self, *args, **options):
+        years = options['grad_year'] or identity.grad_years()
+        total = 0
+        for year in years:
+            started = time.perf_counter()
+            proposed = identity.match_block(year, min_score=options['min_score'], min_margin=options['min_margin'])
+            total += proposed
+            self.stdout.write(f'Class of {year}: {proposed} link(s) proposed in {time.perf_counter() - started:.1f}s')
+        pending = PlayerIdentityLink.objects.filter(status=PlayerIdentityLink.PENDING).count()
+        self.stdout.write(self.style.SUCCESS(f'Proposed {total} link(s); {pending} pending review'))
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from main import partitioning
+from main.models import MetricsHistory
+
+
+class Command(BaseCommand):
+    help = 'Maintain the Postgres year partitions of MetricsHistory (see main.partitioning)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['status', 'convert', 'ensure', 'truncate', 'detach'],
+            help='status: list partitions; convert: partition the table now; '
+                 'ensure: create partitions for every year with data plus --ahead years; '
+                 'truncate/detach: empty or remove the --year partition'
+        )
+        parser.add_argument(
+            '--year',
+            type=int,
+            action='append',
+            default=[],
+            help='Season year for truncate/detach (repeatable)'
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=1,
+            help='With ensure, also create partitions this many years past the current one (default: 1)'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='With detach, drop the detached table instead of keeping it for archiving'
+        )
+
+    def handle(self, *args, **options):
+        if not partitioning.supported():
+            raise CommandError('MetricsHistory partitioning needs PostgreSQL.')
+
+        action = options['action']
+        if action == 'convert':
+            if partitioning.is_partitioned():
+                self.stdout.write('MetricsHistory is already partitioned.')
+                return
+            partitioning.convert_table()
+            self.stdout.write(self.style.SUCCESS('MetricsHistory converted to a partitioned table.'))
+            action = 'status'
+        elif not partitioning.is_partitioned():
+            raise CommandError('MetricsHistory is not partitioned; run "convert" first.')
+
+        if action == 'ensure':
+            span = MetricsHistory.objects.aggregate(first=Min('event_date'), last=Max('event_date'))
+            current = timezone.now().year
+            first = span['first'].year if span['first'] else current
+            last = max(span['last'].year if span['last'] else current, current + options['ahead'])
+            created = partitioning.ensure_partitions(range(first, last + 1))
+            self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partition(s): {created}'))
+        elif action in ('truncate', 'detach'):
+            if not options['year']:
+                raise CommandError(f'{action} needs --year.')
+            for year in options['year']:
+                if action == 'truncate':
+                    partitioning.truncate_partition(year)
+                    done = 'Truncated'
+                else:
+                    partitioning.detach_partition(year, drop=options['drop'])
+                    done = 'Detached and dropped' if options['drop'] else 'Detached'
+                self.stdout.write(self.style.SUCCESS(f'{done} {partitioning.partition_name(year)}'))
+        else:
+            for partition in partitioning.list_partitions():
+                self.stdout.write(f'  {partition["name"]:<36} ~{partition["rows"]:>10} rows  {partition["bounds"]}')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from main import events
+
+
+class Command(BaseCommand):
+    help = ('Recompute EventSummary rows from MetricsHistory. import_csv_data keeps them current; '
+            'run this after loading MetricsHistory any other way')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event',
+            type=int,
+            action='append',
+            default=[],
+            metavar='EVENT_ID',
+            help='Only recompute this event (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=events.BATCH_SIZE,
+            help=f'Events loaded and summarized per query (default: {events.BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['event']:
+            written = events.refresh(options['event'], batch_size=options['batch_size'])
+        else:
+            written = events.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} event summaries in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from main import reportcards
+from main.models import PlayerMetric, PlayerProfile
+
+
+class Command(BaseCommand):
+    help = 'Pre-render report cards for players with metrics, skipping cards whose inputs are unchanged'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            action='append',
+            help='Only render this player (repeatable)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only players whose profile or metrics changed in the last N days'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['png', 'pdf', 'all'],
+            default='all',
+            help='Which files to render (default: all)'
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Afterwards delete stored cards of the rendered formats that no longer match any player'
+        )
+
+    def handle(self, *args, **options):
+        if options['prune'] and (options['username'] or options['days'] is not None):
+            raise CommandError('--prune needs every player, so it cannot be combined with --username or --days')
+        formats = list(reportcards.FORMATS) if options['format'] == 'all' else [options['format']]
+
+        profiles = PlayerProfile.objects.select_related('user').prefetch_related('positions').order_by('pk')
+        if options['username']:
+            profiles = profiles.filter(user__username__in=options['username'])
+        elif not options['prune']:
+            profiles = profiles.filter(user__in=PlayerMetric.objects.values('user'))
+        if options['days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            changed = PlayerMetric.objects.filter(created_at__gte=cutoff).values('user')
+            profiles = profiles.filter(Q(updated_at__gte=cutoff) | Q(user__in=changed))
+
+        started = time.perf_counter()
+        current = set()
+        rendered = 0
+        kept = 0
+        # --prune walks every profile, since report_card serves a card for any of
+        # them; only players with metrics are pre-rendered, the other cards are kept.
+        profiles = profiles.annotate(has_metrics=Exists(PlayerMetric.objects.filter(user=OuterRef('user'))))
+        for profile in profiles.iterator(chunk_size=500):
+            inputs = reportcards.card_inputs(profile)
+            digest = reportcards.content_hash(inputs)
+            for fmt in formats:
+                if not (profile.has_metrics or options['username']):
+                    current.add(reportcards.storage_name(digest, fmt))
+                    kept += 1
+                    continue
+                name, created = reportcards.store(inputs, fmt, digest)
+                current.add(name)
+                rendered += created
+        self.stdout.write(f'Rendered {rendered} card(s); {len(current) - kept - rendered} were up to date')
+
+        if options['prune']:
+            try:
+                _, files = default_storage.listdir(reportcards.DIRECTORY)
+            except FileNotFoundError:
+                files = []
+            stale = [
+                f'{reportcards.DIRECTORY}/{name}' for name in files
+                if name.rsplit('.', 1)[-1] in formats and f'{reportcards.DIRECTORY}/{name}' not in current
+            ]
+            for name in stale:
+                default_storage.delete(name)
+            self.stdout.write(f'Deleted {len(stale)} stale card(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.1f}s'))
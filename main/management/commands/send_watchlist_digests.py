@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from main import watchlists
+from main.models import WatchNotification
+
+
+class Command(BaseCommand):
+    help = ('Queue notifications for metrics saved since the last run and email each watcher a digest. '
+            'Run it periodically (hourly or daily) from cron')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=watchlists.BATCH_SIZE,
+            help=f'New PlayerMetric or MetricsHistory ids matched against watchlists per batch (default: {watchlists.BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--fan-out-only',
+            action='store_true',
+            help='Queue notifications without sending any email'
+        )
+
+    def handle(self, *args, **options):
+        queued = watchlists.fan_out(batch_size=options['batch_size'])
+        self.stdout.write(f'Queued {queued} notification(s)')
+        if options['fan_out_only']:
+            pending = WatchNotification.objects.filter(sent_at=None).count()
+            self.stdout.write(self.style.SUCCESS(f'{pending} notification(s) waiting for the next digest'))
+            return
+
+        emails, notifications = watchlists.send_digests()
+        self.stdout.write(self.style.SUCCESS(f'Sent {emails} digest(s) covering {notifications} notification(s)'))
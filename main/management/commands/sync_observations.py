@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from main import observations
+
+
+class Command(BaseCommand):
+    help = ('Populate the long-format Observation store from MetricsHistory and PlayerMetric. '
+            'Imports and saved metrics keep it current; run this to backfill or after deleting source rows')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Only delete observations whose MetricsHistory or PlayerMetric row is gone'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=observations.BATCH_SIZE,
+            help=f'Source rows read and written per batch (default: {observations.BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['prune']:
+            deleted = observations.prune()
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {deleted} orphaned observations in {time.perf_counter() - started:.1f}s'
+            ))
+            return
+        written = observations.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} observations in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,160 @@
+"""
+Prometheus metrics for the web app and the import commands.
+
+When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) every gunicorn /
+uvicorn worker and every management command writes its samples to memory-mapped
+files in that directory, and /metrics/ merges them with MultiProcessCollector.
+Without it, metrics live in the current process only, which is fine for
+runserver.
+"""
+import os
+
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    REGISTRY, generate_latest, multiprocess,
+)
+
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+REQUEST_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.4, 0.6, 1.0, 1.5, 2.5, 5.0, 10.0,
+)
+
+http_requests = Counter(
+    'statsprofile_http_requests_total',
+    'HTTP requests by URL name, method and status code',
+    ['view', 'method', 'status'],
+)
+http_request_duration = Histogram(
+    'statsprofile_http_request_duration_seconds',
+    'HTTP request latency by URL name',
+    ['view'],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+db_queries = Counter(
+    'statsprofile_db_queries_total',
+    'ORM queries executed while serving requests, by URL name',
+    ['view'],
+)
+db_connections_opened = Counter(
+    'statsprofile_db_connections_opened_total',
+    'New database connections opened (compare with request count for conn_max_age reuse)',
+    ['alias'],
+)
+cache_requests = Counter(
+    'statsprofile_cache_requests_total',
+    'Application cache lookups by cache name and result (hit/miss)',
+    ['cache', 'result'],
+)
+import_rows = Counter(
+    'statsprofile_import_rows_total',
+    'Rows processed by import commands, by outcome (imported/skipped)',
+    ['command', 'outcome'],
+)
+import_errors = Counter(
+    'statsprofile_import_errors_total',
+    'Rows that raised an error in import commands',
+    ['command'],
+)
+import_duration = Gauge(
+    'statsprofile_import_last_duration_seconds',
+    'Wall-clock duration of the most recent import run',
+    ['command'],
+    multiprocess_mode='mostrecent',
+)
+import_throughput = Gauge(
+    'statsprofile_import_last_rows_per_second',
+    'Rows per second achieved by the most recent import run',
+    ['command'],
+    multiprocess_mode='mostrecent',
+)
+
+db_pool_connections = Gauge(
+    'statsprofile_db_pool_connections',
+    'Connections in the psycopg pool by state (size/available/waiting), summed over live workers',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+
+
+@receiver(connection_created)
+def count_connection_created(sender, connection, **kwargs):
+    db_connections_opened.labels(alias=connection.alias).inc()
+
+
+def observe_request(view_name, method, status_code, seconds, query_count):
+    """Record one served request; called by PerformanceMiddleware"""
+    http_requests.labels(view=view_name, method=method, status=str(status_code)).inc()
+    http_request_duration.labels(view=view_name).observe(seconds)
+    db_queries.labels(view=view_name).inc(query_count)
+
+
+def observe_import(command, imported, skipped, errors, seconds):
+    """Record the outcome of one import run"""
+    import_rows.labels(command=command, outcome='imported').inc(imported)
+    import_rows.labels(command=command, outcome='skipped').inc(skipped)
+    import_errors.labels(command=command).inc(errors)
+    import_duration.labels(command=command).set(seconds)
+    import_throughput.labels(command=command).set(imported / seconds if seconds else 0)
+
+
+_missing = object()
+
+
+def cache_get_or_set(name, key, default, timeout=None, alias='default'):
+    """
+    cache.get_or_set() that counts hits and misses under the given name.
+
+    ``default`` may be a callable, which is only evaluated on a miss.
+    """
+    cache = caches[alias]
+    value = cache.get(key, _missing)
+    if value is not _missing:
+        cache_requests.labels(cache=name, result='hit').inc()
+        return value
+    cache_requests.labels(cache=name, result='miss').inc()
+    value = default() if callable(default) else default
+    cache.set(key, value, timeout)
+    return value
+
+
+def db_pool_stats():
+    """
+    psycopg pool statistics per database alias for this worker, or an empty
+    dict when pooling is off. Also refreshes the db_pool_connections gauge.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        pool_stats = pool.get_stats()
+        stats[alias] = {
+            'name': pool.name,
+            'min_size': pool.min_size,
+            'max_size': pool.max_size,
+            'timeout': pool.timeout,
+            'size': pool_stats.get('pool_size', 0),
+            'available': pool_stats.get('pool_available', 0),
+            'in_use': pool_stats.get('pool_size', 0) - pool_stats.get('pool_available', 0),
+            'waiting': pool_stats.get('requests_waiting', 0),
+            'stats': pool_stats,
+        }
+        db_pool_connections.labels(alias=alias, state='size').set(stats[alias]['size'])
+        db_pool_connections.labels(alias=alias, state='available').set(stats[alias]['available'])
+        db_pool_connections.labels(alias=alias, state='waiting').set(stats[alias]['waiting'])
+    return stats
+
+
+def exposition():
+    """Return (body, content_type) for the /metrics/ endpoint"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
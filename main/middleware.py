@@ -0,0 +1,83 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+from .instrumentation import RequestTimings, current_timings, registry
+
+logger = logging.getLogger('main.performance')
+
+
+class PerformanceMiddleware:
+    """
+    Time each request and record view name, latency, ORM query count/time,
+    template render time and response size.
+
+    Results are sent back in a Server-Timing header, written as one JSON log
+    line per request, aggregated per view in the instrumentation registry and
+    exported to Prometheus through main.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        self.record(request, response, timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is not None and request.resolver_match is not None:
+            timings.view_name = request.resolver_match.view_name
+
+    def record(self, request, response, timings):
+        total_ms = timings.elapsed * 1000
+        query_ms = timings.query_time * 1000
+        template_ms = timings.template_time * 1000
+        view_name = timings.view_name or 'unresolved'
+        response_bytes = 0 if response.streaming else len(response.content)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={query_ms:.1f};desc="{timings.query_count} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        registry.record(
+            view_name, total_ms, timings.query_count, query_ms,
+            template_ms, response_bytes, response.status_code,
+        )
+        metrics.observe_request(
+            view_name, request.method, response.status_code,
+            timings.elapsed, timings.query_count,
+        )
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'queries': timings.query_count,
+            'query_ms': round(query_ms, 2),
+            'template_ms': round(template_ms, 2),
+            'bytes': response_bytes,
+        }))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_alter_playermetric_capturedby_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrowthCurve',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metricType', models.CharField(choices=[('60', '60 Yard Dash (seconds)'), ('fbvelo', 'Fastball Velocity (mph)'), ('exitvelo', 'Exit Velocity (mph)'), ('ofvelo', 'Outfield Velocity (mph)'), ('ifvelo', 'Infield Velocity (mph)')], max_length=20, verbose_name='Metric Type')),
+                ('fromAge', models.IntegerField(verbose_name='From Age')),
+                ('toAge', models.IntegerField(verbose_name='To Age')),
+                ('intercept', models.FloatField()),
+                ('slope', models.FloatField()),
+                ('residualStd', models.FloatField(verbose_name='Residual Std Dev')),
+                ('samples', models.IntegerField()),
+                ('fitted_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Growth Curve',
+                'verbose_name_plural': 'Growth Curves',
+                'unique_together': {('metricType', 'fromAge')},
+            },
+        ),
+    ]
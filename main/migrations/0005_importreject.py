@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_growthcurve'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportReject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Source File')),
+                ('line_number', models.IntegerField(verbose_name='Line Number')),
+                ('reasons', models.JSONField(default=list)),
+                ('data', models.JSONField(default=dict, verbose_name='Raw Row')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Import Reject',
+                'verbose_name_plural': 'Import Rejects',
+                'ordering': ['-created_at', 'line_number'],
+                'indexes': [models.Index(fields=['source', 'created_at'], name='main_import_source_d8574e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:37
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of main.models.search_fields_for() as of this migration, so
+# later changes to the live helper do not change what this migration writes.
+POSITION_NAMES = {
+    'P': 'Pitcher', 'C': 'Catcher', '1B': 'First Base', '2B': 'Second Base',
+    '3B': 'Third Base', 'SS': 'Shortstop', 'OF': 'Outfield',
+}
+
+
+def search_fields_for(profile, user, positions, state_names):
+    parts = [
+        user.first_name, user.last_name, user.username, profile.team, profile.school, profile.city,
+        profile.state, state_names.get(profile.state), profile.graduation_year,
+    ]
+    for code in positions:
+        parts += [code, POSITION_NAMES.get(code)]
+    text = ' '.join(str(part) for part in parts if part)
+    words = dict.fromkeys(re.findall(r'[a-z0-9]+', text.lower()))
+    sort_name = ' '.join(part for part in (user.last_name, user.first_name, user.username) if part).lower()
+    return ' ' + ' '.join(words), sort_name[:300]
+
+
+def populate_search_fields(apps, schema_editor):
+    PlayerProfile = apps.get_model('main', 'PlayerProfile')
+    state_names = dict(PlayerProfile._meta.get_field('state').choices)
+    manager = PlayerProfile.objects.db_manager(schema_editor.connection.alias)
+    profiles = manager.select_related('user').order_by('pk')
+    batch = []
+    for profile in profiles.iterator(chunk_size=2000):
+        positions = [pos.strip() for pos in (profile.positions or '').split(',') if pos.strip()]
+        profile.search_text, profile.sort_name = search_fields_for(profile, profile.user, positions, state_names)
+        batch.append(profile)
+        if len(batch) == 2000:
+            manager.bulk_update(batch, ['search_text', 'sort_name'])
+            batch = []
+    manager.bulk_update(batch, ['search_text', 'sort_name'])
+
+
+def install_search_index(apps, schema_editor):
+    from main import directory
+    directory.install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from main import directory
+    directory.drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_partition_metricshistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playerprofile',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='playerprofile',
+            name='sort_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=300),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['sort_name', 'id'], name='main_player_sort_na_915a25_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['graduation_year', 'sort_name'], name='main_player_graduat_5ad993_idx'),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+        # tsvector GIN index on Postgres, FTS5 table and triggers on SQLite.
+        migrations.RunPython(install_search_index, drop_search_index),
+    ]
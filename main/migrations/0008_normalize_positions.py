@@ -0,0 +1,116 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:14
+
+import logging
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+logger = logging.getLogger('main.migrations')
+
+POSITIONS = [
+    ('P', 'Pitcher'),
+    ('C', 'Catcher'),
+    ('1B', 'First Base'),
+    ('2B', 'Second Base'),
+    ('3B', 'Third Base'),
+    ('SS', 'Shortstop'),
+    ('OF', 'Outfield'),
+]
+
+
+def create_positions(apps, schema_editor):
+    Position = apps.get_model('main', 'Position')
+    Position.objects.using(schema_editor.connection.alias).bulk_create(
+        [Position(code=code, name=name, sort_order=order) for order, (code, name) in enumerate(POSITIONS)],
+        ignore_conflicts=True,
+    )
+
+
+def copy_positions_to_rows(apps, schema_editor):
+    """
+    Split each comma-separated positions value into PlayerPosition rows.
+    Codes are matched case-insensitively; unknown ones are counted and logged.
+    """
+    alias = schema_editor.connection.alias
+    PlayerProfile = apps.get_model('main', 'PlayerProfile')
+    PlayerPosition = apps.get_model('main', 'PlayerPosition')
+    known = {code for code, _ in POSITIONS}
+    profiles = PlayerProfile.objects.using(alias).exclude(positions_text=None).exclude(positions_text='')
+    batch = []
+    discarded = Counter()
+    for pk, text in profiles.values_list('pk', 'positions_text').iterator(chunk_size=5000):
+        codes = dict.fromkeys(code.strip().upper() for code in text.split(','))
+        codes.pop('', None)
+        discarded.update(code for code in codes if code not in known)
+        batch.extend(PlayerPosition(profile_id=pk, position_id=code) for code in codes if code in known)
+        if len(batch) >= 5000:
+            PlayerPosition.objects.using(alias).bulk_create(batch)
+            batch = []
+    PlayerPosition.objects.using(alias).bulk_create(batch)
+    if discarded:
+        logger.warning(
+            'Discarded %d unknown position code(s): %s',
+            sum(discarded.values()), ', '.join(f'{code} ({count})' for code, count in discarded.most_common(20)),
+        )
+
+
+def copy_rows_to_positions(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    PlayerProfile = apps.get_model('main', 'PlayerProfile')
+    PlayerPosition = apps.get_model('main', 'PlayerPosition')
+    codes = {}
+    rows = PlayerPosition.objects.using(alias).order_by('profile_id', 'position__sort_order')
+    for profile_id, code in rows.values_list('profile_id', 'position_id').iterator(chunk_size=5000):
+        codes.setdefault(profile_id, []).append(code)
+    profiles = [PlayerProfile(pk=pk, positions_text=','.join(values)) for pk, values in codes.items()]
+    PlayerProfile.objects.using(alias).bulk_update(profiles, ['positions_text'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_playerprofile_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Position',
+            fields=[
+                ('code', models.CharField(choices=[('P', 'Pitcher'), ('C', 'Catcher'), ('1B', 'First Base'), ('2B', 'Second Base'), ('3B', 'Third Base'), ('SS', 'Shortstop'), ('OF', 'Outfield')], max_length=2, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=30)),
+                ('sort_order', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['sort_order'],
+            },
+        ),
+        migrations.RunPython(create_positions, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='PlayerPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.position')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.playerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['position', 'profile'], name='main_player_positio_5801bf_idx')],
+                'unique_together': {('profile', 'position')},
+            },
+        ),
+        migrations.RenameField(
+            model_name='playerprofile',
+            old_name='positions',
+            new_name='positions_text',
+        ),
+        migrations.RunPython(copy_positions_to_rows, copy_rows_to_positions),
+        migrations.RemoveField(
+            model_name='playerprofile',
+            name='positions_text',
+        ),
+        migrations.AddField(
+            model_name='playerprofile',
+            name='positions',
+            field=models.ManyToManyField(blank=True, related_name='players', through='main.PlayerPosition', to='main.position'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_normalize_positions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnonymousMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metricType', models.CharField(choices=[('60', '60 Yard Dash (seconds)'), ('fbvelo', 'Fastball Velocity (mph)'), ('exitvelo', 'Exit Velocity (mph)'), ('ofvelo', 'Outfield Velocity (mph)'), ('ifvelo', 'Infield Velocity (mph)')], max_length=20)),
+                ('playerAge', models.IntegerField()),
+                ('month', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('minimum', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('maximum', models.DecimalField(decimal_places=2, max_digits=8)),
+            ],
+            options={
+                'verbose_name': 'Anonymous Metric Rollup',
+                'verbose_name_plural': 'Anonymous Metric Rollups',
+                'ordering': ['-month', 'metricType', 'playerAge'],
+                'unique_together': {('metricType', 'playerAge', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_anonymousmetricrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metricsrange',
+            name='quantiles',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
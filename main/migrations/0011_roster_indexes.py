@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_metricsrange_quantiles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['team', 'sort_name'], name='main_player_team_a5003b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['school', 'sort_name'], name='main_player_school_9c6330_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def start_checkpoint(apps, schema_editor):
+    """Start the watchlist fan-out after the existing metrics, so nobody is sent history"""
+    alias = schema_editor.connection.alias
+    Checkpoint = apps.get_model('main', 'Checkpoint')
+    PlayerMetric = apps.get_model('main', 'PlayerMetric')
+    last = PlayerMetric.objects.using(alias).aggregate(last=models.Max('id'))['last'] or 0
+    Checkpoint.objects.using(alias).create(name='watchlist_fan_out', position=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_roster_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WatchlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watchers', to='main.playerprofile')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watchlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Watchlist Entry',
+                'verbose_name_plural': 'Watchlist Entries',
+                'indexes': [models.Index(fields=['profile', 'user'], name='main_watchl_profile_c4f66b_idx')],
+                'unique_together': {('user', 'profile')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WatchNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.playermetric')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watch_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Watch Notification',
+                'verbose_name_plural': 'Watch Notifications',
+                'indexes': [models.Index(fields=['sent_at', 'user'], name='main_watchn_sent_at_eb5c01_idx')],
+                'unique_together': {('user', 'metric')},
+            },
+        ),
+        migrations.RunPython(start_checkpoint, migrations.RunPython.noop),
+    ]
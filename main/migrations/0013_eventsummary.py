@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_watchlists'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.IntegerField(unique=True, verbose_name='Event ID')),
+                ('event_date', models.DateTimeField(verbose_name='Event Date')),
+                ('participants', models.IntegerField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+                ('stats', models.JSONField(default=dict)),
+                ('top', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Event Summary',
+                'verbose_name_plural': 'Event Summaries',
+                'ordering': ['-event_date', '-event_id'],
+                'indexes': [models.Index(fields=['-event_date', '-event_id'], name='main_events_event_d_42df27_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_eventsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerIdentityLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_id', models.IntegerField(verbose_name='Player ID')),
+                ('score', models.FloatField(default=0)),
+                ('margin', models.FloatField(default=0)),
+                ('evidence', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('confirmed', 'Confirmed'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='identity_links', to='main.playerprofile')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Player Identity Link',
+                'verbose_name_plural': 'Player Identity Links',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='main_player_status_92aa00_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'confirmed')), fields=('player_id',), name='one_confirmed_link_per_player')],
+                'unique_together': {('player_id', 'profile')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_player_identity_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Observation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('history', 'Metrics History'), ('player', 'Player Metric')], max_length=10)),
+                ('source_id', models.BigIntegerField()),
+                ('entity', models.IntegerField()),
+                ('metric', models.CharField(max_length=20)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('age', models.IntegerField(blank=True, null=True)),
+                ('date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Observation',
+                'verbose_name_plural': 'Observations',
+                'indexes': [models.Index(fields=['metric', 'age', 'value'], name='observation_metric_age_value'), models.Index(fields=['source', 'entity', 'metric', 'date'], name='observation_entity_series')],
+                'unique_together': {('source', 'source_id', 'metric')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_observations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Source File')),
+                ('file_hash', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('adapter', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('line', models.IntegerField(default=1)),
+                ('chunks', models.IntegerField(default=0)),
+                ('imported', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('event_ids', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Import Job',
+                'verbose_name_plural': 'Import Jobs',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['file_hash', 'status'], name='main_import_file_ha_7fd292_idx')],
+            },
+        ),
+    ]
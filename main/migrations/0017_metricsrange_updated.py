@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_import_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metricsrange',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
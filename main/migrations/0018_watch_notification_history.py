@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def start_history_checkpoint(apps, schema_editor):
+    """Start the history fan-out after the existing rows, so nobody is sent history"""
+    alias = schema_editor.connection.alias
+    Checkpoint = apps.get_model('main', 'Checkpoint')
+    MetricsHistory = apps.get_model('main', 'MetricsHistory')
+    last = MetricsHistory.objects.using(alias).aggregate(last=models.Max('id'))['last'] or 0
+    Checkpoint.objects.using(alias).get_or_create(name='watchlist_fan_out_history', defaults={'position': last})
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_metricsrange_updated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watchnotification',
+            name='history',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='main.metricshistory'),
+        ),
+        migrations.AlterField(
+            model_name='watchnotification',
+            name='metric',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.playermetric'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='watchnotification',
+            unique_together={('user', 'history'), ('user', 'metric')},
+        ),
+        migrations.RunPython(start_history_checkpoint, migrations.RunPython.noop),
+    ]
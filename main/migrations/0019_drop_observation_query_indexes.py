@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_watch_notification_history'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='observation',
+            name='observation_metric_age_value',
+        ),
+        migrations.RemoveIndex(
+            model_name='observation',
+            name='observation_entity_series',
+        ),
+    ]
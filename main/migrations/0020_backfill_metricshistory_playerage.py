@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:02
+
+from datetime import timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Case, F, Max, Min, Value, When
+from django.db.models.functions import ExtractYear, Greatest, Least, Now
+
+BATCH_SIZE = 50000
+
+
+def backfill_playerage(apps, schema_editor):
+    """
+    Give rows imported before importers derived an age (playerage 0) the age
+    main.ages.age_for() gives their grad year on the event date. The formula
+    is frozen here so later changes to main.ages do not rewrite history.
+    updated_at is bumped so snapshots pick the rows up.
+    """
+    alias = schema_editor.connection.alias
+    MetricsHistory = apps.get_model('main', 'MetricsHistory')
+    age = (
+        Value(18) - (F('gradYear') - ExtractYear('event_date', tzinfo=dt_timezone.utc))
+        - Case(When(event_date__month__lt=7, then=Value(1)), default=Value(0))
+    )
+    rows = MetricsHistory.objects.using(alias).filter(playerage=0, gradYear__gt=0)
+    bounds = rows.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return
+    # One short statement per id range keeps locks brief on large tables.
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        rows.filter(id__gte=start, id__lt=start + BATCH_SIZE).update(
+            playerage=Greatest(Value(12), Least(Value(20), age)),
+            updated_at=Now(),
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('main', '0019_drop_observation_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_playerage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_backfill_metricshistory_playerage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='observation',
+            index=models.Index(fields=['metric', 'age', 'value'], name='observation_metric_age_value'),
+        ),
+    ]
@@ -2,8 +2,9 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver
+import re
 
 User = get_user_model()
 
@@ -115,6 +116,159 @@ class MetricsHistory(models.Model):
         ]
 
 
+class EventSummary(models.Model):
+    """Per-event rollup of MetricsHistory, maintained by import_csv_data (main.events)"""
+    event_id = models.IntegerField(unique=True, verbose_name='Event ID')
+    event_date = models.DateTimeField(verbose_name='Event Date')
+    participants = models.IntegerField(default=0)
+    rows = models.IntegerField(default=0)
+    # {metric: {'count', 'min', 'max', 'mean', 'quantiles'}}
+    stats = models.JSONField(default=dict)
+    # {metric: [{'player_id', 'gradYear', 'value'}, ...]}, best first
+    top = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Event {self.event_id} ({self.event_date:%Y-%m-%d}, {self.participants} players)"
+
+    class Meta:
+        verbose_name = 'Event Summary'
+        verbose_name_plural = 'Event Summaries'
+        ordering = ['-event_date', '-event_id']
+        indexes = [
+            models.Index(fields=['-event_date', '-event_id']),
+        ]
+
+
+class Observation(models.Model):
+    """
+    One measurement in long format, copied from MetricsHistory (one row per
+    measured column) or from a user's PlayerMetric; see main.observations.
+    ``metric`` is the MetricsHistory column name and ``entity`` the
+    MetricsHistory player_id or the PlayerMetric user_id, per ``source``.
+    """
+    HISTORY = 'history'
+    PLAYER = 'player'
+    SOURCE_CHOICES = [
+        (HISTORY, 'Metrics History'),
+        (PLAYER, 'Player Metric'),
+    ]
+
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    # Primary key of the MetricsHistory or PlayerMetric row
+    source_id = models.BigIntegerField()
+    entity = models.IntegerField()
+    metric = models.CharField(max_length=20)
+    value = models.DecimalField(max_digits=8, decimal_places=2)
+    age = models.IntegerField(null=True, blank=True)
+    date = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.metric} {self.value} ({self.get_source_display()} {self.entity})"
+
+    class Meta:
+        verbose_name = 'Observation'
+        verbose_name_plural = 'Observations'
+        unique_together = (('source', 'source_id', 'metric'),)
+        indexes = [
+            # Ranges, percentiles and leaderboards per metric and age read only this index.
+            models.Index(fields=['metric', 'age', 'value'], name='observation_metric_age_value'),
+        ]
+
+
+class ImportReject(models.Model):
+    """A source row quarantined by the import validation stage (main.validation)"""
+    source = models.CharField(max_length=255, verbose_name='Source File')
+    line_number = models.IntegerField(verbose_name='Line Number')
+    reasons = models.JSONField(default=list)
+    data = models.JSONField(default=dict, verbose_name='Raw Row')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.source}:{self.line_number} ({', '.join(self.reasons)})"
+
+    class Meta:
+        verbose_name = 'Import Reject'
+        verbose_name_plural = 'Import Rejects'
+        ordering = ['-created_at', 'line_number']
+        indexes = [
+            models.Index(fields=['source', 'created_at']),
+        ]
+
+
+class ImportJob(models.Model):
+    """
+    One import_csv_data run over a file, checkpointed in the same transaction
+    as each chunk it commits, so a stopped run can be resumed after ``line``.
+    """
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    source = models.CharField(max_length=255, verbose_name='Source File')
+    file_hash = models.CharField(max_length=64, verbose_name='SHA-256')
+    file_size = models.BigIntegerField(default=0)
+    adapter = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    # Last source line of the last committed chunk (line 1 is the header)
+    line = models.IntegerField(default=1)
+    chunks = models.IntegerField(default=0)
+    imported = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    # Rows of chunks that failed to write
+    failed = models.IntegerField(default=0)
+    # [{'lines': [first, last], 'error': message}]
+    errors = models.JSONField(default=list, blank=True)
+    # Events written so far; their summaries are refreshed when the job finishes
+    event_ids = models.JSONField(default=list, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.get_status_display()}, line {self.line})"
+
+    class Meta:
+        verbose_name = 'Import Job'
+        verbose_name_plural = 'Import Jobs'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['file_hash', 'status']),
+        ]
+
+
+class AnonymousMetricRollup(models.Model):
+    """
+    Monthly totals of anonymous PlayerMetric rows, written by
+    compact_anonymous_metrics before it deletes them.
+    """
+    metricType = models.CharField(max_length=20, choices=PlayerMetric.METRIC_TYPE_CHOICES)
+    playerAge = models.IntegerField()
+    month = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    minimum = models.DecimalField(max_digits=8, decimal_places=2)
+    maximum = models.DecimalField(max_digits=8, decimal_places=2)
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else None
+
+    def __str__(self):
+        return f"{self.metricType} age {self.playerAge} {self.month:%Y-%m} (n={self.count})"
+
+    class Meta:
+        verbose_name = 'Anonymous Metric Rollup'
+        verbose_name_plural = 'Anonymous Metric Rollups'
+        unique_together = (('metricType', 'playerAge', 'month'),)
+        ordering = ['-month', 'metricType', 'playerAge']
+
+
 class MetricsRange(models.Model):
     METRIC_TYPE_CHOICES = [
         ('60', '60 Yard Dash (seconds)'),
@@ -130,6 +284,10 @@ class MetricsRange(models.Model):
     Max = models.DecimalField(max_digits=8, decimal_places=2, verbose_name='Maximum Value')
     Avg = models.DecimalField(max_digits=8, decimal_places=2, verbose_name='Average Value')
     playerAge = models.IntegerField(verbose_name='Player Age', default=0)
+    # Values at evenly spaced quantiles 0..1, written by compute_metric_ranges.
+    quantiles = models.JSONField(default=list, blank=True)
+    # Part of evaluation.load_tables()'s cache key, so saved ranges reach every worker.
+    updated = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.get_metricType_display()} - Min: {self.Min}, Max: {self.Max}, Avg: {self.Avg}"
@@ -140,6 +298,29 @@ class MetricsRange(models.Model):
         unique_together = (('metricType', 'playerAge'),)
 
 
+class GrowthCurve(models.Model):
+    """
+    Year-over-year growth coefficients fitted from MetricsHistory by
+    fit_growth_curves: value at toAge ~= intercept + slope * value at fromAge.
+    """
+    metricType = models.CharField(max_length=20, choices=MetricsRange.METRIC_TYPE_CHOICES, verbose_name='Metric Type')
+    fromAge = models.IntegerField(verbose_name='From Age')
+    toAge = models.IntegerField(verbose_name='To Age')
+    intercept = models.FloatField()
+    slope = models.FloatField()
+    residualStd = models.FloatField(verbose_name='Residual Std Dev')
+    samples = models.IntegerField()
+    fitted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_metricType_display()} {self.fromAge}->{self.toAge}"
+
+    class Meta:
+        verbose_name = 'Growth Curve'
+        verbose_name_plural = 'Growth Curves'
+        unique_together = (('metricType', 'fromAge'),)
+
+
 class PlayerProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='player_profile')
     
@@ -153,7 +334,7 @@ class PlayerProfile(models.Model):
         ('SS', 'Shortstop'),
         ('OF', 'Outfield'),
     ]
-    positions = models.CharField(max_length=200, blank=True, null=True, help_text='Comma-separated list of positions')
+    positions = models.ManyToManyField('Position', through='PlayerPosition', blank=True, related_name='players')
     team = models.CharField(max_length=100, blank=True, null=True)
     graduation_year = models.IntegerField(null=True, blank=True)
     
@@ -199,11 +380,31 @@ class PlayerProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Player directory columns (main/directory.py), rebuilt on every save.
+    search_text = models.TextField(blank=True, default='', editable=False)
+    sort_name = models.CharField(max_length=300, blank=True, default='', editable=False)
+
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'search_text', 'sort_name'}
+        super().save(*args, **kwargs)
+
+    def update_search_fields(self, positions=None):
+        """
+        Refresh search_text and sort_name. bulk_create callers must call this
+        themselves, passing the position codes they are about to link.
+        """
+        if positions is None:
+            positions = self.get_positions_list()
+        self.search_text, self.sort_name = search_fields_for(self, self.user, positions)
+
     def get_positions_list(self):
         """Return positions as a list of position codes"""
-        if self.positions:
-            return [pos.strip() for pos in self.positions.split(',') if pos.strip()]
-        return []
+        if self.pk is None:
+            return []
+        # all() so a prefetch_related('positions') is used when present
+        return [position.code for position in self.positions.all()]
     
     def get_positions_display(self):
         """Return positions as a formatted string with display names"""
@@ -216,6 +417,179 @@ class PlayerProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['sort_name', 'id']),
+            models.Index(fields=['graduation_year', 'sort_name']),
+            # Roster dashboards (main/teams.py) list a team or school in sort_name order.
+            models.Index(fields=['team', 'sort_name']),
+            models.Index(fields=['school', 'sort_name']),
+        ]
+
+
+class Position(models.Model):
+    """A fielding position; one row per PlayerProfile.POSITION_CHOICES entry, created by migration"""
+    code = models.CharField(max_length=2, primary_key=True, choices=PlayerProfile.POSITION_CHOICES)
+    name = models.CharField(max_length=30)
+    sort_order = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['sort_order']
+
+
+class PlayerPosition(models.Model):
+    """Links a PlayerProfile to each position it plays"""
+    profile = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE)
+    position = models.ForeignKey(Position, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f"{self.profile.user.username} - {self.position_id}"
+
+    class Meta:
+        unique_together = (('profile', 'position'),)
+        # "every shortstop" reads profile ids straight from this index
+        indexes = [
+            models.Index(fields=['position', 'profile']),
+        ]
+
+
+class WatchlistEntry(models.Model):
+    """A user following a player; new metrics for the player go into the user's digest"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='watchlist_entries')
+    profile = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE, related_name='watchers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} watches {self.profile.user.username}"
+
+    class Meta:
+        verbose_name = 'Watchlist Entry'
+        verbose_name_plural = 'Watchlist Entries'
+        unique_together = (('user', 'profile'),)
+        # The fan-out joins from a player's profile to their watchers.
+        indexes = [
+            models.Index(fields=['profile', 'user']),
+        ]
+
+
+class WatchNotification(models.Model):
+    """
+    A new PlayerMetric, or an imported MetricsHistory row of a linked player,
+    for a watched player, pending until the watcher's next digest
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='watch_notifications')
+    metric = models.ForeignKey(PlayerMetric, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    # No database constraint: MetricsHistory may be partitioned, and re-imports
+    # replace rows wholesale. send_digests() drops notifications whose row is gone.
+    history = models.ForeignKey(
+        MetricsHistory, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.metric}"
+
+    class Meta:
+        verbose_name = 'Watch Notification'
+        verbose_name_plural = 'Watch Notifications'
+        unique_together = (('user', 'metric'), ('user', 'history'))
+        indexes = [
+            models.Index(fields=['sent_at', 'user']),
+        ]
+
+
+class Checkpoint(models.Model):
+    """How far a background job has read through a table, by primary key"""
+    name = models.CharField(max_length=50, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class PlayerIdentityLink(models.Model):
+    """
+    A proposed or reviewed match between a MetricsHistory player_id and a
+    PlayerProfile, written by match_player_identities (main.identity). A
+    player_id has at most one confirmed link.
+    """
+    PENDING = 'pending'
+    CONFIRMED = 'confirmed'
+    REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending review'),
+        (CONFIRMED, 'Confirmed'),
+        (REJECTED, 'Rejected'),
+    ]
+
+    player_id = models.IntegerField(verbose_name='Player ID')
+    profile = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE, related_name='identity_links')
+    score = models.FloatField(default=0)
+    # Lead over the runner-up match of either side
+    margin = models.FloatField(default=0)
+    # {feature: [profile value, history value]} for every feature compared
+    evidence = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Player {self.player_id} -> {self.profile} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = 'Player Identity Link'
+        verbose_name_plural = 'Player Identity Links'
+        ordering = ['-score']
+        unique_together = (('player_id', 'profile'),)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['player_id'], condition=models.Q(status='confirmed'), name='one_confirmed_link_per_player',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', '-score']),
+        ]
+
+
+def search_words(text):
+    """Lowercase alphanumeric words of ``text``, the unit the directory matches on"""
+    return re.findall(r'[a-z0-9]+', str(text).lower())
+
+
+def search_fields_for(profile, user, positions):
+    """
+    (search_text, sort_name) for a profile. search_text holds each word once
+    with a leading space, so `' ' + word` finds word prefixes; sort_name is
+    the "last first username" directory ordering.
+    """
+    position_names = dict(PlayerProfile.POSITION_CHOICES)
+    parts = [
+        user.first_name, user.last_name, user.username, profile.team, profile.school, profile.city,
+        profile.state, dict(PlayerProfile.STATE_CHOICES).get(profile.state), profile.graduation_year,
+    ]
+    for code in positions:
+        parts += [code, position_names.get(code)]
+    words = dict.fromkeys(search_words(' '.join(str(part) for part in parts if part)))
+    sort_name = ' '.join(part for part in (user.last_name, user.first_name, user.username) if part).lower()
+    return ' ' + ' '.join(words), sort_name[:300]
+
+
+@receiver(m2m_changed, sender=PlayerPosition)
+def refresh_search_fields_on_positions_change(sender, instance, action, reverse, **kwargs):
+    """Positions are linked after the profile is saved, so search_text is refreshed here"""
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    instance.update_search_fields()
+    PlayerProfile.objects.filter(pk=instance.pk).update(search_text=instance.search_text)
+
+
 @receiver(post_save, sender=User)
 def create_or_update_player_profile(sender, instance, created, **kwargs):
     if created:
@@ -0,0 +1,221 @@
+"""
+The long-format Observation store.
+
+MetricsHistory is wide (a column per metric) and PlayerMetric is long (a
+metricType code per row). Observation holds both as (source, entity, metric,
+value, age, date) rows, one per measured value, with ``metric`` always the
+MetricsHistory column name (analytics.METRIC_TYPE_COLUMNS maps PlayerMetric
+codes to it). Statistics then have one query path over all data:
+for_metric() filters on the (metric, age, value) index, and distribution(),
+percentile() and leaders() are answered from that index alone; the
+comparison pages read their ranges and percentiles through it. to_frame()
+turns any slice of the store into a MetricsFrame, so compute_metric_ranges
+--source observations builds MetricsRange, and through it the evaluation
+tables, from both sources in one pass.
+
+Rows are kept in step with their sources:
+
+* import_csv_data and generate_synthetic_data call sync_history() for the
+  MetricsHistory rows they wrote;
+* saving a PlayerMetric re-syncs it through a post_save receiver. There is no
+  post_delete receiver (it would stop compact_anonymous_metrics deleting in
+  bulk); prune() drops observations whose source row is gone.
+
+sync_observations rebuilds or prunes the whole store.
+"""
+import itertools
+from datetime import date as Date
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .ages import history_age
+from .analytics import (
+    GROUP_COLUMNS, ID_COLUMNS, LOWER_IS_BETTER, METRIC_COLUMNS, METRIC_TYPE_COLUMNS, MetricsFrame, column_dtype,
+)
+from .models import MetricsHistory, Observation, PlayerMetric
+
+BATCH_SIZE = 5000
+HISTORY_FIELDS = ['pk', 'player_id', 'gradYear', 'playerage', 'event_date'] + METRIC_COLUMNS
+PLAYER_FIELDS = ['pk', 'user_id', 'metricType', 'metric', 'playerAge', 'dateCaptured']
+EPOCH = Date(1970, 1, 1)
+
+
+def history_observations(row):
+    """Observations for one MetricsHistory values_list(*HISTORY_FIELDS) row; 0 means not measured"""
+    pk, player_id, grad_year, playerage, event_date = row[:5]
+    age = history_age(playerage, grad_year, event_date)
+    date = event_date.date() if event_date else None
+    return [
+        Observation(source=Observation.HISTORY, source_id=pk, entity=player_id, metric=metric,
+                    value=value, age=age, date=date)
+        for metric, value in zip(METRIC_COLUMNS, row[5:])
+        if value is not None and value > 0
+    ]
+
+
+def player_observation(row):
+    """The Observation for one PlayerMetric values_list(*PLAYER_FIELDS) row, or None"""
+    pk, user_id, metric_type, value, age, date = row
+    if user_id is None or metric_type not in METRIC_TYPE_COLUMNS or value is None or value <= 0:
+        return None
+    return Observation(source=Observation.PLAYER, source_id=pk, entity=user_id,
+                       metric=METRIC_TYPE_COLUMNS[metric_type], value=value, age=age, date=date)
+
+
+def _sync(source, rows, build, replace, batch_size):
+    written = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return written
+        observations = [observation for row in batch for observation in build(row) if observation is not None]
+        with transaction.atomic():
+            if replace:
+                Observation.objects.filter(source=source, source_id__in=[row[0] for row in batch]).delete()
+            Observation.objects.bulk_create(observations, ignore_conflicts=not replace)
+        written += len(observations)
+
+
+def sync_history(queryset=None, replace=True, batch_size=BATCH_SIZE):
+    """
+    Write the observations of MetricsHistory rows in ``queryset`` (default:
+    all), replacing any they already have; returns how many were written.
+    """
+    queryset = MetricsHistory.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('pk').values_list(*HISTORY_FIELDS).iterator(chunk_size=batch_size)
+    return _sync(Observation.HISTORY, rows, history_observations, replace, batch_size)
+
+
+def sync_player_metrics(queryset=None, replace=True, batch_size=BATCH_SIZE):
+    """sync_history() for PlayerMetric; metrics without a user are not observations"""
+    queryset = PlayerMetric.objects.all() if queryset is None else queryset
+    rows = queryset.filter(user__isnull=False).order_by('pk').values_list(*PLAYER_FIELDS).iterator(chunk_size=batch_size)
+    return _sync(Observation.PLAYER, rows, lambda row: [player_observation(row)], replace, batch_size)
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Empty the store and repopulate it from both sources; returns how many rows it holds"""
+    Observation.objects.all().delete()
+    return (sync_history(replace=False, batch_size=batch_size)
+            + sync_player_metrics(replace=False, batch_size=batch_size))
+
+
+def prune():
+    """Delete observations whose source row no longer exists; returns how many"""
+    deleted, _ = Observation.objects.filter(source=Observation.HISTORY).exclude(
+        source_id__in=MetricsHistory.objects.values('pk')
+    ).delete()
+    orphaned, _ = Observation.objects.filter(source=Observation.PLAYER).exclude(
+        source_id__in=PlayerMetric.objects.filter(user__isnull=False).values('pk')
+    ).delete()
+    return deleted + orphaned
+
+
+def for_metric(metric, age=None, sources=None):
+    """Observations of a MetricsHistory column (or PlayerMetric code), optionally at one age"""
+    observations = Observation.objects.filter(metric=METRIC_TYPE_COLUMNS.get(metric, metric))
+    if age is not None:
+        observations = observations.filter(age=age)
+    if sources:
+        observations = observations.filter(source__in=sources)
+    return observations
+
+
+def distribution(metric, age=None, sources=None, value=None):
+    """
+    {'count', 'min', 'max', 'avg'} of a metric, plus the 'percentile' of
+    ``value`` when one is given; None when it has no observations. One
+    aggregate over the index.
+    """
+    aggregates = {'count': Count('pk'), 'min': Min('value'), 'max': Max('value'), 'avg': Avg('value')}
+    if value is not None:
+        aggregates['at_or_below'] = Count('pk', filter=Q(value__lte=value))
+    stats = for_metric(metric, age, sources).aggregate(**aggregates)
+    if not stats['count']:
+        return None
+    if value is not None:
+        rank = stats.pop('at_or_below') / stats['count'] * 100
+        lower_is_better = METRIC_TYPE_COLUMNS.get(metric, metric) in LOWER_IS_BETTER
+        stats['percentile'] = int(round(100 - rank if lower_is_better else rank))
+    return stats
+
+
+def percentile(metric, age, value, sources=None):
+    """
+    Percentile (0-100, higher is better) of ``value`` among a metric's
+    observations at ``age``: the share at or below it, flipped for metrics
+    where lower is better, as analytics.percentile_rank() does. None without
+    observations.
+    """
+    stats = distribution(metric, age, sources, value)
+    return stats['percentile'] if stats else None
+
+
+def leaders(metric, age=None, sources=None, limit=10):
+    """The best ``limit`` observations of a metric, best first"""
+    column = METRIC_TYPE_COLUMNS.get(metric, metric)
+    order = 'value' if column in LOWER_IS_BETTER else '-value'
+    return for_metric(metric, age, sources).order_by(order, 'pk')[:limit]
+
+
+def to_frame(queryset=None, chunk_size=20000):
+    """
+    A MetricsFrame with one row per observation (only its metric valid) and
+    ``playerage`` holding the observation's age, so MetricsFrame.group_stats()
+    runs unchanged over both sources.
+    """
+    queryset = Observation.objects.all() if queryset is None else queryset
+    total = queryset.count()
+    names = METRIC_COLUMNS + GROUP_COLUMNS + ID_COLUMNS
+    values = {name: np.zeros(total, dtype=column_dtype(name)) for name in names}
+    valid = {name: np.zeros(total, dtype=bool) for name in names}
+    event_date = np.zeros(total, dtype=np.int64)
+    slot = {metric: index for index, metric in enumerate(METRIC_COLUMNS)}
+
+    rows = queryset.order_by().values_list('metric', 'value', 'age', 'entity', 'date').iterator(chunk_size=chunk_size)
+    offset = 0
+    while offset < total:
+        chunk = list(itertools.islice(rows, min(chunk_size, total - offset)))
+        if not chunk:
+            break
+        end = offset + len(chunk)
+        metrics = np.fromiter((slot.get(row[0], -1) for row in chunk), dtype=np.int64, count=len(chunk))
+        numbers = np.fromiter((row[1] for row in chunk), dtype=np.float32, count=len(chunk))
+        for metric, index in slot.items():
+            rows_of_metric = np.flatnonzero(metrics == index) + offset
+            values[metric][rows_of_metric] = numbers[metrics == index]
+            valid[metric][rows_of_metric] = True
+        ages = np.fromiter((np.nan if row[2] is None else row[2] for row in chunk), dtype=np.float32, count=len(chunk))
+        values['playerage'][offset:end] = np.nan_to_num(ages)
+        valid['playerage'][offset:end] = ~np.isnan(ages)
+        values['player_id'][offset:end] = np.fromiter((row[3] for row in chunk), dtype=np.int64, count=len(chunk))
+        valid['player_id'][offset:end] = True
+        event_date[offset:end] = np.fromiter(
+            (0 if row[4] is None else (row[4] - EPOCH).days * 86400 for row in chunk),
+            dtype=np.int64, count=len(chunk),
+        )
+        offset = end
+    return MetricsFrame(
+        {name: column[:offset] for name, column in values.items()},
+        {name: column[:offset] for name, column in valid.items()},
+        event_date[:offset].astype('datetime64[s]'),
+    )
+
+
+@receiver(post_save, sender=PlayerMetric)
+def sync_saved_metric(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        Observation.objects.filter(source=Observation.PLAYER, source_id=instance.pk).delete()
+        row = [getattr(instance, field) for field in PLAYER_FIELDS]
+        # An unsaved-from-form instance may still hold the value as a string or float.
+        row[3] = None if row[3] is None else Decimal(str(row[3]))
+        observation = player_observation(row)
+        if observation is not None:
+            observation.save()
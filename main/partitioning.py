@@ -0,0 +1,225 @@
+"""
+Optional Postgres range partitioning of MetricsHistory by event year.
+
+With METRICS_HISTORY_PARTITIONING enabled, main_metricshistory becomes a
+declaratively partitioned table (PARTITION BY RANGE (event_date)), with one
+partition per calendar year (``main_metricshistory_y2024``) plus a default
+partition for anything outside them. A baseball season sits inside one
+calendar year, so a year partition is a season.
+
+The ORM keeps treating ``id`` as the primary key. Postgres requires the
+partition key in every unique constraint, so the database-level key is
+(id, event_date); ids still come from a single sequence and stay unique.
+
+Nothing here runs on SQLite or on an unpartitioned table. Callers check
+is_partitioned() first, and the app works the same either way.
+"""
+import csv
+import io
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import MetricsHistory
+
+TABLE = MetricsHistory._meta.db_table
+SEQUENCE = f'{TABLE}_pk_seq'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def supported(using=connection):
+    return using.vendor == 'postgresql'
+
+
+def is_partitioned(using=connection):
+    if not supported(using):
+        return False
+    with using.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_name(year):
+    return f'{TABLE}_y{int(year)}'
+
+
+def year_bounds(year):
+    start = datetime(int(year), 1, 1, tzinfo=dt_timezone.utc)
+    end = datetime(int(year) + 1, 1, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def convert_table(years=()):
+    """
+    Rebuild main_metricshistory as a partitioned table, copying existing rows.
+
+    Runs in one transaction and holds an exclusive lock on the table until it
+    commits, so schedule it in a maintenance window on large tables.
+    """
+    old = f'{TABLE}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s',
+            [TABLE, '%_pkey'],
+        )
+        index_definitions = cursor.fetchall()
+        cursor.execute(f'SELECT EXTRACT(YEAR FROM MIN(event_date))::int, EXTRACT(YEAR FROM MAX(event_date))::int, '
+                       f'COALESCE(MAX(id), 0) FROM {_qn(TABLE)}')
+        first_year, last_year, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {_qn(TABLE)} RENAME TO {_qn(old)}')
+        cursor.execute(f'ALTER TABLE {_qn(old)} RENAME CONSTRAINT {_qn(TABLE + "_pkey")} TO {_qn(old + "_pkey")}')
+        cursor.execute(
+            f'CREATE TABLE {_qn(TABLE)} (LIKE {_qn(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (event_date)'
+        )
+        cursor.execute(f'CREATE SEQUENCE {_qn(SEQUENCE)} OWNED BY {_qn(TABLE)}.id')
+        cursor.execute('SELECT setval(%s, %s, %s)', [SEQUENCE, max(max_id, 1), bool(max_id)])
+        cursor.execute(f"ALTER TABLE {_qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f'ALTER TABLE {_qn(TABLE)} ADD PRIMARY KEY (id, event_date)')
+
+        cursor.execute(f'CREATE TABLE {_qn(DEFAULT_PARTITION)} PARTITION OF {_qn(TABLE)} DEFAULT')
+        wanted = set(years)
+        if first_year is not None:
+            wanted.update(range(first_year, last_year + 1))
+        for year in sorted(wanted):
+            _create_partition(cursor, year)
+
+        cursor.execute(f'INSERT INTO {_qn(TABLE)} SELECT * FROM {_qn(old)}')
+        cursor.execute(f'DROP TABLE {_qn(old)}')
+        # The definitions were read before the rename, so they name the new
+        # parent table; Postgres cascades each index to every partition.
+        for _, definition in index_definitions:
+            cursor.execute(definition)
+
+
+def _bounds_sql(year):
+    # DDL cannot take bind parameters under psycopg 3, so the bounds are
+    # inlined; they are built from an int year and nothing else.
+    start, end = year_bounds(year)
+    return f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def _create_partition(cursor, year):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {_qn(partition_name(year))} PARTITION OF {_qn(TABLE)} {_bounds_sql(year)}'
+    )
+
+
+def existing_years():
+    return {partition['year'] for partition in list_partitions() if partition['year'] is not None}
+
+
+def ensure_partitions(years):
+    """
+    Create any missing year partitions. Rows for that year already sitting in
+    the default partition are moved into the new partition first, as Postgres
+    refuses to attach a range the default partition still holds rows for.
+    """
+    created = []
+    missing = sorted(set(int(year) for year in years) - existing_years())
+    for year in missing:
+        start, end = year_bounds(year)
+        name = partition_name(year)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {_qn(name)} (LIKE {_qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {_qn(DEFAULT_PARTITION)} WHERE event_date >= %s AND event_date < %s '
+                f'RETURNING *) INSERT INTO {_qn(name)} SELECT * FROM moved',
+                [start, end],
+            )
+            cursor.execute(f'ALTER TABLE {_qn(TABLE)} ATTACH PARTITION {_qn(name)} {_bounds_sql(year)}')
+        created.append(year)
+    return created
+
+
+def list_partitions():
+    """[{'name', 'year', 'bounds', 'rows'}] for every attached partition; rows is the planner estimate"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint '
+            'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+            'WHERE p.relname = %s ORDER BY c.relname',
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    prefix = f'{TABLE}_y'
+    return [
+        {
+            'name': name,
+            'year': int(name[len(prefix):]) if name.startswith(prefix) else None,
+            'bounds': bounds,
+            'rows': max(estimate, 0),
+        }
+        for name, bounds, estimate in rows
+    ]
+
+
+def truncate_partition(year):
+    """Empty one season in O(1) instead of a row-by-row DELETE"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'TRUNCATE TABLE {_qn(partition_name(year))}')
+
+
+def truncate_all():
+    """Empty every partition at once"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'TRUNCATE TABLE {_qn(TABLE)}')
+
+
+def detach_partition(year, drop=False):
+    """
+    Detach a season from MetricsHistory. The detached table keeps its rows for
+    archiving unless ``drop`` is set.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {_qn(TABLE)} DETACH PARTITION {_qn(partition_name(year))}')
+        if drop:
+            cursor.execute(f'DROP TABLE {_qn(partition_name(year))}')
+
+
+def copy_into_partitions(objects):
+    """
+    Bulk load unsaved MetricsHistory instances with COPY, one COPY per year
+    straight into that year's partition so Postgres skips per-row tuple
+    routing. Ids are drawn from the shared sequence up front.
+    """
+    by_year = {}
+    for obj in objects:
+        by_year.setdefault(obj.event_date.astimezone(dt_timezone.utc).year, []).append(obj)
+    ensure_partitions(by_year)
+
+    fields = [field for field in MetricsHistory._meta.concrete_fields if not field.primary_key]
+    column_list = ', '.join(_qn(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [SEQUENCE, len(objects)])
+        ids = iter(row[0] for row in cursor.fetchall())
+        for year, rows in sorted(by_year.items()):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for obj in rows:
+                obj.id = next(ids)
+                writer.writerow([obj.id] + [
+                    # pre_save fills auto_now/auto_now_add timestamps as save() would
+                    field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields
+                ])
+            _copy(cursor, f'COPY {_qn(partition_name(year))} (id, {column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+    return objects
+
+
+def _copy(cursor, sql, buffer):
+    """COPY FROM STDIN for both psycopg2 (copy_expert) and psycopg 3 (copy)"""
+    buffer.seek(0)
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.read())
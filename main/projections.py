@@ -0,0 +1,105 @@
+"""
+Player development projections from MetricsHistory growth curves.
+
+fit_curves() pairs each player's latest value at age A with their latest
+value at age A + 1 and fits value(A + 1) = intercept + slope * value(A) per
+metric and age by least squares, using per-age sums with no Python loop over
+players. The fitted coefficients are stored in GrowthCurve by the
+fit_growth_curves command. Serving reads only that small table, cached per
+process under a key versioned by the table's row count and newest fitted_at,
+and chains it forward year by year from a player's latest value.
+"""
+import math
+
+import numpy as np
+from django.db.models import Count, Max
+
+from . import metrics
+from .analytics import METRIC_TYPE_COLUMNS, latest_by_player_age
+from .models import GrowthCurve
+
+CACHE_KEY = 'growth_curves'
+CACHE_TIMEOUT = 60 * 60
+MAX_AGE = 20
+
+
+def fit_curves(frame, min_samples=30):
+    """Return a list of unsaved GrowthCurve objects fitted from ``frame``"""
+    metric_types = list(METRIC_TYPE_COLUMNS)
+    players, ages, raw = latest_by_player_age(frame, [METRIC_TYPE_COLUMNS[m] for m in metric_types])
+    # Rows are sorted by (player, age), so consecutive-year pairs are adjacent.
+    pair = np.flatnonzero((players[1:] == players[:-1]) & (ages[1:] == ages[:-1] + 1))
+    from_ages = ages[pair]
+
+    curves = []
+    for index, metric_type in enumerate(metric_types):
+        x = raw[pair, index].astype(np.float64)
+        y = raw[pair + 1, index].astype(np.float64)
+        both = ~np.isnan(x) & ~np.isnan(y)
+        x, y, group = x[both], y[both], from_ages[both]
+        if not group.size:
+            continue
+
+        size = int(group.max()) + 1
+        n = np.bincount(group, minlength=size).astype(np.float64)
+        sx, sy = np.bincount(group, x, size), np.bincount(group, y, size)
+        sxx, sxy = np.bincount(group, x * x, size), np.bincount(group, x * y, size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = (sxy - sx * sy / n) / (sxx - sx * sx / n)
+            intercept = (sy - slope * sx) / n
+            residuals = y - (intercept[group] + slope[group] * x)
+            residual_std = np.sqrt(np.bincount(group, residuals * residuals, size) / (n - 2))
+
+        for age in np.flatnonzero((n >= min_samples) & np.isfinite(slope)):
+            curves.append(GrowthCurve(
+                metricType=metric_type,
+                fromAge=int(age),
+                toAge=int(age) + 1,
+                intercept=round(float(intercept[age]), 4),
+                slope=round(float(slope[age]), 4),
+                residualStd=round(float(residual_std[age]), 4),
+                samples=int(n[age]),
+            ))
+    return curves
+
+
+def load_curves():
+    """{metricType: {fromAge: (intercept, slope, residualStd)}} from the per-process cache"""
+    def build():
+        table = {}
+        for curve in GrowthCurve.objects.all():
+            table.setdefault(curve.metricType, {})[curve.fromAge] = (curve.intercept, curve.slope, curve.residualStd)
+        return table
+    return metrics.cache_get_or_set('growth_curves', cache_key(), build, timeout=CACHE_TIMEOUT)
+
+
+def cache_key():
+    """CACHE_KEY versioned by the newest GrowthCurve.fitted_at and the row count, which also catches deletes"""
+    version = GrowthCurve.objects.aggregate(fitted=Max('fitted_at'), count=Count('id'))
+    stamp = version['fitted'].timestamp() if version['fitted'] else 0
+    return f'{CACHE_KEY}:{version["count"]}:{stamp}'
+
+
+def project(metric_type, age, value, through_age=MAX_AGE, curves=None):
+    """
+    Project ``value`` measured at ``age`` forward one year at a time while
+    coefficients exist. Returns [{'age', 'value', 'low', 'high'}] where
+    low/high is a one standard deviation band that widens each year.
+    """
+    table = (curves if curves is not None else load_curves()).get(metric_type, {})
+    projected = []
+    current = float(value)
+    spread = 0.0
+    age = int(age)
+    while age < through_age and age in table:
+        intercept, slope, residual_std = table[age]
+        current = intercept + slope * current
+        spread = math.sqrt((slope * spread) ** 2 + residual_std ** 2)
+        age += 1
+        projected.append({
+            'age': age,
+            'value': round(current, 2),
+            'low': round(current - spread, 2),
+            'high': round(current + spread, 2),
+        })
+    return projected
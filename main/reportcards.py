@@ -0,0 +1,243 @@
+"""
+One-page player report cards rendered with Pillow.
+
+card_inputs() collects everything a card shows: profile fields, each
+metric's history and its latest value's percentile. The card is stored
+through STORAGES["default"] as ``report_cards/<sha256 of the inputs>.<fmt>``,
+so a card is rendered once per distinct set of inputs. A profile edit, a new
+metric or a change in the ranges gives new inputs and so a new file. Requests
+only hash the inputs and redirect to the stored file.
+
+Missing cards are rendered by a small per-process thread pool
+(REPORT_CARD_WORKERS) so the request that finds one missing returns at once.
+The render_report_cards command pre-renders cards and prunes stale files.
+"""
+import hashlib
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from PIL import Image, ImageDraw, ImageFont
+
+from . import evaluation
+from .models import PlayerMetric
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout changes so existing cards are re-rendered.
+RENDER_VERSION = 1
+DIRECTORY = 'report_cards'
+FORMATS = {'png': 'image/png', 'pdf': 'application/pdf'}
+URL_CACHE_TIMEOUT = 24 * 60 * 60
+METRICS = [
+    ('60', '60 Yard Dash', 'sec'),
+    ('fbvelo', 'Fastball Velocity', 'mph'),
+    ('exitvelo', 'Exit Velocity', 'mph'),
+    ('ofvelo', 'Outfield Velocity', 'mph'),
+    ('ifvelo', 'Infield Velocity', 'mph'),
+]
+
+# Letter size at 150 dpi
+WIDTH, HEIGHT = 1275, 1650
+DPI = 150
+MARGIN = 80
+PRIMARY = (13, 110, 253)
+TEXT = (33, 37, 41)
+MUTED = (108, 117, 125)
+RULE = (222, 226, 230)
+
+
+def card_inputs(profile):
+    """Everything a report card shows, as plain JSON-serializable data"""
+    user = profile.user
+    history = {}
+    latest = {}
+    # Undated metrics sort first, as in teams.latest_metrics().
+    metrics = PlayerMetric.objects.filter(user=user).order_by(F('dateCaptured').asc(nulls_first=True), 'created_at')
+    for metric in metrics.only('metricType', 'metric', 'playerAge', 'dateCaptured'):
+        date = metric.dateCaptured.isoformat() if metric.dateCaptured else None
+        history.setdefault(metric.metricType, []).append([date, str(metric.metric)])
+        latest[metric.metricType] = metric
+
+    types = [code for code, _, _ in METRICS if code in latest]
+    scores = evaluation.evaluate_batch(
+        types, [latest[code].playerAge for code in types], [latest[code].metric for code in types]
+    )
+    return {
+        'version': RENDER_VERSION,
+        'username': user.username,
+        'name': user.get_full_name() or user.username,
+        'positions': profile.get_positions_display(),
+        'team': profile.team or '',
+        'school': profile.school or '',
+        'hometown': ', '.join(part for part in (profile.city, profile.state) if part),
+        'graduation_year': profile.graduation_year,
+        'height_inches': profile.height_inches,
+        'weight_lbs': profile.weight_lbs,
+        'throws': profile.get_throws_display() if profile.throws else '',
+        'hits': profile.get_hits_display() if profile.hits else '',
+        'metrics': {
+            code: {
+                'history': history[code],
+                'latest': str(latest[code].metric),
+                'age': latest[code].playerAge,
+                'percentile': score['percentile'],
+                'average': score['avg'],
+            }
+            for code, score in zip(types, scores)
+        },
+    }
+
+
+def content_hash(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def storage_name(digest, fmt):
+    return f'{DIRECTORY}/{digest}.{fmt}'
+
+
+def _font(size):
+    return ImageFont.load_default(size=size)
+
+
+def _sparkline(draw, box, values):
+    left, top, right, bottom = box
+    if len(values) < 2:
+        draw.line((left, (top + bottom) / 2, right, (top + bottom) / 2), fill=RULE, width=2)
+        return
+    low, high = min(values), max(values)
+    spread = (high - low) or 1
+    step = (right - left) / (len(values) - 1)
+    points = [(left + i * step, bottom - (value - low) / spread * (bottom - top)) for i, value in enumerate(values)]
+    draw.line(points, fill=PRIMARY, width=3, joint='curve')
+    x, y = points[-1]
+    draw.ellipse((x - 5, y - 5, x + 5, y + 5), fill=PRIMARY)
+
+
+def render_image(inputs):
+    """The report card as a Pillow image"""
+    image = Image.new('RGB', (WIDTH, HEIGHT), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, WIDTH, 200), fill=PRIMARY)
+    draw.text((MARGIN, 55), inputs['name'], font=_font(56), fill='white')
+    subtitle = ' | '.join(str(part) for part in (
+        inputs['positions'] if inputs['positions'] != 'Not set' else '',
+        f"Class of {inputs['graduation_year']}" if inputs['graduation_year'] else '',
+        inputs['team'],
+    ) if part)
+    draw.text((MARGIN, 130), subtitle, font=_font(28), fill='white')
+
+    details = [
+        ('School', inputs['school']),
+        ('Hometown', inputs['hometown']),
+        ('Height', f"{inputs['height_inches']} in" if inputs['height_inches'] else ''),
+        ('Weight', f"{inputs['weight_lbs']} lbs" if inputs['weight_lbs'] else ''),
+        ('Throws / Hits', ' / '.join(part for part in (inputs['throws'], inputs['hits']) if part)),
+    ]
+    y = 250
+    for index, (label, value) in enumerate(details):
+        x = MARGIN + (index % 2) * (WIDTH - 2 * MARGIN) // 2
+        draw.text((x, y), label.upper(), font=_font(20), fill=MUTED)
+        draw.text((x, y + 28), value or '-', font=_font(30), fill=TEXT)
+        if index % 2:
+            y += 90
+    y += 110
+
+    draw.text((MARGIN, y), 'LATEST METRICS', font=_font(24), fill=MUTED)
+    y += 50
+    for code, label, unit in METRICS:
+        draw.line((MARGIN, y, WIDTH - MARGIN, y), fill=RULE, width=2)
+        metric = inputs['metrics'].get(code)
+        draw.text((MARGIN, y + 30), label, font=_font(30), fill=TEXT)
+        if metric is None:
+            draw.text((MARGIN, y + 75), 'Not measured', font=_font(24), fill=MUTED)
+            y += 170
+            continue
+        draw.text((MARGIN, y + 75), f"{metric['latest']} {unit} at age {metric['age']}", font=_font(26), fill=TEXT)
+
+        bar_left, bar_top = 560, y + 40
+        draw.rounded_rectangle((bar_left, bar_top, bar_left + 300, bar_top + 26), radius=13, fill=RULE)
+        if metric['percentile'] is not None:
+            filled = bar_left + 3 * max(metric['percentile'], 4)
+            draw.rounded_rectangle((bar_left, bar_top, filled, bar_top + 26), radius=13, fill=PRIMARY)
+            caption = f"{metric['percentile']}th percentile for age {metric['age']}"
+        else:
+            caption = 'No comparison data for this age'
+        draw.text((bar_left, bar_top + 38), caption, font=_font(20), fill=MUTED)
+
+        values = [float(value) for _, value in metric['history']]
+        _sparkline(draw, (WIDTH - MARGIN - 230, y + 35, WIDTH - MARGIN, y + 115), values)
+        y += 170
+    draw.line((MARGIN, y, WIDTH - MARGIN, y), fill=RULE, width=2)
+
+    footer = f"statsprofile - {settings.SITE_URL}/{inputs['username']}/"
+    draw.text((MARGIN, HEIGHT - 80), footer, font=_font(20), fill=MUTED)
+    return image
+
+
+def render(inputs, fmt):
+    """Encoded card bytes in ``fmt`` ('png' or 'pdf')"""
+    buffer = io.BytesIO()
+    image = render_image(inputs)
+    if fmt == 'pdf':
+        image.save(buffer, 'PDF', resolution=DPI)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def stored_url(name):
+    """URL of a stored card, or None if it has not been rendered yet"""
+    # Names are content hashes, so a file once found never changes; remembering
+    # that saves a storage round trip (an S3 HEAD request) on every view.
+    key = f'report_card:{name}'
+    url = cache.get(key)
+    if url is None and default_storage.exists(name):
+        url = default_storage.url(name)
+        cache.set(key, url, URL_CACHE_TIMEOUT)
+    return url
+
+
+def store(inputs, fmt, digest=None):
+    """Render and save a card unless its file already exists; returns (storage name, rendered)"""
+    name = storage_name(digest or content_hash(inputs), fmt)
+    if default_storage.exists(name):
+        return name, False
+    default_storage.save(name, ContentFile(render(inputs, fmt)))
+    return name, True
+
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def render_in_background(inputs, fmt, digest):
+    """Queue a card on the worker pool; a card already queued or rendering is not queued twice"""
+    global _executor
+    name = storage_name(digest, fmt)
+    with _lock:
+        if name in _pending:
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.REPORT_CARD_WORKERS, thread_name_prefix='reportcard')
+        _pending.add(name)
+    _executor.submit(_render_job, inputs, fmt, digest)
+
+
+def _render_job(inputs, fmt, digest):
+    try:
+        store(inputs, fmt, digest)
+    except Exception:
+        logger.exception('Rendering report card %s failed', storage_name(digest, fmt))
+    finally:
+        with _lock:
+            _pending.discard(storage_name(digest, fmt))
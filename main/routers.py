@@ -0,0 +1,112 @@
+"""
+Read-replica routing.
+
+When REPLICA_DATABASE_URL is set, settings add a ``replica`` database. Reads
+only go there inside an opt-in scope: views decorated with
+@use_read_replica, or code running under ``with replica_reads():``. Every
+other read, and every write, goes to ``default``.
+
+Read-your-writes: ReplicaStickinessMiddleware notes any write made while
+handling a request and pins that session to the primary for
+REPLICA_STICKY_SECONDS, so a user who just saved metrics never sees the
+replica lagging behind them.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+SESSION_KEY = '_replica_pinned_until'
+
+# Alias reads should use in the current context; None means the primary.
+_read_alias = ContextVar('read_alias', default=None)
+# Per-request {'wrote': bool} set by the middleware and flagged by the router.
+_request_writes = ContextVar('request_writes', default=None)
+
+# Session and message bookkeeping is not user data; writing it should not pin reads.
+UNTRACKED_APPS = {'sessions'}
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def read_alias():
+    """Database alias reads in the current context are routed to"""
+    return _read_alias.get() or PRIMARY
+
+
+@contextmanager
+def replica_reads():
+    """Route ORM reads inside the block to the replica when one is configured"""
+    if not replica_configured():
+        yield PRIMARY
+        return
+    token = _read_alias.set(REPLICA)
+    try:
+        yield REPLICA
+    finally:
+        _read_alias.reset(token)
+
+
+def is_pinned(request):
+    session = getattr(request, 'session', None)
+    return bool(session) and session.get(SESSION_KEY, 0) > time.time()
+
+
+def use_read_replica(view):
+    """Serve a read-only view from the replica unless its session recently wrote"""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if not replica_configured() or is_pinned(request):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapped
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None and model._meta.app_label not in UNTRACKED_APPS:
+            writes['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin a session to the primary for REPLICA_STICKY_SECONDS after it writes.
+
+    Must come after SessionMiddleware so the pin is saved with the session.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+
+        writes = {'wrote': False}
+        token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        if writes['wrote'] and hasattr(request, 'session'):
+            request.session[SESSION_KEY] = time.time() + getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+        return response
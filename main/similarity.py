@@ -0,0 +1,302 @@
+"""
+Similar-player search over MetricsHistory.
+
+Each (player_id, playerage) pair is embedded as the player's latest measured
+value of every FEATURES column at that age. Vectors are z-score normalized
+per age, and missing values sit at the age mean (0). Every age has its own
+contiguous float32 matrix that is scanned in fixed-size blocks, so a top-k
+query is a few vectorized passes rather than a pairwise comparison in Python.
+
+The index lives in process memory and is built and refreshed on a
+background thread, at most once every SIMILARITY_REFRESH_SECONDS, so requests
+only read it; until the first build finishes ``index.ready`` is False. A full
+build reads the columnar snapshot (main.snapshots) rather than the live table
+and then catches up on rows updated since the snapshot. When MetricsHistory
+has rows updated since the last watermark (for example after
+import_csv_data), only those players are re-embedded and their ages
+re-normalized. A full rebuild happens when rows have been deleted, which the
+row count gives away even when as many rows were re-imported.
+"""
+import logging
+import threading
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max
+
+from . import snapshots
+from .analytics import METRIC_TYPE_COLUMNS, MetricsFrame, latest_by_player_age
+from .models import MetricsHistory, PlayerMetric
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ['exitVelo', 'sixtyyard', 'maxFB', 'ifVelo', 'ofVelo', 'height', 'weight']
+BLOCK_ROWS = 65536
+MAX_K = 50
+# Past this many changed players a full rebuild is cheaper than an IN (...) reload.
+MAX_INCREMENTAL_PLAYERS = 5000
+
+def embed(frame):
+    """(player_ids, ages, raw) of each (player, age)'s latest FEATURES values"""
+    return latest_by_player_age(frame, FEATURES)
+
+
+class AgeIndex:
+    """Normalized feature matrix for one age"""
+
+    def __init__(self, age, player_ids, raw):
+        self.age = age
+        self.player_ids = player_ids
+        self.raw = raw
+        with warnings.catch_warnings():
+            # nanmean/nanstd warn on all-NaN columns, which are expected here.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.mean = np.nanmean(raw, axis=0) if len(raw) else np.zeros(len(FEATURES))
+            std = np.nanstd(raw, axis=0) if len(raw) else np.ones(len(FEATURES))
+        self.mean = np.nan_to_num(self.mean)
+        self.std = np.where(np.isnan(std) | (std == 0), 1, std)
+        self.matrix = np.ascontiguousarray(np.nan_to_num((raw - self.mean) / self.std), dtype=np.float32)
+        self.row_of = {int(player): row for row, player in enumerate(player_ids)}
+
+    def normalize(self, values):
+        """Z-score a raw feature vector; returns (vector, present dimension mask)"""
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        return np.where(present, (values - self.mean) / self.std, 0), present
+
+    def nearest(self, vector, present, k, exclude=None):
+        """Top-k rows by Euclidean distance over the dimensions present in the query"""
+        if not present.any() or not len(self.matrix):
+            return []
+        columns = np.flatnonzero(present)
+        query = vector[columns].astype(np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self.matrix), BLOCK_ROWS):
+            block = self.matrix[start:start + BLOCK_ROWS, columns]
+            dist = ((block - query) ** 2).sum(axis=1)
+            if exclude is not None and start <= exclude < start + len(block):
+                dist[exclude - start] = np.inf
+            take = min(k, len(dist))
+            top = np.argpartition(dist, take - 1)[:take]
+            best_rows = np.concatenate([best_rows, top + start])
+            best_dist = np.concatenate([best_dist, dist[top]])
+        keep = np.argsort(best_dist, kind='stable')[:k]
+        return [(int(best_rows[i]), float(np.sqrt(best_dist[i]))) for i in keep if np.isfinite(best_dist[i])]
+
+
+class SimilarityIndex:
+    """Per-age nearest-neighbour indexes with incremental refresh"""
+
+    def __init__(self):
+        self.ages = {}
+        self.watermark = None
+        self.row_count = None
+        self.last_id = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+        # Separate from ``lock``, which a refresh holds for its whole run
+        self.worker_lock = threading.Lock()
+        self.worker = None
+
+    @property
+    def ready(self):
+        return self.row_count is not None
+
+    def ensure_fresh(self, force=False):
+        """Refresh now, in the calling thread, if the last check is older than the interval"""
+        interval = getattr(settings, 'SIMILARITY_REFRESH_SECONDS', 60)
+        with self.lock:
+            if not force and self.checked_at is not None and time.monotonic() - self.checked_at < interval:
+                return
+            self.refresh()
+            self.checked_at = time.monotonic()
+
+    def refresh_in_background(self):
+        """Start ensure_fresh() on a worker thread unless one is running; never blocks"""
+        interval = getattr(settings, 'SIMILARITY_REFRESH_SECONDS', 60)
+        if self.checked_at is not None and time.monotonic() - self.checked_at < interval:
+            return
+        with self.worker_lock:
+            if self.worker is not None and self.worker.is_alive():
+                return
+            self.worker = threading.Thread(target=self._refresh_job, name='similarity-index', daemon=True)
+            self.worker.start()
+
+    def _refresh_job(self):
+        try:
+            self.ensure_fresh()
+        except Exception:
+            logger.exception('Similarity index refresh failed')
+        finally:
+            # The thread's own database connection
+            connection.close()
+
+    def refresh(self):
+        state = self.database_state()
+        if self.row_count is None or self.watermark is None or self.deleted_since(self.state, state):
+            self.rebuild(state)
+            return
+        self.catch_up(state)
+
+    @property
+    def state(self):
+        return {'rows': self.row_count, 'latest': self.watermark, 'last_id': self.last_id}
+
+    def database_state(self):
+        return MetricsHistory.objects.aggregate(rows=Count('id'), latest=Max('updated_at'), last_id=Max('id'))
+
+    @staticmethod
+    def deleted_since(base, state):
+        """
+        Whether rows were deleted since ``base``: ids only grow, so without
+        deletes the row count is the base count plus the rows added after it.
+        A season deleted and re-imported at the same size is caught too.
+        """
+        added = MetricsHistory.objects.filter(id__gt=base['last_id'] or 0).count()
+        return state['rows'] != base['rows'] + added
+
+    def catch_up(self, state):
+        """Re-embed the players with rows updated since the watermark"""
+        if state['latest'] == self.watermark and state['rows'] == self.row_count:
+            return
+        changed = MetricsHistory.objects.filter(updated_at__gt=self.watermark)
+        player_ids = list(changed.order_by().values_list('player_id', flat=True).distinct()[:MAX_INCREMENTAL_PLAYERS + 1])
+        if len(player_ids) > MAX_INCREMENTAL_PLAYERS:
+            self.rebuild(state, source='database')
+            return
+        started = time.perf_counter()
+        frame = MetricsFrame.from_database(MetricsHistory.objects.filter(player_id__in=player_ids))
+        self.merge(np.asarray(player_ids, dtype=np.int64), *embed(frame))
+        self.watermark, self.row_count, self.last_id = state['latest'], state['rows'], state['last_id']
+        logger.info('Similarity index: re-embedded %d player(s) in %.2fs', len(player_ids), time.perf_counter() - started)
+
+    def snapshot_state(self):
+        """State of the columnar snapshot, or None without one"""
+        manifest = snapshots.read_manifest()
+        if not manifest['partitions'] or not manifest['watermark']:
+            return None
+        ids, _ = snapshots.load_columns(['id'])['id']
+        return {
+            'rows': sum(partition['rows'] for partition in manifest['partitions'].values()),
+            'latest': datetime.fromisoformat(manifest['watermark']),
+            'last_id': int(ids.max()) if len(ids) else None,
+        }
+
+    def rebuild(self, state, source='auto'):
+        """
+        Build every vector from the columnar snapshot, then catch up on rows
+        updated since it was written. The live table is read instead when
+        there is no snapshot, rows were deleted after it, or ``source`` is
+        'database'.
+        """
+        started = time.perf_counter()
+        base = self.snapshot_state() if source == 'auto' else None
+        if base is not None and not self.deleted_since(base, state):
+            frame = MetricsFrame.from_snapshot()
+        else:
+            base = state
+            frame = MetricsFrame.from_database()
+        players, ages, raw = embed(frame)
+        self.ages = {
+            int(age): AgeIndex(int(age), players[ages == age], raw[ages == age])
+            for age in np.unique(ages)
+        }
+        self.watermark, self.row_count, self.last_id = base['latest'], base['rows'], base['last_id']
+        logger.info('Similarity index: built %d vectors in %.2fs', len(players), time.perf_counter() - started)
+        self.catch_up(state)
+
+    def merge(self, changed_players, players, ages, raw):
+        """Replace the vectors of ``changed_players`` and re-normalize the ages they touch"""
+        touched = set(np.unique(ages).tolist())
+        for age, index in self.ages.items():
+            if np.isin(index.player_ids, changed_players).any():
+                touched.add(age)
+        # Built aside and swapped in, since requests read self.ages while this runs
+        merged = dict(self.ages)
+        for age in touched:
+            current = merged.get(age)
+            old_players = current.player_ids if current else np.empty(0, dtype=np.int64)
+            old_raw = current.raw if current else np.empty((0, len(FEATURES)), dtype=np.float32)
+            keep = ~np.isin(old_players, changed_players)
+            merged[age] = AgeIndex(
+                age,
+                np.concatenate([old_players[keep], players[ages == age]]),
+                np.concatenate([old_raw[keep], raw[ages == age]]),
+            )
+        self.ages = merged
+
+    def nearest_age(self, age, ages=None):
+        ages = self.ages if ages is None else ages
+        if not ages:
+            return None
+        return min(ages, key=lambda candidate: (abs(candidate - age), candidate))
+
+    def similar(self, raw, age, k=10, exclude_player=None):
+        """
+        Top-k comps for a raw feature vector (NaN = unknown) at ``age``; falls
+        back to the closest indexed age.
+        """
+        ages = self.ages
+        age = self.nearest_age(age, ages)
+        if age is None:
+            return None, []
+        index = ages[age]
+        vector, present = index.normalize(raw)
+        exclude = index.row_of.get(exclude_player) if exclude_player is not None else None
+        comps = []
+        for row, distance in index.nearest(vector, present, min(k, MAX_K), exclude=exclude):
+            comps.append({
+                'player_id': int(index.player_ids[row]),
+                'age': age,
+                'distance': round(distance, 3),
+                'metrics': {
+                    feature: None if np.isnan(value) else round(float(value), 2)
+                    for feature, value in zip(FEATURES, index.raw[row])
+                },
+            })
+        return age, comps
+
+    def vector_for_player(self, player_id, age=None):
+        """Stored raw vector of a MetricsHistory player, at ``age`` or their oldest indexed age"""
+        indexes = self.ages
+        ages = [a for a, index in indexes.items() if player_id in index.row_of]
+        if not ages:
+            return None, None
+        age = age if age in ages else max(ages)
+        index = indexes[age]
+        return age, index.raw[index.row_of[player_id]]
+
+
+index = SimilarityIndex()
+
+
+def vector_for_user(user):
+    """
+    Raw feature vector for a site user from their latest PlayerMetric of each
+    type plus profile height/weight; returns (age, vector) or (None, None).
+    """
+    raw = np.full(len(FEATURES), np.nan)
+    age = None
+    seen = set()
+    for metric in PlayerMetric.objects.filter(user=user).order_by('-dateCaptured', '-created_at'):
+        if metric.metricType in seen:
+            continue
+        seen.add(metric.metricType)
+        column = METRIC_TYPE_COLUMNS.get(metric.metricType)
+        if column in FEATURES:
+            raw[FEATURES.index(column)] = float(metric.metric)
+            age = max(age or 0, int(metric.playerAge))
+    profile = getattr(user, 'player_profile', None)
+    if profile is not None:
+        if profile.height_inches:
+            raw[FEATURES.index('height')] = profile.height_inches
+        if profile.weight_lbs:
+            raw[FEATURES.index('weight')] = profile.weight_lbs
+    if age is None or np.isnan(raw).all():
+        return None, None
+    return age, raw
@@ -0,0 +1,304 @@
+"""
+Columnar snapshots of MetricsHistory for analytics.
+
+Each calendar month of ``event_date`` is written to its own partition
+directory (``year=2024/month=06/``) holding one ``.npy`` file per column plus
+a ``.mask.npy`` null mask for nullable columns. The files are loaded with
+``mmap_mode='r'``, so analytics read them without copying and without
+touching the OLTP database.
+
+Snapshots are incremental: the manifest records the highest ``updated_at``
+seen, and a later run only rebuilds months that have rows updated since then
+or whose row count no longer matches (which catches deletes).
+
+A partition path is a symlink to a versioned directory (``month=06.v<ns>``).
+A rebuild, full or incremental, writes a new version and swaps the link with
+one rename, so readers see either the old or the new partition and never a
+missing one. The replaced version is deleted only at the following swap, so
+a reader that resolved the old link can keep reading it meanwhile.
+"""
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import MetricsHistory
+
+MANIFEST = 'manifest.json'
+
+# column -> numpy dtype. Nullable columns get a companion boolean mask.
+COLUMNS = {
+    'id': 'int64',
+    'player_id': 'int64',
+    'event_id': 'int64',
+    'event_date': 'datetime64[s]',
+    'gradYear': 'int32',
+    'playerage': 'int16',
+    'height': 'float32',
+    'weight': 'float32',
+    'ifVelo': 'float32',
+    'ofVelo': 'float32',
+    'cVelo': 'float32',
+    'exitVelo': 'float32',
+    'maxFB': 'float32',
+    'popTime': 'float32',
+    'sixtyyard': 'float32',
+    'changeUp': 'float32',
+    'curve': 'float32',
+    'slider': 'float32',
+}
+NULLABLE = {
+    'gradYear', 'height', 'weight', 'ifVelo', 'ofVelo', 'cVelo', 'exitVelo',
+    'maxFB', 'popTime', 'sixtyyard', 'changeUp', 'curve', 'slider',
+}
+
+
+def snapshot_dir(directory=None):
+    return str(directory or getattr(settings, 'ANALYTICS_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'snapshots')))
+
+
+def partition_key(month):
+    return f'{month.year:04d}-{month.month:02d}'
+
+
+def partition_path(directory, key):
+    year, month = key.split('-')
+    return os.path.join(directory, 'metrics_history', f'year={year}', f'month={month}')
+
+
+def read_manifest(directory=None):
+    path = os.path.join(snapshot_dir(directory), MANIFEST)
+    if not os.path.exists(path):
+        return {'watermark': None, 'partitions': {}}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def _write_json_atomic(path, data):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _to_utc_naive(value):
+    if timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _month_bounds(key):
+    year, month = (int(part) for part in key.split('-'))
+    start = datetime(year, month, 1)
+    end = datetime(year + (month == 12), month % 12 + 1, 1)
+    if settings.USE_TZ:
+        start, end = timezone.make_aware(start, dt_timezone.utc), timezone.make_aware(end, dt_timezone.utc)
+    return start, end
+
+
+def write_partition(directory, key, chunk_size=5000):
+    """Rebuild one month partition from the database; returns its row count"""
+    start, end = _month_bounds(key)
+    names = list(COLUMNS)
+    rows = list(
+        MetricsHistory.objects.filter(event_date__gte=start, event_date__lt=end)
+        .order_by('pk').values_list(*names).iterator(chunk_size=chunk_size)
+    )
+
+    final = partition_path(directory, key)
+    staging = f'{final}.v{time.time_ns()}'
+    os.makedirs(staging)
+
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    for name, values in zip(names, columns):
+        dtype = COLUMNS[name]
+        if name == 'event_date':
+            array = np.array([_to_utc_naive(v) for v in values], dtype=dtype)
+        elif name in NULLABLE:
+            mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+            array = np.fromiter((0 if v is None else float(v) for v in values), dtype=dtype, count=len(values))
+            np.save(os.path.join(staging, f'{name}.mask.npy'), mask)
+        else:
+            array = np.fromiter(values, dtype=dtype, count=len(values))
+        np.save(os.path.join(staging, f'{name}.npy'), array)
+
+    _swap_in(staging, final)
+    return len(rows)
+
+
+def _versions(final):
+    parent, name = os.path.split(final)
+    if not os.path.isdir(parent):
+        return []
+    return [os.path.join(parent, entry) for entry in os.listdir(parent) if entry.startswith(f'{name}.v')]
+
+
+def _prune_versions(final, keep):
+    for version in _versions(final):
+        if version not in keep:
+            shutil.rmtree(version, ignore_errors=True)
+
+
+def _swap_in(staging, final):
+    """
+    Point the ``final`` symlink at ``staging`` in one rename. The version it
+    replaces is kept until the next swap, so a reader that resolved the old
+    link can finish with it; anything older is deleted.
+    """
+    previous = None
+    if os.path.islink(final):
+        previous = os.path.join(os.path.dirname(final), os.readlink(final))
+    elif os.path.isdir(final):
+        # A plain directory from a snapshot written before partitions were versioned
+        previous = f'{final}.v0'
+        os.replace(final, previous)
+    link = f'{final}.link'
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(staging), link)
+    os.replace(link, final)
+    _prune_versions(final, {staging, previous})
+
+
+def remove_partition(path):
+    """
+    Unlink a partition. Its last version stays for readers still using it
+    and is deleted by the next build_snapshot(); older versions go now.
+    """
+    current = None
+    if os.path.islink(path):
+        current = os.path.join(os.path.dirname(path), os.readlink(path))
+        os.remove(path)
+    elif os.path.isdir(path):
+        current = f'{path}.v0'
+        os.replace(path, current)
+    _prune_versions(path, {current})
+
+
+def _partition_entries(directory):
+    """(year directory, entry name) for everything under the partition tree"""
+    root = os.path.join(directory, 'metrics_history')
+    if not os.path.isdir(root):
+        return []
+    return [
+        (os.path.join(root, year), entry)
+        for year in sorted(os.listdir(root)) if os.path.isdir(os.path.join(root, year))
+        for entry in sorted(os.listdir(os.path.join(root, year)))
+    ]
+
+
+def _keys_on_disk(directory):
+    """Keys of the partitions linked on disk, whether or not the manifest lists them"""
+    return {
+        f'{os.path.basename(parent).removeprefix("year=")}-{entry.removeprefix("month=")}'
+        for parent, entry in _partition_entries(directory)
+        if '.' not in entry
+    }
+
+
+def _sweep_unlinked(directory):
+    """Delete the versions left behind by partitions removed in an earlier build"""
+    for parent, entry in _partition_entries(directory):
+        if '.v' in entry and not os.path.lexists(os.path.join(parent, entry.split('.v')[0])):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def build_snapshot(directory=None, full=False):
+    """
+    Bring the snapshot up to date. Returns a dict with the rebuilt and
+    removed partition keys and the new watermark.
+    """
+    directory = snapshot_dir(directory)
+    os.makedirs(directory, exist_ok=True)
+    _sweep_unlinked(directory)
+    manifest = read_manifest(directory)
+
+    db_counts = {
+        partition_key(row['month']): row['rows']
+        for row in MetricsHistory.objects.order_by().annotate(month=TruncMonth('event_date', tzinfo=dt_timezone.utc))
+        .values('month').annotate(rows=Count('id'))
+    }
+    new_watermark = MetricsHistory.objects.aggregate(latest=Max('updated_at'))['latest']
+
+    stale = {key for key, rows in db_counts.items() if manifest['partitions'].get(key, {}).get('rows') != rows}
+    if manifest['watermark']:
+        changed = (
+            MetricsHistory.objects.filter(updated_at__gt=datetime.fromisoformat(manifest['watermark']))
+            .order_by().annotate(month=TruncMonth('event_date', tzinfo=dt_timezone.utc)).values_list('month', flat=True).distinct()
+        )
+        stale.update(partition_key(month) for month in changed)
+    if full:
+        # Every partition is rewritten and swapped in like an incremental
+        # rebuild, so readers never see the tree half gone.
+        stale = set(db_counts)
+
+    for key in sorted(stale):
+        rows = write_partition(directory, key)
+        manifest['partitions'][key] = {'rows': rows, 'built_at': timezone.now().isoformat()}
+
+    listed = set(manifest['partitions']) | (_keys_on_disk(directory) if full else set())
+    removed = sorted(listed - set(db_counts))
+    for key in removed:
+        remove_partition(partition_path(directory, key))
+        manifest['partitions'].pop(key, None)
+
+    manifest['watermark'] = new_watermark.isoformat() if new_watermark else None
+    manifest['columns'] = COLUMNS
+    _write_json_atomic(os.path.join(directory, MANIFEST), manifest)
+    return {'rebuilt': sorted(stale), 'removed': removed, 'watermark': manifest['watermark']}
+
+
+class Partition:
+    """Memory-mapped columns of one month partition"""
+
+    def __init__(self, path, key):
+        # Resolve the link once so every column comes from the same version.
+        self.path = os.path.realpath(path)
+        self.key = key
+
+    def column(self, name):
+        """Return (values, null_mask) as read-only memmaps; mask is None for non-null columns"""
+        values = np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+        mask = None
+        if name in NULLABLE:
+            mask = np.load(os.path.join(self.path, f'{name}.mask.npy'), mmap_mode='r')
+        return values, mask
+
+
+def partitions(directory=None, since=None, until=None):
+    """Yield Partition objects in date order, optionally limited to 'YYYY-MM' bounds"""
+    directory = snapshot_dir(directory)
+    for key in sorted(read_manifest(directory)['partitions']):
+        if (since and key < since) or (until and key > until):
+            continue
+        yield Partition(partition_path(directory, key), key)
+
+
+def load_columns(names, directory=None, since=None, until=None):
+    """
+    Return {name: (values, null_mask)} across all selected partitions.
+
+    A single partition is returned as its memmap without copying; several are
+    concatenated once into contiguous arrays.
+    """
+    parts = [partition.column for partition in partitions(directory, since, until)]
+    result = {}
+    for name in names:
+        pieces = [column(name) for column in parts]
+        if len(pieces) == 1:
+            result[name] = pieces[0]
+            continue
+        dtype = COLUMNS[name]
+        values = np.concatenate([p[0] for p in pieces]) if pieces else np.empty(0, dtype=dtype)
+        mask = None
+        if name in NULLABLE:
+            mask = np.concatenate([p[1] for p in pieces]) if pieces else np.empty(0, dtype=bool)
+        result[name] = (values, mask)
+    return result
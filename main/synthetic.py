@@ -0,0 +1,260 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+Distributions are per-age normals roughly fitted to merge.csv, so ranges,
+percentiles and queries behave like they do on real combine data. Rows are
+produced lazily in batches so multi-million row runs keep memory flat.
+"""
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .ages import age_for
+from .validation import SENTINEL_ZERO_COLUMNS
+from .models import MetricsHistory, PlayerMetric, PlayerPosition, PlayerProfile, User
+
+# Same header as merge.csv, in the same order.
+CSV_COLUMNS = [
+    'id', 'height', 'weight', 'ifVelo', 'ofVelo', 'cVelo', 'popTime', 'exitVelo',
+    'sixtyyard', 'maxFB', 'changeUp', 'curve', 'event_id', 'player_id', 'slider',
+    'players.gradYear', 'events.date',
+]
+
+SYNTHETIC_USERNAME_PREFIX = 'synth_'
+
+# metric -> (mean at age 12, change per year, standard deviation, decimals)
+AGE_CURVES = {
+    'height': (60.0, 2.0, 2.8, 0),
+    'weight': (105.0, 12.0, 18.0, 0),
+    'exitVelo': (60.0, 4.0, 6.5, 0),
+    'ifVelo': (54.0, 3.2, 6.0, 0),
+    'ofVelo': (56.0, 3.5, 6.5, 0),
+    'cVelo': (53.0, 3.2, 6.0, 0),
+    'maxFB': (58.0, 3.3, 6.0, 0),
+    'sixtyyard': (8.6, -0.17, 0.45, 2),
+    'popTime': (2.65, -0.08, 0.18, 2),
+}
+
+# Offsets of secondary pitches from the fastball, with their own spread.
+PITCH_OFFSETS = {'changeUp': (-9.0, 3.0), 'curve': (-12.0, 3.0), 'slider': (-9.0, 3.0)}
+
+# PlayerMetric.metricType -> MetricsHistory column driving its distribution.
+METRIC_TYPE_CURVES = {
+    '60': 'sixtyyard',
+    'fbvelo': 'maxFB',
+    'exitvelo': 'exitVelo',
+    'ofvelo': 'ofVelo',
+    'ifvelo': 'ifVelo',
+}
+
+POSITION_WEIGHTS = [('P', 30), ('C', 12), ('1B', 8), ('2B', 10), ('3B', 10), ('SS', 12), ('OF', 28)]
+TEAMS = [f'{city} {mascot}' for city in ('Dallas', 'Tampa', 'Phoenix', 'Atlanta', 'San Diego', 'Houston', 'Orlando', 'Nashville')
+         for mascot in ('Tigers', 'Scorpions', 'Knights', 'Stars', 'Prospects')]
+SCHOOLS = [f'{name} High School' for name in ('Lincoln', 'Jefferson', 'Roosevelt', 'Washington', 'Kennedy', 'Madison',
+                                                 'Central', 'North', 'South', 'West', 'East', 'Valley')]
+CITIES = [('Dallas', 'TX'), ('Houston', 'TX'), ('Tampa', 'FL'), ('Orlando', 'FL'), ('Phoenix', 'AZ'),
+          ('Atlanta', 'GA'), ('San Diego', 'CA'), ('Nashville', 'TN'), ('Charlotte', 'NC'), ('Denver', 'CO')]
+CAPTURED_BY = [choice for choice, _ in PlayerMetric.CAPTURED_BY_CHOICES]
+
+
+class PlayerTemplate:
+    """Stable per-player traits so repeated measurements form a plausible series"""
+
+    def __init__(self, rng, player_id, grad_year):
+        self.player_id = player_id
+        self.grad_year = grad_year
+        positions = [p for p, _ in POSITION_WEIGHTS]
+        weights = [w for _, w in POSITION_WEIGHTS]
+        self.positions = sorted(set(rng.choices(positions, weights, k=rng.choice((1, 1, 2, 3)))))
+        self.is_pitcher = 'P' in self.positions
+        self.is_catcher = 'C' in self.positions
+        # Talent offset in standard deviations, shared by all metrics.
+        self.talent = rng.gauss(0, 0.8)
+
+    def measure(self, rng, column, age):
+        mean, per_year, sd, decimals = AGE_CURVES[column]
+        direction = -1 if per_year < 0 else 1
+        value = rng.gauss(mean + per_year * (age - 12) + direction * self.talent * sd, sd * 0.6)
+        return round(value, decimals) if decimals else int(round(value))
+
+
+HISTORY_START = date(2018, 1, 1)
+HISTORY_END = date(2025, 12, 31)
+
+
+@lru_cache(maxsize=65536)
+def history_player(seed, player_id, player_count):
+    """
+    Traits of a MetricsHistory player, derived from its id alone so no
+    per-player state has to be kept. Ids are spread over the history window in
+    order, which keeps ages consistent across a player's events.
+    """
+    rng = random.Random(f'{seed}-{player_id}')
+    span_days = (HISTORY_END - HISTORY_START).days
+    debut = HISTORY_START + timedelta(days=span_days * player_id // player_count)
+    return PlayerTemplate(rng, player_id, debut.year + rng.randint(1, 5))
+
+
+def history_rows(count, seed=0, players_per_event=60, start_id=1):
+    """
+    Yield ``count`` MetricsHistory rows as merge.csv-style dicts.
+
+    Events are spread evenly over HISTORY_START..HISTORY_END and each draws
+    its players from a window of ids active around that date. Unmeasured
+    values are written as 0, like the vendor exports.
+    """
+    rng = random.Random(seed)
+    player_count = max(1, count // 3)
+    event_count = -(-count // players_per_event)
+    span_days = (HISTORY_END - HISTORY_START).days
+    window = max(players_per_event * 5, player_count // 50)
+    emitted = 0
+    for event_index in range(event_count):
+        event_day = HISTORY_START + timedelta(days=span_days * event_index // event_count)
+        center = player_count * event_index // event_count
+        for _ in range(min(players_per_event, count - emitted)):
+            player_id = min(player_count, max(1, center + rng.randint(-window, window)))
+            player = history_player(seed, player_id, player_count)
+            age = age_for(player.grad_year, event_day)
+            row = dict.fromkeys(CSV_COLUMNS, 0)
+            row.update({
+                'id': start_id + emitted,
+                'height': player.measure(rng, 'height', age),
+                'weight': player.measure(rng, 'weight', age),
+                'exitVelo': player.measure(rng, 'exitVelo', age),
+                'sixtyyard': player.measure(rng, 'sixtyyard', age) if rng.random() < 0.85 else 0,
+                'event_id': event_index + 1,
+                'player_id': player_id,
+                'slider': '',
+                'players.gradYear': player.grad_year,
+                'events.date': f'{event_day.month}/{event_day.day}/{event_day.year} 0:00',
+            })
+            if not player.is_pitcher or rng.random() < 0.5:
+                column = 'ofVelo' if 'OF' in player.positions else 'ifVelo'
+                row[column] = player.measure(rng, column, age)
+            if player.is_catcher:
+                row['cVelo'] = player.measure(rng, 'cVelo', age)
+                row['popTime'] = player.measure(rng, 'popTime', age)
+            if player.is_pitcher:
+                fastball = player.measure(rng, 'maxFB', age)
+                row['maxFB'] = fastball
+                for pitch, (offset, sd) in PITCH_OFFSETS.items():
+                    if rng.random() < (0.1 if pitch == 'slider' else 0.85):
+                        row[pitch] = int(round(fastball + rng.gauss(offset, sd)))
+            emitted += 1
+            yield row
+
+
+def history_instance(row):
+    """
+    Build an unsaved MetricsHistory from a history_rows() dict. Unmeasured
+    values (the exports' 0s) become NULL, as validation.null_sentinel_zeros
+    makes them for imported rows.
+    """
+    month, day, year = (int(part) for part in row['events.date'].split(' ')[0].split('/'))
+    event_date = timezone.make_aware(datetime(year, month, day))
+    age = age_for(row['players.gradYear'], event_date.date())
+    measured = {name: row[name] or None for name in SENTINEL_ZERO_COLUMNS}
+    for name in ('popTime', 'sixtyyard'):
+        if measured[name] is not None:
+            measured[name] = Decimal(str(measured[name]))
+    return MetricsHistory(
+        **measured, event_id=row['event_id'], player_id=row['player_id'],
+        gradYear=row['players.gradYear'], event_date=event_date, playerage=age,
+    )
+
+
+def create_history(count, seed=0, batch_size=5000):
+    """Bulk insert ``count`` synthetic MetricsHistory rows; returns rows written"""
+    written = 0
+    batch = []
+    for row in history_rows(count, seed=seed):
+        batch.append(history_instance(row))
+        if len(batch) >= batch_size:
+            MetricsHistory.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        MetricsHistory.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def next_player_number():
+    """One past the highest synthetic username suffix, so deleted users never cause a collision"""
+    last = (User.objects.filter(username__regex=rf'^{SYNTHETIC_USERNAME_PREFIX}[0-9]+$')
+            .order_by(Length('username').desc(), '-username').values_list('username', flat=True).first())
+    return int(last[len(SYNTHETIC_USERNAME_PREFIX):]) + 1 if last else 0
+
+
+def create_players(count, metrics_per_user=6, seed=0, batch_size=2000):
+    """
+    Bulk insert ``count`` synthetic users with a PlayerProfile and a
+    PlayerMetric series each. Returns (users, metrics) written.
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    start = next_player_number()
+    users_written = 0
+    metrics_written = 0
+    today = date.today()
+    for offset in range(0, count, batch_size):
+        size = min(batch_size, count - offset)
+        templates = []
+        users = []
+        for i in range(start + offset, start + offset + size):
+            grad_year = rng.randint(2025, 2031)
+            templates.append(PlayerTemplate(rng, i, grad_year))
+            users.append(User(
+                username=f'{SYNTHETIC_USERNAME_PREFIX}{i:08d}',
+                email=f'{SYNTHETIC_USERNAME_PREFIX}{i:08d}@example.com',
+                first_name=f'Player{i}', last_name=rng.choice(('Smith', 'Johnson', 'Garcia', 'Brown', 'Davis', 'Lopez')),
+                password=password,
+            ))
+        with transaction.atomic():
+            # bulk_create skips post_save, so profiles are created here as well.
+            User.objects.bulk_create(users)
+            users = User.objects.filter(username__in=[u.username for u in users]).order_by('username')
+            profiles = []
+            metrics = []
+            for user, template in zip(users, templates):
+                city, state = rng.choice(CITIES)
+                age_now = age_for(template.grad_year, today)
+                profiles.append(PlayerProfile(
+                    user=user, team=rng.choice(TEAMS),
+                    school=rng.choice(SCHOOLS), city=city, state=state, graduation_year=template.grad_year,
+                    height_inches=template.measure(rng, 'height', age_now),
+                    weight_lbs=template.measure(rng, 'weight', age_now),
+                    throws=rng.choice('RRRL'), hits=rng.choice('RRLS'),
+                ))
+                profiles[-1].update_search_fields(positions=template.positions)
+                for _ in range(metrics_per_user):
+                    captured = today - timedelta(days=rng.randint(0, 3 * 365))
+                    metric_type = rng.choice(list(METRIC_TYPE_CURVES))
+                    age = age_for(template.grad_year, captured)
+                    metrics.append(PlayerMetric(
+                        metricType=metric_type,
+                        metric=Decimal(str(template.measure(rng, METRIC_TYPE_CURVES[metric_type], age))),
+                        playerAge=age, gradClass=min(template.grad_year, 2031), user=user,
+                        dateCaptured=captured, capturedBy=rng.choice(CAPTURED_BY),
+                    ))
+            PlayerProfile.objects.bulk_create(profiles)
+            PlayerPosition.objects.bulk_create([
+                PlayerPosition(profile=profile, position_id=code)
+                for profile, template in zip(profiles, templates) for code in template.positions
+            ])
+            PlayerMetric.objects.bulk_create(metrics)
+        users_written += size
+        metrics_written += len(metrics)
+    return users_written, metrics_written
+
+
+def delete_synthetic_players():
+    """Remove users created by create_players() (cascades to profiles and metrics)"""
+    return User.objects.filter(username__startswith=SYNTHETIC_USERNAME_PREFIX).delete()
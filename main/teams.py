@@ -0,0 +1,128 @@
+"""
+Team and school roster dashboards.
+
+A roster is every PlayerProfile whose ``team`` (or ``school``) equals the
+name exactly. roster() builds the whole dashboard in a fixed number of
+queries, however many players there are: the profiles with their users, their
+positions, and each player's latest PlayerMetric per type picked with a
+ROW_NUMBER() window. Percentiles come from evaluation.evaluate_batch() over the
+cached MetricsRange tables, so ranges cost no queries at all.
+
+The rendered roster table is cached per team under a version read from the
+database: the roster's player and metric counts, its newest profile update
+and its newest metric. Any worker's change to a rostered profile or metric,
+a player joining or leaving, or a deleted metric moves the version, so every
+worker sees it on its next request without a shared cache. A player who
+changes team moves both rosters' versions: the new team gains a player and
+the old one loses one.
+"""
+import hashlib
+
+from django.db.models import Count, F, Max, Window
+from django.db.models.functions import RowNumber
+from django.template.loader import render_to_string
+
+from . import evaluation, metrics
+from .models import PlayerMetric, PlayerProfile
+
+CACHE_TIMEOUT = 10 * 60
+METRIC_TYPES = [code for code, _ in PlayerMetric.METRIC_TYPE_CHOICES]
+
+
+def cache_key(field, name, using=None):
+    """The roster's cache key, versioned by roster_version()"""
+    # Team names are free text, so hash them into a memcached-safe key.
+    return f'roster:{field}:{hashlib.md5(name.encode()).hexdigest()}:{roster_version(field, name, using=using)}'
+
+
+def roster_version(field, name, using=None):
+    """A string that changes whenever the roster's rendered table could, in one aggregate query"""
+    profiles = PlayerProfile.objects.filter(**{field: name})
+    if using:
+        profiles = profiles.using(using)
+    version = profiles.aggregate(
+        players=Count('pk', distinct=True),
+        updated=Max('updated_at'),
+        metrics=Count('user__playermetric', distinct=True),
+        latest=Max('user__playermetric__pk'),
+    )
+    updated = version['updated'].timestamp() if version['updated'] else 0
+    return f'{version["players"]}.{updated}.{version["metrics"]}.{version["latest"] or 0}'
+
+
+def latest_metrics(user_ids, using=None):
+    """Each user's latest PlayerMetric per type, in one query"""
+    ranked = PlayerMetric.objects.filter(user_id__in=user_ids).annotate(
+        row=Window(
+            RowNumber(),
+            partition_by=[F('user_id'), F('metricType')],
+            order_by=[F('dateCaptured').desc(nulls_last=True), F('created_at').desc()],
+        )
+    )
+    if using:
+        ranked = ranked.using(using)
+    return ranked.filter(row=1)
+
+
+def roster(field, name, using=None):
+    """dashboard() for everyone whose ``field`` is ``name``, or None when nobody is"""
+    profiles = PlayerProfile.objects.filter(**{field: name})
+    if using:
+        profiles = profiles.using(using)
+    return dashboard(profiles)
+
+
+def dashboard(profiles):
+    """
+    Dashboard data for a PlayerProfile queryset in sort_name order:
+    {'rows': [{'profile', 'cells'}], 'averages'}, where cells and averages
+    follow METRIC_TYPES and each cell is the player's latest metric of that
+    type or None. Returns None for an empty queryset.
+    """
+    using = profiles.db
+    profiles = list(profiles.select_related('user').prefetch_related('positions').order_by('sort_name', 'pk'))
+    if not profiles:
+        return None
+
+    latest = list(latest_metrics([profile.user_id for profile in profiles], using=using))
+    scores = evaluation.evaluate_batch(
+        [metric.metricType for metric in latest],
+        [metric.playerAge for metric in latest],
+        [metric.metric for metric in latest],
+    )
+    cells = {}
+    for metric, score in zip(latest, scores):
+        cells[metric.user_id, metric.metricType] = {
+            'value': metric.metric,
+            'date_captured': metric.dateCaptured,
+            'age': metric.playerAge,
+            'percentile': score['percentile'],
+        }
+
+    averages = []
+    for metric_type in METRIC_TYPES:
+        values = [float(metric.metric) for metric in latest if metric.metricType == metric_type]
+        averages.append(round(sum(values) / len(values), 2) if values else None)
+
+    rows = [
+        {'profile': profile, 'cells': [cells.get((profile.user_id, metric_type)) for metric_type in METRIC_TYPES]}
+        for profile in profiles
+    ]
+    return {'rows': rows, 'averages': averages}
+
+
+def render_dashboard(data):
+    """The roster table's HTML for dashboard() data"""
+    return render_to_string('main/team_roster.html', {
+        'rows': data['rows'],
+        'averages': data['averages'],
+        'metric_types': PlayerMetric.METRIC_TYPE_CHOICES,
+    })
+
+
+def render_roster(field, name, using=None):
+    """The roster table's HTML from the per-team cache, or None for an empty roster"""
+    def build():
+        data = roster(field, name, using=using)
+        return None if data is None else render_dashboard(data)
+    return metrics.cache_get_or_set('roster', cache_key(field, name, using=using), build, timeout=CACHE_TIMEOUT)
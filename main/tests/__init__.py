@@ -0,0 +1,14 @@
+import logging
+
+from django.test import override_settings
+
+# Templates use {% static %}, which the manifest storage resolves only after
+# collectstatic; view tests render against the plain storage instead.
+plain_static = override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+# PerformanceMiddleware logs a JSON line per request; keep test output quiet.
+# assertLogs() still sees the lines, since it resets the level while it runs.
+logging.getLogger('main.performance').setLevel(logging.WARNING)
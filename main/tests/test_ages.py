@@ -0,0 +1,22 @@
+from datetime import date, datetime, timezone
+
+from django.test import SimpleTestCase
+
+from main.ages import age_for, history_age
+
+
+class AgeForTests(SimpleTestCase):
+    def test_class_moves_up_in_july(self):
+        self.assertEqual(age_for(2026, date(2026, 6, 30)), 17)
+        self.assertEqual(age_for(2026, date(2026, 7, 1)), 18)
+        self.assertEqual(age_for(2028, datetime(2026, 8, 15, tzinfo=timezone.utc)), 16)
+
+    def test_ages_are_clamped_to_the_range_span(self):
+        self.assertEqual(age_for(2040, date(2026, 8, 1)), 12)
+        self.assertEqual(age_for(2010, date(2026, 8, 1)), 20)
+
+    def test_history_age_prefers_the_stored_age(self):
+        event = datetime(2026, 8, 1, tzinfo=timezone.utc)
+        self.assertEqual(history_age(15, 2026, event), 15)
+        self.assertEqual(history_age(0, 2026, event), 18)
+        self.assertIsNone(history_age(0, None, event))
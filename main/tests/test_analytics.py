@@ -0,0 +1,47 @@
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.test import TestCase
+
+from main import analytics, events, observations, snapshots
+from main.models import EventSummary, MetricsHistory
+
+# Above 2**24, where float32 stops representing every integer
+PLAYER_ID = 123456789
+EVENT_ID = 987654321
+
+
+class MetricsFrameIdTests(TestCase):
+    def setUp(self):
+        MetricsHistory.objects.create(
+            player_id=PLAYER_ID, event_id=EVENT_ID, event_date=datetime(2024, 6, 1, tzinfo=timezone.utc),
+            gradYear=2026, playerage=16, exitVelo=88,
+        )
+
+    def assertExactIds(self, frame):
+        self.assertEqual(frame.values['player_id'].tolist(), [PLAYER_ID])
+        self.assertEqual(frame.values['event_id'].tolist(), [EVENT_ID])
+
+    def test_from_database_keeps_large_ids(self):
+        self.assertExactIds(analytics.MetricsFrame.from_database())
+
+    def test_from_snapshot_keeps_large_ids(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        snapshots.build_snapshot(directory)
+        self.assertExactIds(analytics.MetricsFrame.from_snapshot(directory))
+
+    def test_observation_frame_keeps_large_ids(self):
+        observations.sync_history()
+        frame = observations.to_frame()
+        self.assertEqual(set(frame.values['player_id'].tolist()), {PLAYER_ID})
+
+    def test_leaderboard_and_event_summary_report_exact_ids(self):
+        frame = analytics.MetricsFrame.from_database()
+        top = analytics.leaderboard('exitVelo', frame=frame)[0]
+        self.assertEqual((top['player_id'], top['event_id']), (PLAYER_ID, EVENT_ID))
+
+        events.refresh([EVENT_ID])
+        summary = EventSummary.objects.get(event_id=EVENT_ID)
+        self.assertEqual(summary.top['exitVelo'][0]['player_id'], PLAYER_ID)
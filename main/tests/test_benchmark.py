@@ -0,0 +1,21 @@
+from django.test import TestCase
+
+from main.management.commands.benchmark import Command
+from main.models import EventSummary, ImportJob, ImportReject, MetricsHistory, Observation
+
+
+class TimeImportTests(TestCase):
+    def test_each_timed_import_writes_rows_and_leaves_nothing_behind(self):
+        command = Command()
+        first, second = command.time_import(50, seed=0), command.time_import(50, seed=0)
+
+        # The second import of the same file is timed too, not skipped as a duplicate.
+        self.assertLess(first['errors'], 50)
+        self.assertEqual(second['errors'], first['errors'])
+        self.assertGreater(second['rows_per_sec'], 0)
+
+        self.assertFalse(MetricsHistory.objects.exists())
+        self.assertFalse(ImportJob.objects.exists())
+        self.assertFalse(ImportReject.objects.exists())
+        self.assertFalse(EventSummary.objects.exists())
+        self.assertFalse(Observation.objects.exists())
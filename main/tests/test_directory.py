@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from main import directory
+from main.models import PlayerProfile
+from main.tests import plain_static
+
+PROFILES = directory.PAGE_SIZE + 5
+
+
+@plain_static
+class DirectorySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(PROFILES):
+            user = User.objects.create_user(
+                f'player{index:02d}', first_name='Sam', last_name='Smith' if index % 2 else 'Jones',
+            )
+            profile = user.player_profile
+            profile.team = 'Dallas Tigers' if index % 3 == 0 else 'Tampa Knights'
+            profile.state = 'TX' if index % 3 == 0 else 'FL'
+            profile.graduation_year = 2026
+            profile.save()
+
+    def all_pages(self, limit=5, **filters):
+        seen, cursor = [], None
+        while True:
+            profiles, cursor = directory.search(after=cursor, limit=limit, **filters)
+            seen += [profile.user.username for profile in profiles]
+            if cursor is None:
+                return seen
+
+    def test_pages_cover_every_profile_once_in_directory_order(self):
+        expected = list(PlayerProfile.objects.order_by('sort_name', 'pk').values_list('user__username', flat=True))
+        self.assertEqual(self.all_pages(), expected)
+        self.assertEqual(len(expected), PROFILES)
+
+    def test_last_full_page_has_no_next_cursor(self):
+        profiles, cursor = directory.search(limit=PROFILES)
+        self.assertEqual(len(profiles), PROFILES)
+        self.assertIsNone(cursor)
+
+    def test_query_matches_word_prefixes_across_fields(self):
+        texan_smiths = set(
+            PlayerProfile.objects.filter(state='TX', user__last_name='Smith').values_list('user__username', flat=True)
+        )
+        self.assertEqual(set(self.all_pages(query='smi tig')), texan_smiths)
+        self.assertEqual(set(self.all_pages(query='smi texas')), texan_smiths)
+
+    def test_index_path_pages_the_same_as_the_probe(self):
+        probed = self.all_pages(query='smith', limit=3)
+        with mock.patch.object(directory, 'PROBE_ROWS', 2):
+            self.assertEqual(self.all_pages(query='smith', limit=3), probed)
+
+    def test_filters_and_cursor_combine(self):
+        florida = self.all_pages(limit=4, state='FL')
+        self.assertEqual(len(florida), PlayerProfile.objects.filter(state='FL').count())
+
+    def test_malformed_cursor_restarts_at_the_first_page(self):
+        first, _ = directory.search(limit=5)
+        again, _ = directory.search(limit=5, after='not-a-cursor')
+        self.assertEqual(first, again)
+
+    def test_directory_view_links_the_next_page(self):
+        response = self.client.get(reverse('player_directory'))
+        self.assertEqual(response.status_code, 200)
+        _, cursor = directory.search()
+        self.assertIsNotNone(cursor)
+        self.assertContains(response, f'after={cursor}')
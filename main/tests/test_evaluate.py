@@ -0,0 +1,86 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import AnonymousMetricRollup, PlayerMetric
+from main.tests import plain_static
+from main.views import EVALUATION_SALT, sign_evaluation, unsign_evaluation
+
+VALID = {'metricType': 'fbvelo', 'metric': '84.50', 'playerAge': 16}
+
+
+@plain_static
+class AnonymousEvaluationTests(TestCase):
+    def test_anonymous_submit_redirects_to_a_signed_url_without_saving(self):
+        response = self.client.post(reverse('evaluate'), VALID)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(PlayerMetric.objects.exists())
+
+        results = self.client.get(response['Location'])
+        self.assertEqual(results.status_code, 200)
+        self.assertContains(results, 'Fastball Velocity (mph) Comparison (Age 16)')
+
+    def test_invalid_submit_re_renders_the_form(self):
+        response = self.client.post(reverse('evaluate'), {**VALID, 'playerAge': 40})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PlayerMetric.objects.exists())
+
+    def test_signed_token_round_trips(self):
+        metric = unsign_evaluation(sign_evaluation(PlayerMetric(metricType='60', metric=Decimal('6.85'), playerAge=17)))
+        self.assertEqual((metric.metricType, metric.metric, metric.playerAge), ('60', Decimal('6.85'), 17))
+        self.assertIsNone(metric.pk)
+
+    def test_tampered_token_is_not_found(self):
+        token = sign_evaluation(PlayerMetric(**VALID))
+        response = self.client.get(reverse('shared_results', kwargs={'token': token[:-2] + 'xx'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_validly_signed_but_invalid_payload_is_not_found(self):
+        token = signing.dumps({'t': 'fbvelo', 'v': '84.5', 'a': 40}, salt=EVALUATION_SALT, compress=True)
+        response = self.client.get(reverse('shared_results', kwargs={'token': token}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_shared_results_are_publicly_cacheable(self):
+        token = sign_evaluation(PlayerMetric(**VALID))
+        response = self.client.get(reverse('shared_results', kwargs={'token': token}))
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_signed_in_submit_saves_the_metric(self):
+        user = User.objects.create_user('player')
+        self.client.force_login(user)
+        response = self.client.post(reverse('evaluate'), VALID)
+        metric = PlayerMetric.objects.get(user=user)
+        self.assertRedirects(response, reverse('results', kwargs={'metric_id': metric.pk}))
+
+
+class CompactAnonymousMetricsTests(TestCase):
+    def make_metric(self, days_old, user=None, value='80'):
+        metric = PlayerMetric.objects.create(metricType='fbvelo', metric=Decimal(value), playerAge=16, user=user)
+        PlayerMetric.objects.filter(pk=metric.pk).update(created_at=timezone.now() - timedelta(days=days_old))
+        return metric
+
+    def test_old_anonymous_rows_are_rolled_up_and_deleted(self):
+        self.make_metric(400, value='80')
+        self.make_metric(400, value='90')
+        recent = self.make_metric(1)
+        owned = self.make_metric(400, user=User.objects.create_user('keeper'))
+
+        call_command('compact_anonymous_metrics', '--days', '30', '--chunk-size', '1', stdout=StringIO())
+
+        self.assertEqual(set(PlayerMetric.objects.values_list('pk', flat=True)), {recent.pk, owned.pk})
+        rollup = AnonymousMetricRollup.objects.get()
+        self.assertEqual((rollup.count, rollup.minimum, rollup.maximum), (2, Decimal('80'), Decimal('90')))
+        self.assertEqual(rollup.average, Decimal('85'))
+
+    def test_dry_run_changes_nothing(self):
+        self.make_metric(400)
+        call_command('compact_anonymous_metrics', '--days', '30', '--dry-run', stdout=StringIO())
+        self.assertEqual(PlayerMetric.objects.count(), 1)
+        self.assertFalse(AnonymousMetricRollup.objects.exists())
@@ -0,0 +1,79 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from main import evaluation
+from main.models import MetricsRange
+
+
+class BatchEvaluationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fastball = MetricsRange.objects.create(
+            metricType='fbvelo', playerAge=16, Min=Decimal('70'), Avg=Decimal('80'), Max=Decimal('90'),
+            quantiles=np.linspace(70, 90, evaluation.QUANTILE_POINTS).tolist(),
+        )
+        # Entered by hand, so no quantile table: the linear min/max scale applies.
+        MetricsRange.objects.create(metricType='60', playerAge=16, Min=Decimal('6.5'), Avg=Decimal('7.5'), Max=Decimal('8.5'))
+
+    def test_percentiles_ranks_and_missing_ranges(self):
+        results = evaluation.evaluate_batch(['fbvelo', 'fbvelo', '60', 'fbvelo'], [16, 16, 16, 12], [80, 88, 7.0, 80])
+        self.assertEqual([r['percentile'] for r in results], [50, 90, 75, None])
+        self.assertEqual([r['rank'] for r in results], [2, 1, 1, None])
+        self.assertEqual((results[0]['min'], results[0]['avg'], results[0]['max']), (70.0, 80.0, 90.0))
+        self.assertFalse(results[3]['has_data'])
+
+    def test_bad_input_raises(self):
+        with self.assertRaises(ValueError):
+            evaluation.evaluate_batch(['curveball'], [16], [70])
+        with self.assertRaises(ValueError):
+            evaluation.evaluate_batch(['fbvelo'], [16], [70, 80])
+        with self.assertRaises(ValueError):
+            evaluation.evaluate_batch(['fbvelo'], [16], [float('nan')])
+
+    def test_saved_and_deleted_ranges_change_the_cache_key(self):
+        self.assertEqual(evaluation.evaluate_batch(['fbvelo'], [16], [95])[0]['max'], 90.0)
+        self.fastball.Max = Decimal('99')
+        self.fastball.save()
+        self.assertEqual(evaluation.evaluate_batch(['fbvelo'], [16], [95])[0]['max'], 99.0)
+        self.fastball.delete()
+        self.assertFalse(evaluation.evaluate_batch(['fbvelo'], [16], [95])[0]['has_data'])
+
+    def test_compute_metric_ranges_bumps_the_version(self):
+        before = evaluation.cache_key()
+        MetricsRange.objects.bulk_create(
+            [MetricsRange(metricType='fbvelo', playerAge=16, Min=Decimal('60'), Avg=Decimal('75'), Max=Decimal('92'))],
+            update_conflicts=True,
+            unique_fields=['metricType', 'playerAge'],
+            update_fields=['Min', 'Max', 'Avg', 'quantiles', 'updated'],
+        )
+        self.assertNotEqual(evaluation.cache_key(), before)
+
+
+class BatchEvaluationViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        MetricsRange.objects.create(metricType='fbvelo', playerAge=16, Min=Decimal('70'), Avg=Decimal('80'), Max=Decimal('90'))
+
+    def post(self, body):
+        return self.client.post(reverse('evaluate_batch'), json.dumps(body), content_type='application/json')
+
+    def test_accepts_objects_and_arrays(self):
+        response = self.post({'items': [{'metricType': 'fbvelo', 'age': 16, 'value': 85}, ['fbvelo', 16, 75]]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['percentile'] for r in response.json()['results']], [75, 25])
+
+    def test_rejects_malformed_requests(self):
+        self.assertEqual(self.client.post(reverse('evaluate_batch'), 'nope', content_type='application/json').status_code, 400)
+        self.assertEqual(self.post({'items': [{'metricType': 'fbvelo', 'age': 16}]}).status_code, 400)
+        self.assertEqual(self.post({'items': [['curveball', 16, 70]]}).status_code, 400)
+        with mock.patch.object(evaluation, 'MAX_BATCH', 1):
+            self.assertEqual(self.post({'items': [['fbvelo', 16, 70]] * 2}).status_code, 400)
+
+    def test_get_is_not_allowed(self):
+        self.assertEqual(self.client.get(reverse('evaluate_batch')).status_code, 405)
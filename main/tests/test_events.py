@@ -0,0 +1,83 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from main import events
+from main.models import EventSummary, MetricsHistory
+
+
+def record(event_id, player_id, **values):
+    return MetricsHistory.objects.create(
+        player_id=player_id, event_id=event_id, event_date=datetime(2024, 6, 1, tzinfo=timezone.utc),
+        gradYear=2026, playerage=16, **values,
+    )
+
+
+class EventSummaryTests(TestCase):
+    def setUp(self):
+        # Player 1 tested twice at event 1; the better run counts once.
+        record(1, 1, exitVelo=80, sixtyyard=7.4)
+        record(1, 1, exitVelo=92, sixtyyard=6.9)
+        record(1, 2, exitVelo=88, sixtyyard=7.1)
+        record(1, 3, exitVelo=85, sixtyyard=7.6)
+        record(2, 1, exitVelo=70)
+
+    def summary(self, event_id=1):
+        return EventSummary.objects.get(event_id=event_id)
+
+    def test_participants_count_distinct_players(self):
+        self.assertEqual(events.refresh([1, 2]), 2)
+        self.assertEqual((self.summary().participants, self.summary().rows), (3, 4))
+        self.assertEqual((self.summary(2).participants, self.summary(2).rows), (1, 1))
+
+    def test_top_lists_keep_each_players_best_in_metric_order(self):
+        events.refresh([1])
+        top = self.summary().top
+
+        self.assertEqual([(p['player_id'], p['value']) for p in top['exitVelo']], [(1, 92.0), (2, 88.0), (3, 85.0)])
+        # Lower is better for the 60 yard dash.
+        self.assertEqual([(p['player_id'], p['value']) for p in top['sixtyyard']], [(1, 6.9), (2, 7.1), (3, 7.6)])
+        self.assertEqual(top['exitVelo'][0]['gradYear'], 2026)
+        self.assertNotIn('height', top)
+
+    def test_top_lists_stop_at_top_n(self):
+        with mock.patch.object(events, 'TOP_N', 2):
+            events.refresh([1])
+        top = self.summary().top
+        self.assertEqual([p['player_id'] for p in top['exitVelo']], [1, 2])
+        self.assertEqual([p['player_id'] for p in top['sixtyyard']], [1, 2])
+
+    def test_refresh_deletes_summaries_of_events_without_rows(self):
+        events.refresh([1, 2])
+        MetricsHistory.objects.filter(event_id=2).delete()
+
+        self.assertEqual(events.refresh([1, 2]), 1)
+        self.assertEqual(list(EventSummary.objects.values_list('event_id', flat=True)), [1])
+
+
+class ImportRefreshTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as csvfile:
+            csvfile.write('player_id,event_id,events.date,players.gradYear,exitVelo\n')
+            csvfile.write('1,10,06/01/2024,2026,81\n2,11,06/02/2024,2026,84\n')
+        self.addCleanup(os.remove, self.path)
+
+    def test_import_refreshes_only_the_events_it_wrote(self):
+        # No rows back this summary, so a refresh of every event would delete it.
+        untouched = EventSummary.objects.create(
+            event_id=5, event_date=datetime(2023, 6, 1, tzinfo=timezone.utc), participants=42,
+        )
+
+        with mock.patch.object(events, 'refresh', wraps=events.refresh) as refresh:
+            call_command('import_csv_data', '--file', self.path, stdout=StringIO())
+
+        self.assertEqual(set(refresh.call_args.args[0]), {10, 11})
+        self.assertEqual(sorted(EventSummary.objects.values_list('event_id', flat=True)), [5, 10, 11])
+        self.assertEqual(EventSummary.objects.get(pk=untouched.pk).participants, 42)
+        self.assertEqual(EventSummary.objects.get(event_id=10).top['exitVelo'][0]['value'], 81.0)
@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from main import identity
+from main.models import MetricsHistory, PlayerIdentityLink, PlayerMetric
+
+
+def features(*rows):
+    """Feature dict from rows of {feature: value}; missing features are NaN"""
+    return {
+        feature: np.array([row.get(feature, np.nan) for row in rows], dtype=np.float64)
+        for feature, _, _ in identity.FEATURES
+    }
+
+
+TALL = {'height': 74, 'weight': 190, 'maxFB': 88}
+SHORT = {'height': 68, 'weight': 155, 'maxFB': 78}
+MIDDLE = {'height': 71, 'weight': 172, 'maxFB': 83}
+
+
+class CandidateTests(SimpleTestCase):
+    def pairs(self, profile, player, **kwargs):
+        rows, columns, scores, margins = identity.candidates(profile, player, **kwargs)
+        return sorted(zip(rows.tolist(), columns.tolist()))
+
+    def test_mutual_best_matches_are_proposed(self):
+        profile, player = features(TALL, SHORT), features(SHORT, MIDDLE, TALL)
+
+        rows, columns, scores, margins = identity.candidates(profile, player)
+
+        self.assertEqual(sorted(zip(rows.tolist(), columns.tolist())), [(0, 2), (1, 0)])
+        np.testing.assert_allclose(scores, 1.0, rtol=1e-6)
+        self.assertTrue((margins >= identity.MIN_MARGIN).all())
+
+    def test_identical_profiles_give_no_proposal(self):
+        self.assertEqual(self.pairs(features(TALL, TALL, SHORT), features(TALL, SHORT)), [(2, 1)])
+
+    def test_chunks_smaller_than_the_profiles_keep_the_running_best_and_runner_up(self):
+        # The duplicate of TALL lands in a later chunk than the first one.
+        profile = features(TALL, SHORT, MIDDLE, TALL, dict(SHORT, weight=150))
+        player = features(MIDDLE, TALL, SHORT)
+
+        unchunked = identity.candidates(profile, player)
+        for chunk_size in (1, 2, 3):
+            chunked = identity.candidates(profile, player, chunk_size=chunk_size)
+            for expected, actual in zip(unchunked, chunked):
+                np.testing.assert_array_equal(actual, expected)
+        self.assertEqual(self.pairs(profile, player, chunk_size=2), [(1, 2), (2, 0)])
+
+    def test_agreeing_on_height_and_weight_alone_stays_under_min_score(self):
+        body = {'height': 72, 'weight': 180}
+        profile, player = features(body), features(body)
+
+        self.assertAlmostEqual(float(identity.score(profile, player)[0, 0]), 4 / identity.MIN_EVIDENCE, places=6)
+        self.assertEqual(self.pairs(profile, player), [])
+        self.assertFalse(identity.scorable(player)[0])
+        self.assertTrue(identity.scorable(features(TALL))[0])
+
+
+class MatchBlockTests(TestCase):
+    def setUp(self):
+        self.profiles = {}
+        for player_id, (username, values) in enumerate((('tall', TALL), ('short', SHORT)), start=1):
+            MetricsHistory.objects.create(
+                player_id=player_id, event_id=1, event_date=datetime(2024, 6, 1, tzinfo=timezone.utc),
+                gradYear=2026, playerage=16, height=values['height'], weight=values['weight'], maxFB=values['maxFB'],
+            )
+            user = User.objects.create_user(username)
+            profile = user.player_profile
+            profile.graduation_year = 2026
+            profile.height_inches, profile.weight_lbs = values['height'], values['weight']
+            profile.save()
+            PlayerMetric.objects.create(user=user, metricType='fbvelo', metric=Decimal(values['maxFB']), playerAge=16)
+            self.profiles[player_id] = profile
+
+    def links(self):
+        return sorted(PlayerIdentityLink.objects.values_list('player_id', 'profile_id', 'status'))
+
+    def test_proposes_pending_links_with_evidence(self):
+        self.assertEqual(identity.match_block(2026), 2)
+        self.assertEqual(self.links(), [
+            (1, self.profiles[1].pk, PlayerIdentityLink.PENDING), (2, self.profiles[2].pk, PlayerIdentityLink.PENDING),
+        ])
+        link = PlayerIdentityLink.objects.get(player_id=1)
+        self.assertEqual(link.evidence['maxFB'], [88.0, 88.0])
+        self.assertEqual(identity.match_block(2027), 0)
+
+    def test_rerun_keeps_reviewed_status_and_replaces_pending_links(self):
+        identity.match_block(2026)
+        PlayerIdentityLink.objects.filter(player_id=1).update(status=PlayerIdentityLink.REJECTED, score=0)
+        PlayerIdentityLink.objects.create(player_id=9, profile=self.profiles[2], score=0.9)
+
+        identity.match_block(2026)
+
+        self.assertEqual(self.links(), [
+            (1, self.profiles[1].pk, PlayerIdentityLink.REJECTED), (2, self.profiles[2].pk, PlayerIdentityLink.PENDING),
+        ])
+        self.assertGreater(PlayerIdentityLink.objects.get(player_id=1).score, identity.MIN_SCORE)
+
+    def test_confirm_keeps_one_confirmed_link_per_player(self):
+        strong = PlayerIdentityLink.objects.create(player_id=1, profile=self.profiles[1], score=0.95)
+        weak = PlayerIdentityLink.objects.create(player_id=1, profile=self.profiles[2], score=0.9)
+        other = PlayerIdentityLink.objects.create(player_id=2, profile=self.profiles[2], score=0.92)
+        reviewer = User.objects.create_user('staff', is_staff=True)
+
+        self.assertEqual(identity.confirm(PlayerIdentityLink.objects.filter(pk__in=[strong.pk, weak.pk]), reviewer), 1)
+
+        statuses = dict(PlayerIdentityLink.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            strong.pk: PlayerIdentityLink.CONFIRMED, weak.pk: PlayerIdentityLink.REJECTED,
+            other.pk: PlayerIdentityLink.PENDING,
+        })
+        self.assertEqual(PlayerIdentityLink.objects.get(pk=weak.pk).reviewed_by, reviewer)
+        # Already resolved: confirming the rejected link again changes nothing.
+        self.assertEqual(identity.confirm(PlayerIdentityLink.objects.filter(pk=weak.pk)), 0)
+        self.assertEqual(PlayerIdentityLink.objects.filter(player_id=1, status=PlayerIdentityLink.CONFIRMED).count(), 1)
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from main import importers
+from main.models import ImportJob, MetricsHistory
+
+HEADER = 'player_id,event_id,events.date,players.gradYear,exitVelo,sixtyyard,popTime'
+ROWS = [f'{player},10,06/01/2024,2026,{80 + player},7.1,0' for player in range(1, 6)]
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as csvfile:
+            csvfile.write('\n'.join([HEADER] + ROWS) + '\n')
+        self.addCleanup(os.remove, self.path)
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_csv_data', '--file', self.path, '--batch-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def fail_second_chunk(self):
+        build_objects = importers.build_objects
+        calls = []
+
+        def flaky(chunk):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            return build_objects(chunk)
+        return mock.patch('main.importers.build_objects', side_effect=flaky)
+
+    def player_ids(self):
+        return sorted(MetricsHistory.objects.values_list('player_id', flat=True))
+
+    def test_completed_file_is_skipped(self):
+        self.run_import()
+        job = ImportJob.objects.get()
+        self.assertEqual((job.status, job.imported, job.chunks, job.line), (ImportJob.COMPLETED, 5, 3, 6))
+
+        self.assertIn('Skipping', self.run_import())
+        self.assertEqual(self.player_ids(), [1, 2, 3, 4, 5])
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+    def test_force_and_clear_import_again(self):
+        self.run_import()
+        self.run_import('--force')
+        self.assertEqual(len(self.player_ids()), 10)
+        self.run_import('--clear')
+        self.assertEqual(self.player_ids(), [1, 2, 3, 4, 5])
+
+    def test_failed_import_resumes_after_its_last_committed_chunk(self):
+        with self.fail_second_chunk():
+            self.assertIn('Rerun with --resume', self.run_import())
+        job = ImportJob.objects.get()
+        self.assertEqual((job.status, job.line, job.imported, job.failed), (ImportJob.FAILED, 3, 2, 2))
+        self.assertEqual(job.errors[0]['lines'], [4, 5])
+        self.assertEqual(self.player_ids(), [1, 2])
+
+        # A plain rerun must not import the first chunk a second time.
+        self.assertIn('--resume to continue', self.run_import())
+        self.assertEqual(self.player_ids(), [1, 2])
+
+        self.assertIn(f'Resuming job {job.pk} after line 3', self.run_import('--resume'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.imported, job.line), (ImportJob.COMPLETED, 5, 6))
+        self.assertEqual(self.player_ids(), [1, 2, 3, 4, 5])
+
+    def test_resume_refuses_to_clear(self):
+        with self.fail_second_chunk():
+            self.run_import()
+        self.assertIn('cannot be combined', self.run_import('--resume', '--clear'))
+        self.assertEqual(self.player_ids(), [1, 2])
+        self.assertEqual(ImportJob.objects.get().status, ImportJob.FAILED)
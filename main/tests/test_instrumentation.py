@@ -0,0 +1,63 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from main.instrumentation import LatencyHistogram, registry
+from main.tests import plain_static
+
+
+@plain_static
+@override_settings(PERFORMANCE_INSTRUMENTATION=True)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.staff = User.objects.create_user('ops', is_staff=True)
+
+    def test_server_timing_header_reports_queries_and_templates(self):
+        self.client.force_login(self.staff)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('evaluate'))
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'tpl', 'total'})
+        self.assertIn('desc="2 queries"', timing['db'])
+        self.assertGreater(float(timing['tpl'].split('=')[1]), 0)
+
+    def test_each_request_is_logged_and_recorded_per_view(self):
+        with self.assertLogs('main.performance', 'INFO') as logs:
+            self.client.get(reverse('evaluate'))
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line['view'], line['method'], line['status']), ('evaluate', 'GET', 200))
+        self.assertEqual(registry.snapshot()['evaluate']['count'], 1)
+
+    def test_perf_summary_is_staff_only(self):
+        self.client.get(reverse('evaluate'))
+        self.assertEqual(self.client.get(reverse('performance_stats')).status_code, 302)
+
+        self.client.force_login(self.staff)
+        views = self.client.get(reverse('performance_stats')).json()['views']
+        self.assertEqual(views['evaluate']['count'], 1)
+        self.client.get(reverse('performance_stats'), {'reset': '1'})
+        self.assertNotIn('evaluate', registry.snapshot())
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION=False)
+    def test_switched_off(self):
+        response = self.client.get(reverse('evaluate'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(registry.snapshot(), {})
+
+
+class LatencyHistogramTests(SimpleTestCase):
+    def test_percentiles_interpolate_within_buckets(self):
+        histogram = LatencyHistogram(buckets=(10, 20))
+        for value in (2, 4, 6, 8, 15, 30):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [4, 1, 1])
+        self.assertEqual(histogram.percentile(50), 7.5)
+        self.assertEqual(histogram.percentile(100), 30)
+        self.assertEqual(histogram.summary()['max_ms'], 30)
+
+    def test_empty(self):
+        self.assertIsNone(LatencyHistogram().percentile(50))
@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+class MetricsEndpointTests(TestCase):
+    def test_anonymous_requests_are_refused(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_staff_can_read_metrics(self):
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+    def test_route_has_trailing_slash(self):
+        self.assertEqual(reverse('metrics'), '/metrics/')
@@ -0,0 +1,148 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from main import observations
+from main.models import MetricsHistory, MetricsRange, Observation, PlayerMetric
+from main.tests import plain_static
+
+
+def history(player_id, **values):
+    return MetricsHistory.objects.create(
+        player_id=player_id, event_id=1, event_date=datetime(2024, 6, 1, tzinfo=timezone.utc),
+        gradYear=2026, **values,
+    )
+
+
+def stored(source=None):
+    rows = Observation.objects.order_by('source', 'source_id', 'metric')
+    if source:
+        rows = rows.filter(source=source)
+    return list(rows.values_list('source_id', 'entity', 'metric', 'value', 'age'))
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('player')
+
+    def test_sync_history_writes_one_row_per_measured_column(self):
+        # No playerage: the age is derived from the grad year (class of 2026 in June 2024 is 15).
+        row = history(7, exitVelo=88, sixtyyard=Decimal('7.1'), popTime=0)
+
+        self.assertEqual(observations.sync_history(), 2)
+
+        self.assertEqual(stored(Observation.HISTORY), [
+            (row.pk, 7, 'exitVelo', Decimal('88.00'), 15), (row.pk, 7, 'sixtyyard', Decimal('7.10'), 15),
+        ])
+
+    def test_sync_history_replaces_a_rows_observations(self):
+        row = history(7, exitVelo=88, maxFB=80)
+        observations.sync_history()
+        MetricsHistory.objects.filter(pk=row.pk).update(exitVelo=90, maxFB=None)
+
+        observations.sync_history(MetricsHistory.objects.filter(pk=row.pk))
+
+        self.assertEqual(stored(Observation.HISTORY), [(row.pk, 7, 'exitVelo', Decimal('90.00'), 15)])
+
+    def test_sync_player_metrics_maps_codes_and_skips_metrics_without_a_user(self):
+        owned = PlayerMetric.objects.create(user=self.user, metricType='fbvelo', metric=Decimal('84'), playerAge=15)
+        PlayerMetric.objects.create(metricType='fbvelo', metric=Decimal('90'), playerAge=15)
+        Observation.objects.all().delete()
+
+        self.assertEqual(observations.sync_player_metrics(), 1)
+
+        self.assertEqual(stored(), [(owned.pk, self.user.pk, 'maxFB', Decimal('84.00'), 15)])
+
+    def test_saving_a_player_metric_resyncs_its_observation(self):
+        metric = PlayerMetric.objects.create(user=self.user, metricType='60', metric=Decimal('7.3'), playerAge=16)
+        self.assertEqual(stored(), [(metric.pk, self.user.pk, 'sixtyyard', Decimal('7.30'), 16)])
+
+        metric.metric = '7.10'
+        metric.save()
+        self.assertEqual(stored(), [(metric.pk, self.user.pk, 'sixtyyard', Decimal('7.10'), 16)])
+
+        metric.metric = 0
+        metric.save()
+        self.assertEqual(stored(), [])
+
+    def test_prune_drops_observations_of_deleted_sources(self):
+        kept, gone = history(1, exitVelo=80), history(2, exitVelo=85)
+        metric = PlayerMetric.objects.create(user=self.user, metricType='exitvelo', metric=Decimal('82'), playerAge=16)
+        observations.sync_history()
+        MetricsHistory.objects.filter(pk=gone.pk).delete()
+        # A bulk delete sends no signal, so the observation outlives its metric.
+        PlayerMetric.objects.filter(pk=metric.pk).delete()
+
+        self.assertEqual(observations.prune(), 2)
+
+        self.assertEqual([row[0] for row in stored()], [kept.pk])
+
+    def test_to_frame_marks_only_each_rows_metric_valid(self):
+        history(123456789, exitVelo=88, sixtyyard=Decimal('7.1'), playerage=17)
+        observations.sync_history()
+
+        frame = observations.to_frame()
+
+        self.assertEqual(frame.size, 2)
+        self.assertEqual(frame.values['player_id'].tolist(), [123456789, 123456789])
+        self.assertEqual(frame.values['playerage'].tolist(), [17, 17])
+        self.assertEqual(sorted(frame.values['exitVelo'][frame.valid['exitVelo']].tolist()), [88.0])
+        self.assertEqual(int(frame.valid['exitVelo'].sum() + frame.valid['sixtyyard'].sum()), 2)
+        self.assertEqual(frame.event_date[0].astype('datetime64[D]').item(), date(2024, 6, 1))
+        self.assertEqual(observations.to_frame(Observation.objects.none()).size, 0)
+
+
+class QueryTests(TestCase):
+    def setUp(self):
+        for player_id, (exit_velo, sixty) in enumerate(((80, '7.4'), (85, '7.0'), (90, '6.8'), (95, '7.2')), start=1):
+            history(player_id, exitVelo=exit_velo, sixtyyard=Decimal(sixty), playerage=16)
+        history(9, exitVelo=99, playerage=17)
+        observations.sync_history()
+
+    def test_distribution_and_percentile_per_metric_and_age(self):
+        stats = observations.distribution('exitvelo', 16, value=85)
+        self.assertEqual((stats['count'], stats['min'], stats['max'], stats['avg']),
+                         (4, Decimal('80'), Decimal('95'), Decimal('87.5')))
+        self.assertEqual(stats['percentile'], 50)
+        self.assertNotIn('percentile', observations.distribution('exitVelo', 16))
+        self.assertIsNone(observations.distribution('exitVelo', 18))
+        # Lower is better for the 60: beating three of four runs is the 75th.
+        self.assertEqual(observations.percentile('60', 16, Decimal('6.9')), 75)
+        self.assertIsNone(observations.percentile('60', 17, 7))
+
+    def test_leaders_are_best_first(self):
+        self.assertEqual([o.entity for o in observations.leaders('exitVelo', limit=2)], [9, 4])
+        self.assertEqual([o.entity for o in observations.leaders('60', age=16, limit=2)], [3, 2])
+
+
+@plain_static
+class ComparisonTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('player')
+        for player_id, value in enumerate((80, 84, 88, 92), start=1):
+            history(player_id, maxFB=value, playerage=16)
+        observations.sync_history()
+
+    def test_results_read_the_range_and_percentile_from_observations(self):
+        MetricsRange.objects.create(metricType='fbvelo', playerAge=16, Min=Decimal('60'), Avg=Decimal('70'), Max=Decimal('99'))
+        metric = PlayerMetric.objects.create(user=self.user, metricType='fbvelo', metric=Decimal('88'), playerAge=16)
+
+        data = self.client.get(reverse('results', args=[metric.pk])).context['comparison_data']
+
+        # Four history rows plus the metric itself; four of the five are at or below 88.
+        self.assertEqual((data['min_value'], data['max_value'], data['average']),
+                         (Decimal('80'), Decimal('92'), Decimal('86.4')))
+        self.assertEqual(data['percentile'], 80)
+
+    def test_results_fall_back_to_metrics_range_without_observations(self):
+        MetricsRange.objects.create(metricType='exitvelo', playerAge=16, Min=Decimal('70'), Avg=Decimal('80'), Max=Decimal('90'))
+        metric = PlayerMetric.objects.create(metricType='exitvelo', metric=Decimal('85'), playerAge=16)
+
+        data = self.client.get(reverse('results', args=[metric.pk])).context['comparison_data']
+
+        self.assertEqual((data['min_value'], data['max_value'], data['percentile']), (Decimal('70'), Decimal('90'), 75))
+        metric = PlayerMetric.objects.create(metricType='ifvelo', metric=Decimal('85'), playerAge=16)
+        self.assertTrue(self.client.get(reverse('results', args=[metric.pk])).context['comparison_data']['no_data'])
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from main import partitioning
+from main.models import MetricsHistory
+
+
+def on(year, month=6):
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def rows_in(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM {connection.ops.quote_name(table)} ORDER BY id')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def index_names():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s',
+            [partitioning.TABLE, '%_pkey'],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+# DDL is transactional on Postgres, so each test's conversion is rolled back with it.
+@skipUnless(connection.vendor == 'postgresql', 'MetricsHistory partitioning needs PostgreSQL')
+class PartitioningTests(TestCase):
+    def setUp(self):
+        self.rows = [
+            MetricsHistory.objects.create(player_id=1, event_id=1, event_date=on(2023), exitVelo=80),
+            MetricsHistory.objects.create(player_id=2, event_id=2, event_date=on(2024), exitVelo=85),
+        ]
+
+    def convert(self):
+        if not partitioning.is_partitioned():
+            partitioning.convert_table()
+        # A table partitioned while empty by migration 0006 has only the default partition.
+        partitioning.ensure_partitions([2023, 2024])
+
+    def test_convert_table_keeps_rows_ids_and_indexes(self):
+        if partitioning.is_partitioned():
+            self.skipTest('MetricsHistory was partitioned by migration 0006')
+        indexes = index_names()
+
+        partitioning.convert_table(years=[2025])
+
+        self.assertTrue(partitioning.is_partitioned())
+        self.assertEqual(partitioning.existing_years(), {2023, 2024, 2025})
+        self.assertEqual(rows_in(partitioning.partition_name(2023)), [self.rows[0].id])
+        self.assertEqual(rows_in(partitioning.partition_name(2024)), [self.rows[1].id])
+        self.assertEqual(index_names(), indexes)
+        # The new sequence continues after the copied ids.
+        created = MetricsHistory.objects.create(player_id=3, event_id=3, event_date=on(2025))
+        self.assertGreater(created.id, self.rows[1].id)
+        self.assertEqual(MetricsHistory.objects.count(), 3)
+
+    def test_ensure_partitions_moves_rows_out_of_the_default_partition(self):
+        self.convert()
+        stray = MetricsHistory.objects.create(player_id=3, event_id=3, event_date=on(2030))
+        self.assertEqual(rows_in(partitioning.DEFAULT_PARTITION), [stray.id])
+
+        self.assertEqual(partitioning.ensure_partitions([2024, 2030]), [2030])
+
+        self.assertEqual(rows_in(partitioning.DEFAULT_PARTITION), [])
+        self.assertEqual(rows_in(partitioning.partition_name(2030)), [stray.id])
+        self.assertEqual(partitioning.ensure_partitions([2030]), [])
+
+    def test_copy_into_partitions_routes_each_year_and_assigns_ids(self):
+        self.convert()
+        objects = [
+            MetricsHistory(player_id=4, event_id=4, event_date=on(2024, 7), exitVelo=90),
+            MetricsHistory(player_id=5, event_id=5, event_date=on(2031), sixtyyard=7.1),
+        ]
+
+        partitioning.copy_into_partitions(objects)
+
+        self.assertTrue(all(obj.id for obj in objects))
+        self.assertIn(2031, partitioning.existing_years())
+        self.assertEqual(rows_in(partitioning.partition_name(2031)), [objects[1].id])
+        self.assertIn(objects[0].id, rows_in(partitioning.partition_name(2024)))
+        copied = MetricsHistory.objects.get(id=objects[0].id)
+        self.assertEqual(copied.exitVelo, 90)
+        self.assertIsNotNone(copied.updated_at)
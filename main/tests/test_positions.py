@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from main.forms import PlayerProfileForm
+
+BEFORE = [('main', '0007_playerprofile_search')]
+AFTER = [('main', '0008_normalize_positions')]
+
+
+class NormalizePositionsMigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes('main'))
+        apps = self.migrate(BEFORE)
+        User = apps.get_model('auth', 'User')
+        PlayerProfile = apps.get_model('main', 'PlayerProfile')
+        self.texts = {}
+        for username, text in (('ss', ' ss, p ,P,'), ('of', 'OF'), ('dh', 'DH,1b,rover'), ('none', None)):
+            user = User.objects.create(username=username)
+            profile = PlayerProfile.objects.create(user=user, positions=text)
+            self.texts[username] = profile.pk
+
+    def test_forward_normalizes_codes_and_logs_unknown_ones(self):
+        with self.assertLogs('main.migrations', 'WARNING') as logs:
+            apps = self.migrate(AFTER)
+
+        PlayerPosition = apps.get_model('main', 'PlayerPosition')
+        rows = {
+            username: sorted(PlayerPosition.objects.filter(profile_id=pk).values_list('position_id', flat=True))
+            for username, pk in self.texts.items()
+        }
+        self.assertEqual(rows, {'ss': ['P', 'SS'], 'of': ['OF'], 'dh': ['1B'], 'none': []})
+        self.assertIn('Discarded 2 unknown position code(s): DH (1), ROVER (1)', logs.output[0])
+
+    def test_backward_joins_rows_in_position_order(self):
+        with self.assertLogs('main.migrations', 'WARNING'):
+            self.migrate(AFTER)
+        apps = self.migrate(BEFORE)
+
+        PlayerProfile = apps.get_model('main', 'PlayerProfile')
+        texts = dict(PlayerProfile.objects.values_list('user__username', 'positions'))
+        self.assertEqual(texts, {'ss': 'P,SS', 'of': 'OF', 'dh': '1B', 'none': None})
+
+
+class PlayerProfileFormTests(TestCase):
+    def setUp(self):
+        self.profile = User.objects.create_user('player').player_profile
+
+    def form(self, positions):
+        return PlayerProfileForm(
+            {'first_name': 'Sam', 'last_name': 'Jones', 'positions': positions}, instance=self.profile,
+        )
+
+    def test_save_links_positions(self):
+        form = self.form(['SS', 'P'])
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual(self.profile.get_positions_list(), ['P', 'SS'])
+
+    def test_save_without_commit_links_positions_in_save_m2m(self):
+        self.profile.positions.set(['OF'])
+        form = self.form(['C', '1B'])
+        self.assertTrue(form.is_valid(), form.errors)
+
+        profile = form.save(commit=False)
+        self.assertEqual(profile.get_positions_list(), ['OF'])
+        profile.save()
+        form.save_m2m()
+
+        self.assertEqual(profile.get_positions_list(), ['C', '1B'])
+        self.assertEqual(User.objects.get(pk=profile.user_id).first_name, 'Sam')
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from main import projections
+from main.models import GrowthCurve, MetricsHistory
+
+
+class FitGrowthCurvesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Every player gains exactly 10 mph of exit velocity from 15 to 16.
+        for player_id in range(1, 6):
+            for age, exit_velo in ((15, 70 + player_id), (16, 80 + player_id)):
+                MetricsHistory.objects.create(
+                    player_id=player_id, event_id=age, event_date=datetime(2009 + age, 6, 1, tzinfo=timezone.utc),
+                    playerage=age, exitVelo=exit_velo,
+                )
+
+    def fit(self, *args):
+        out = StringIO()
+        call_command('fit_growth_curves', '--source', 'database', '--min-samples', '5', *args, stdout=out)
+        return out.getvalue()
+
+    def test_fits_and_stores_one_curve_per_metric_and_age(self):
+        output = self.fit()
+
+        curve = GrowthCurve.objects.get()
+        self.assertEqual((curve.metricType, curve.fromAge, curve.toAge), ('exitvelo', 15, 16))
+        self.assertEqual((curve.intercept, curve.slope, curve.residualStd, curve.samples), (10.0, 1.0, 0.0, 5))
+        self.assertIn('Fitted 1 growth curves from 10 rows', output)
+
+    def test_dry_run_and_min_samples_save_nothing(self):
+        self.assertIn('exitvelo  15->16', self.fit('--dry-run'))
+        self.assertFalse(GrowthCurve.objects.exists())
+
+        call_command('fit_growth_curves', '--source', 'database', stdout=StringIO())
+        self.assertFalse(GrowthCurve.objects.exists())
+
+    def test_refitting_changes_the_cached_curves(self):
+        GrowthCurve.objects.create(
+            metricType='exitvelo', fromAge=15, toAge=16, intercept=0, slope=1, residualStd=1, samples=30,
+        )
+        self.assertEqual(projections.load_curves()['exitvelo'][15], (0.0, 1.0, 1.0))
+
+        self.fit()
+
+        self.assertEqual(projections.load_curves()['exitvelo'][15], (10.0, 1.0, 0.0))
+        GrowthCurve.objects.all().delete()
+        self.assertEqual(projections.load_curves(), {})
+
+
+class ProjectTests(TestCase):
+    curves = {'exitvelo': {14: (5.0, 1.0, 2.0), 15: (10.0, 1.0, 2.0), 16: (0.0, 1.0, 2.0)}}
+
+    def test_chains_each_year_and_widens_the_band(self):
+        projected = projections.project('exitvelo', 14, 70, curves=self.curves)
+
+        self.assertEqual([p['age'] for p in projected], [15, 16, 17])
+        self.assertEqual([p['value'] for p in projected], [75.0, 85.0, 85.0])
+        self.assertEqual((projected[0]['low'], projected[0]['high']), (73.0, 77.0))
+        spreads = [p['high'] - p['value'] for p in projected]
+        self.assertEqual(spreads, sorted(spreads))
+        self.assertLess(spreads[0], spreads[-1])
+
+    def test_stops_at_missing_coefficients_and_through_age(self):
+        self.assertEqual(projections.project('exitvelo', 13, 70, curves=self.curves), [])
+        self.assertEqual(projections.project('fbvelo', 14, 70, curves=self.curves), [])
+        self.assertEqual(len(projections.project('exitvelo', 14, 70, through_age=16, curves=self.curves)), 2)
+
+    def test_reads_stored_curves_by_default(self):
+        cache.clear()
+        GrowthCurve.objects.create(
+            metricType='fbvelo', fromAge=16, toAge=17, intercept=2, slope=1, residualStd=0, samples=30,
+        )
+        self.assertEqual(projections.project('fbvelo', 16, 80)[0]['value'], 82.0)
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from main import reportcards
+from main.models import PlayerMetric
+from main.tests import plain_static
+
+
+@plain_static
+class RenderReportCardsTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.measured = User.objects.create_user('ace').player_profile
+        PlayerMetric.objects.create(user=self.measured.user, metricType='fbvelo', metric=Decimal('84.5'), playerAge=16)
+        self.unmeasured = User.objects.create_user('rookie').player_profile
+
+    def card_name(self, profile):
+        return reportcards.storage_name(reportcards.content_hash(reportcards.card_inputs(profile)), 'png')
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('render_report_cards', '--format', 'png', *args, stdout=out)
+        return out.getvalue()
+
+    def test_renders_players_with_metrics(self):
+        self.assertIn('Rendered 1 card(s); 0 were up to date', self.run_command())
+        self.assertTrue(default_storage.exists(self.card_name(self.measured)))
+        self.assertFalse(default_storage.exists(self.card_name(self.unmeasured)))
+        self.assertIn('Rendered 0 card(s); 1 were up to date', self.run_command())
+
+    def test_prune_keeps_cards_served_for_players_without_metrics(self):
+        # report_card renders a card for any profile on first request.
+        served, _ = reportcards.store(reportcards.card_inputs(self.unmeasured), 'png')
+        stale = default_storage.save(f'{reportcards.DIRECTORY}/{"0" * 64}.png', ContentFile(b'old'))
+
+        output = self.run_command('--prune')
+
+        self.assertIn('Deleted 1 stale card(s)', output)
+        self.assertTrue(default_storage.exists(served))
+        self.assertTrue(default_storage.exists(self.card_name(self.measured)))
+        self.assertFalse(os.path.exists(default_storage.path(stale)))
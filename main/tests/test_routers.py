@@ -0,0 +1,63 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from main import routers
+
+
+def request_with_session(session=None):
+    request = RequestFactory().get('/')
+    request.session = {} if session is None else session
+    return request
+
+
+@mock.patch('main.routers.replica_configured', return_value=True)
+class ReplicaRoutingTests(SimpleTestCase):
+    router = routers.ReadReplicaRouter()
+
+    def test_reads_use_the_primary_outside_a_replica_scope(self, configured):
+        self.assertEqual(self.router.db_for_read(User), routers.PRIMARY)
+        with routers.replica_reads():
+            self.assertEqual(self.router.db_for_read(User), routers.REPLICA)
+            self.assertEqual(self.router.db_for_write(User), routers.PRIMARY)
+        self.assertEqual(self.router.db_for_read(User), routers.PRIMARY)
+
+    def test_decorated_view_reads_from_the_replica(self, configured):
+        view = routers.use_read_replica(lambda request: routers.read_alias())
+        self.assertEqual(view(request_with_session()), routers.REPLICA)
+
+    def test_pinned_session_reads_from_the_primary(self, configured):
+        view = routers.use_read_replica(lambda request: routers.read_alias())
+        request = request_with_session({routers.SESSION_KEY: time.time() + 60})
+        self.assertEqual(view(request), routers.PRIMARY)
+
+    def test_expired_pin_goes_back_to_the_replica(self, configured):
+        view = routers.use_read_replica(lambda request: routers.read_alias())
+        request = request_with_session({routers.SESSION_KEY: time.time() - 1})
+        self.assertEqual(view(request), routers.REPLICA)
+
+    @override_settings(REPLICA_STICKY_SECONDS=30)
+    def test_a_write_pins_the_session(self, configured):
+        def view(request):
+            self.router.db_for_write(User)
+            return HttpResponse()
+        request = request_with_session()
+        routers.ReplicaStickinessMiddleware(view)(request)
+        self.assertAlmostEqual(request.session[routers.SESSION_KEY], time.time() + 30, delta=5)
+
+    def test_reads_and_session_writes_do_not_pin(self, configured):
+        def view(request):
+            self.router.db_for_read(User)
+            self.router.db_for_write(Session)
+            return HttpResponse()
+        request = request_with_session()
+        routers.ReplicaStickinessMiddleware(view)(request)
+        self.assertNotIn(routers.SESSION_KEY, request.session)
+
+    def test_writes_outside_a_request_are_not_tracked(self, configured):
+        self.router.db_for_write(User)
+        self.assertIsNone(routers._request_writes.get())
@@ -0,0 +1,106 @@
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from main import similarity, snapshots
+from main.models import MetricsHistory
+
+
+class SimilarPlayersViewTests(TransactionTestCase):
+    def setUp(self):
+        for player_id, exit_velo in ((1, 80), (2, 81), (3, 95)):
+            MetricsHistory.objects.create(
+                player_id=player_id, event_id=1, event_date=datetime(2024, 6, 1, tzinfo=timezone.utc),
+                gradYear=2026, playerage=16, exitVelo=exit_velo, sixtyyard=7.2,
+            )
+        self.original = similarity.index
+        similarity.index = similarity.SimilarityIndex()
+        self.addCleanup(setattr, similarity, 'index', self.original)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        snapshot_dir = override_settings(ANALYTICS_SNAPSHOT_DIR=self.directory)
+        snapshot_dir.enable()
+        self.addCleanup(snapshot_dir.disable)
+
+    def test_unbuilt_index_answers_503_and_builds_in_the_background(self):
+        response = self.client.get(reverse('similar_players'), {'player_id': 1})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '10')
+
+        similarity.index.worker.join(timeout=30)
+        self.assertTrue(similarity.index.ready)
+        response = self.client.get(reverse('similar_players'), {'player_id': 1, 'k': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([comp['player_id'] for comp in response.json()['comps']], [2])
+
+    def test_fresh_index_starts_no_worker(self):
+        similarity.index.ensure_fresh()
+        self.client.get(reverse('similar_players'), {'player_id': 1})
+        self.assertIsNone(similarity.index.worker)
+
+
+class SimilarityRefreshTests(TransactionTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        snapshot_dir = override_settings(ANALYTICS_SNAPSHOT_DIR=self.directory)
+        snapshot_dir.enable()
+        self.addCleanup(snapshot_dir.disable)
+        for player_id, exit_velo in ((1, 80), (2, 81), (3, 95)):
+            self.create(player_id, exit_velo)
+        self.index = similarity.SimilarityIndex()
+
+    def create(self, player_id, exit_velo, event_id=1):
+        return MetricsHistory.objects.create(
+            player_id=player_id, event_id=event_id, event_date=datetime(2024, 6, 1, tzinfo=timezone.utc),
+            gradYear=2026, playerage=16, exitVelo=exit_velo, sixtyyard=7.2,
+        )
+
+    def indexed_players(self):
+        return sorted(int(player) for index in self.index.ages.values() for player in index.player_ids)
+
+    def test_new_rows_are_merged_without_a_rebuild(self):
+        self.index.ensure_fresh(force=True)
+        self.create(4, 82)
+        rebuilds = []
+        original = self.index.rebuild
+        self.index.rebuild = lambda *args, **kwargs: rebuilds.append(args) or original(*args, **kwargs)
+
+        self.index.ensure_fresh(force=True)
+
+        self.assertEqual(rebuilds, [])
+        self.assertEqual(self.indexed_players(), [1, 2, 3, 4])
+
+    def test_deleted_rows_replaced_by_as_many_new_ones_trigger_a_rebuild(self):
+        self.index.ensure_fresh(force=True)
+        MetricsHistory.objects.filter(player_id=3).delete()
+        self.create(4, 95, event_id=2)
+
+        self.index.ensure_fresh(force=True)
+
+        self.assertEqual(self.indexed_players(), [1, 2, 4])
+        self.assertEqual(self.index.row_count, 3)
+
+    def test_full_build_reads_the_snapshot_and_catches_up(self):
+        snapshots.build_snapshot()
+        # Only in the snapshot: the live row no longer matches it.
+        MetricsHistory.objects.filter(player_id=2).update(exitVelo=50)
+        self.create(4, 82)
+
+        self.index.ensure_fresh(force=True)
+
+        self.assertEqual(self.indexed_players(), [1, 2, 3, 4])
+        _, raw = self.index.vector_for_player(2)
+        self.assertEqual(raw[similarity.FEATURES.index('exitVelo')], 81)
+        self.assertEqual(self.index.row_count, 4)
+
+    def test_rows_deleted_after_the_snapshot_fall_back_to_the_database(self):
+        snapshots.build_snapshot()
+        MetricsHistory.objects.filter(player_id=3).delete()
+
+        self.index.ensure_fresh(force=True)
+
+        self.assertEqual(self.indexed_players(), [1, 2])
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.test import TestCase
+
+from main import snapshots
+from main.models import MetricsHistory
+
+
+class SnapshotSwapTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.row = MetricsHistory.objects.create(
+            player_id=1, event_id=1, event_date=datetime(2024, 6, 1, tzinfo=timezone.utc), exitVelo=80,
+        )
+
+    def versions(self):
+        parent = os.path.dirname(snapshots.partition_path(self.directory, '2024-06'))
+        return sorted(entry for entry in os.listdir(parent) if '.v' in entry)
+
+    def touch(self, exit_velo):
+        MetricsHistory.objects.filter(pk=self.row.pk).update(exitVelo=exit_velo, updated_at=datetime.now(timezone.utc))
+
+    def test_rebuild_swaps_the_partition_link_and_keeps_the_previous_version(self):
+        snapshots.build_snapshot(self.directory)
+        path = snapshots.partition_path(self.directory, '2024-06')
+        self.assertTrue(os.path.islink(path))
+        reader = snapshots.Partition(path, '2024-06')
+        first = self.versions()
+
+        self.touch(95)
+        self.assertEqual(snapshots.build_snapshot(self.directory)['rebuilt'], ['2024-06'])
+
+        self.assertTrue(os.path.islink(path))
+        self.assertEqual(len(self.versions()), 2)
+        self.assertTrue(set(first) < set(self.versions()))
+        values, _ = snapshots.load_columns(['exitVelo'], self.directory)['exitVelo']
+        self.assertEqual(values.tolist(), [95.0])
+        # A reader that resolved the link before the swap still has its files.
+        self.assertEqual(reader.column('exitVelo')[0].tolist(), [80.0])
+
+        self.touch(99)
+        snapshots.build_snapshot(self.directory)
+        self.assertEqual(len(self.versions()), 2)
+        self.assertNotIn(first[0], self.versions())
+
+    def test_full_rebuild_swaps_instead_of_deleting_first(self):
+        snapshots.build_snapshot(self.directory)
+        path = snapshots.partition_path(self.directory, '2024-06')
+        reader = snapshots.Partition(path, '2024-06')
+        stray = snapshots.partition_path(self.directory, '2023-01')
+        os.makedirs(stray)
+
+        result = snapshots.build_snapshot(self.directory, full=True)
+
+        self.assertEqual(result['rebuilt'], ['2024-06'])
+        self.assertEqual(result['removed'], ['2023-01'])
+        self.assertEqual(len(self.versions()), 2)
+        self.assertEqual(reader.column('exitVelo')[0].tolist(), [80.0])
+        self.assertFalse(os.path.lexists(stray))
+
+    def test_plain_directory_partition_is_replaced(self):
+        path = snapshots.partition_path(self.directory, '2024-06')
+        os.makedirs(path)
+        snapshots.build_snapshot(self.directory, full=False)
+        self.assertTrue(os.path.islink(path))
+        self.assertEqual(len(self.versions()), 2)
+        self.assertIn('month=06.v0', self.versions())
+
+    def test_removed_partition_is_unlinked_then_swept(self):
+        snapshots.build_snapshot(self.directory)
+        reader = snapshots.Partition(snapshots.partition_path(self.directory, '2024-06'), '2024-06')
+        MetricsHistory.objects.all().delete()
+        self.assertEqual(snapshots.build_snapshot(self.directory)['removed'], ['2024-06'])
+        self.assertFalse(os.path.lexists(snapshots.partition_path(self.directory, '2024-06')))
+        self.assertEqual(reader.column('exitVelo')[0].tolist(), [80.0])
+
+        snapshots.build_snapshot(self.directory)
+        self.assertEqual(self.versions(), [])
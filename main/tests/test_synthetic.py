@@ -0,0 +1,24 @@
+from django.test import TestCase
+
+from main import synthetic, validation
+from main.models import MetricsHistory, User
+
+
+class CreatePlayersTests(TestCase):
+    def test_numbering_continues_after_deleted_users(self):
+        synthetic.create_players(3, metrics_per_user=1)
+        User.objects.get(username='synth_00000000').delete()
+        synthetic.create_players(2, metrics_per_user=1)
+        usernames = set(User.objects.filter(username__startswith='synth_').values_list('username', flat=True))
+        self.assertEqual(usernames, {f'synth_{i:08d}' for i in range(1, 5)})
+
+
+class CreateHistoryTests(TestCase):
+    def test_unmeasured_values_are_null_like_imported_rows(self):
+        synthetic.create_history(300, seed=3)
+        rows = MetricsHistory.objects.all()
+        for column in validation.SENTINEL_ZERO_COLUMNS:
+            self.assertFalse(rows.filter(**{column: 0}).exists(), column)
+        # Only pitchers throw a fastball, so some rows have none.
+        self.assertTrue(rows.filter(maxFB__isnull=True).exists())
+        self.assertTrue(rows.filter(maxFB__gt=0).exists())
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from main import teams
+from main.models import PlayerMetric, PlayerProfile
+
+
+class RosterCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.players = []
+        for username in ('ace', 'bench', 'catcher'):
+            profile = User.objects.create_user(username).player_profile
+            profile.team = 'Dallas Tigers'
+            profile.save()
+            self.players.append(profile)
+
+    def render(self, team='Dallas Tigers'):
+        return teams.render_roster('team', team)
+
+    def test_unchanged_roster_is_served_from_the_cache(self):
+        self.render()
+        with self.assertNumQueries(1):
+            self.render()
+
+    def test_player_changing_team_leaves_the_old_roster(self):
+        self.assertIn('catcher', self.render())
+        self.assertIsNone(self.render('Tampa Knights'))
+        # A queryset update fires no signals, as when another worker made the change.
+        PlayerProfile.objects.filter(pk=self.players[2].pk).update(team='Tampa Knights')
+        self.assertNotIn('catcher', self.render())
+        self.assertIn('catcher', self.render('Tampa Knights'))
+
+    def test_new_and_deleted_metrics_show_up(self):
+        self.assertNotIn('84.50', self.render())
+        metric = PlayerMetric.objects.create(
+            user=self.players[0].user, metricType='fbvelo', metric=Decimal('84.50'), playerAge=16,
+        )
+        self.assertIn('84.50', self.render())
+        PlayerMetric.objects.filter(pk=metric.pk).delete()
+        self.assertNotIn('84.50', self.render())
+
+    def test_profile_edits_show_up(self):
+        self.assertNotIn('2027', self.render())
+        self.players[1].graduation_year = 2027
+        self.players[1].save()
+        self.assertIn('2027', self.render())
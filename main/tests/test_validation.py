@@ -0,0 +1,78 @@
+import os
+import tempfile
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from main import validation
+from main.models import ImportReject, MetricsHistory
+
+HEADER = 'player_id,event_id,events.date,players.gradYear,exitVelo,sixtyyard,popTime'
+
+
+def make_chunk(**columns):
+    size = len(next(iter(columns.values())))
+    columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+    return validation.ImportChunk(columns, [{} for _ in range(size)], list(range(2, size + 2)))
+
+
+def reject_high_event_ids(chunk):
+    chunk.reject(chunk.columns['event_id'] > 100, 'event_id too high')
+
+
+class ValidatorTests(SimpleTestCase):
+    def test_missing_identifiers_and_dates_are_rejected(self):
+        chunk = validation.validate(make_chunk(
+            player_id=[1, np.nan, 3], event_id=[1, 1, np.nan], event_date=[0, 0, np.nan],
+        ))
+        self.assertEqual(chunk.accepted.tolist(), [0])
+        self.assertEqual(chunk.reasons, {1: ['missing player_id'], 2: ['missing event_id', 'invalid event date']})
+
+    def test_sentinel_zeros_become_null_rather_than_out_of_bounds(self):
+        chunk = validation.validate(make_chunk(player_id=[1], event_id=[1], exitVelo=[0], sixtyyard=[7.1]))
+        self.assertEqual(chunk.accepted.tolist(), [0])
+        self.assertTrue(np.isnan(chunk.columns['exitVelo'][0]))
+
+    def test_bounds_reject_implausible_values(self):
+        chunk = validation.validate(make_chunk(player_id=[1, 2], event_id=[1, 1], exitVelo=[200, 90]))
+        self.assertEqual(chunk.reasons, {0: ['exitVelo outside 30-125']})
+
+    @override_settings(IMPORT_METRIC_BOUNDS={'exitVelo': (30, 80)})
+    def test_bounds_can_be_overridden(self):
+        chunk = validation.validate(make_chunk(player_id=[1], event_id=[1], exitVelo=[90]))
+        self.assertEqual(chunk.reasons, {0: ['exitVelo outside 30-80']})
+
+    @override_settings(IMPORT_VALIDATORS=['main.tests.test_validation.reject_high_event_ids'])
+    def test_pipeline_comes_from_settings(self):
+        chunk = validation.validate(make_chunk(player_id=[np.nan, 1], event_id=[1, 500]))
+        # require_columns is not in the configured pipeline, so the missing player_id passes.
+        self.assertEqual(chunk.reasons, {1: ['event_id too high']})
+
+
+class ImportQuarantineTests(TestCase):
+    def import_rows(self, *rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as csvfile:
+            csvfile.write('\n'.join((HEADER,) + rows) + '\n')
+        self.addCleanup(os.remove, path)
+        call_command('import_csv_data', '--file', path, stdout=StringIO())
+        return os.path.basename(path)
+
+    def test_rejected_rows_are_quarantined_with_line_and_raw_data(self):
+        source = self.import_rows(
+            '1,10,06/01/2024,2026,90,7.1,0',
+            '2,10,06/01/2024,2026,300,7.2,0',
+            ',10,06/01/2024,2026,85,7.3,0',
+            '4,10,not a date,2026,85,7.3,0',
+        )
+        self.assertEqual(list(MetricsHistory.objects.values_list('player_id', flat=True)), [1])
+        self.assertIsNone(MetricsHistory.objects.get().popTime)
+
+        rejects = {reject.line_number: reject for reject in ImportReject.objects.filter(source=source)}
+        self.assertEqual(sorted(rejects), [3, 4, 5])
+        self.assertEqual(rejects[3].reasons, ['exitVelo outside 30-125'])
+        self.assertEqual(rejects[3].data['exitVelo'], '300')
+        self.assertEqual(rejects[4].reasons, ['missing player_id'])
+        self.assertEqual(rejects[5].reasons, ['invalid event date'])
@@ -0,0 +1,99 @@
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase
+
+from main import watchlists
+from main.models import (
+    Checkpoint, MetricsHistory, PlayerIdentityLink, PlayerMetric, WatchlistEntry, WatchNotification,
+)
+
+EVENT_DATE = datetime(2026, 6, 1, tzinfo=dt_timezone.utc)
+
+
+class WatchlistFanOutTests(TestCase):
+    def setUp(self):
+        self.scout = User.objects.create_user('scout', email='scout@example.com')
+        self.player = User.objects.create_user('ace', first_name='Ace', last_name='Jones')
+        self.other = User.objects.create_user('bench')
+
+    def follow(self, user=None):
+        return WatchlistEntry.objects.create(user=self.scout, profile=(user or self.player).player_profile)
+
+    def metric(self, user=None, value='84.50'):
+        return PlayerMetric.objects.create(
+            user=user or self.player, metricType='fbvelo', metric=Decimal(value), playerAge=16, dateCaptured=date(2026, 6, 1),
+        )
+
+    def history(self, player_id=555, **values):
+        return MetricsHistory.objects.create(
+            player_id=player_id, event_id=77, event_date=EVENT_DATE, playerage=16, **{'maxFB': 88, **values},
+        )
+
+    def link(self, player_id=555, status=PlayerIdentityLink.CONFIRMED):
+        return PlayerIdentityLink.objects.create(player_id=player_id, profile=self.player.player_profile, status=status)
+
+    def test_first_run_starts_after_existing_metrics(self):
+        self.follow()
+        Checkpoint.objects.all().delete()
+        self.metric()
+        self.history()
+        self.link()
+        self.assertEqual(watchlists.fan_out(), 0)
+        self.metric(value='85.00')
+        self.assertEqual(watchlists.fan_out(), 1)
+
+    def test_follow_only_covers_metrics_saved_after_it(self):
+        self.metric()
+        self.follow()
+        later = self.metric(value='86.00')
+        self.assertEqual(watchlists.fan_out(), 1)
+        self.assertEqual(list(WatchNotification.objects.values_list('metric_id', flat=True)), [later.pk])
+
+    def test_bulk_created_metrics_fan_out_once_per_watcher(self):
+        self.follow()
+        WatchlistEntry.objects.create(user=self.other, profile=self.player.player_profile)
+        PlayerMetric.objects.bulk_create([
+            PlayerMetric(user=self.player, metricType='fbvelo', metric=Decimal('80'), playerAge=16),
+            PlayerMetric(user=self.other, metricType='fbvelo', metric=Decimal('70'), playerAge=16),
+        ])
+        self.assertEqual(watchlists.fan_out(batch_size=1), 2)
+        self.assertEqual(watchlists.fan_out(), 0)
+
+    def test_imported_rows_reach_watchers_through_confirmed_links(self):
+        self.follow()
+        self.link()
+        PlayerIdentityLink.objects.create(player_id=556, profile=self.player.player_profile,
+                                          status=PlayerIdentityLink.PENDING)
+        linked = self.history()
+        self.history(player_id=556)
+        self.history(player_id=557)
+        self.assertEqual(watchlists.fan_out(), 1)
+        self.assertEqual(list(WatchNotification.objects.values_list('history_id', flat=True)), [linked.pk])
+
+    def test_digest_covers_metrics_and_imported_rows(self):
+        self.follow()
+        self.link()
+        self.metric()
+        self.history(sixtyyard=Decimal('6.95'))
+        watchlists.fan_out()
+
+        self.assertEqual(watchlists.send_digests(), (1, 2))
+        self.assertEqual(len(mail.outbox), 1)
+        body = mail.outbox[0].body
+        self.assertIn('Ace Jones', body)
+        self.assertIn('Fastball Velocity (mph): 84.50 (age 16, 06/01/2026)', body)
+        self.assertIn('60 Yard Dash (seconds): 6.95 (age 16, 06/01/2026)', body)
+        self.assertFalse(WatchNotification.objects.filter(sent_at=None).exists())
+
+    def test_notifications_for_replaced_rows_are_dropped(self):
+        self.follow()
+        self.link()
+        self.history()
+        watchlists.fan_out()
+        MetricsHistory.objects.all().delete()
+        self.assertEqual(watchlists.send_digests(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(WatchNotification.objects.filter(sent_at=None).exists())
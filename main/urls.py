@@ -5,11 +5,30 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('contact/', views.contact, name='contact'),
     path('evaluate/', views.evaluate, name='evaluate'),
+    path('evaluate/batch/', views.evaluate_batch, name='evaluate_batch'),
     path('results/<int:metric_id>/', views.results, name='results'),
+    path('results/shared/<str:token>/', views.shared_results, name='shared_results'),
     path('history/', views.metrics_history, name='metrics_history'),
+    path('history/export/', views.export_metrics_history, name='export_metrics_history'),
+    path('events/', views.event_list, name='event_list'),
+    path('events/<int:event_id>/', views.event_detail, name='event_detail'),
+    path('events/<int:event_id>.json', views.event_summary_json, name='event_summary_json'),
+    path('metrics/export/', views.export_player_metrics, name='export_player_metrics'),
     path('add/', views.add, name='add'),
     path('profile/', views.profile, name='profile'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
     path('playerevaluation/', views.playerevaluation, name='playerevaluation'),
+    path('players/', views.player_directory, name='player_directory'),
+    path('players/suggest/', views.player_suggest, name='player_suggest'),
+    path('teams/<path:name>/', views.roster_dashboard, name='team_dashboard'),
+    path('schools/<path:name>/', views.roster_dashboard, {'field': 'school'}, name='school_dashboard'),
+    path('watchlist/', views.watchlist, name='watchlist'),
+    path('similar/', views.similar_players, name='similar_players'),
+    path('perf/', views.performance_stats, name='performance_stats'),
+    path('perf/db-pool/', views.db_pool_status, name='db_pool_status'),
+    path('metrics/', views.metrics_endpoint, name='metrics'),
+    path('<str:username>/report-card.png', views.report_card, {'fmt': 'png'}, name='report_card_png'),
+    path('<str:username>/report-card.pdf', views.report_card, {'fmt': 'pdf'}, name='report_card_pdf'),
+    path('<str:username>/watch/', views.toggle_watch, name='toggle_watch'),
     path('<str:username>/', views.profile_by_username, name='profile_by_username'),
 ]
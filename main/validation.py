@@ -0,0 +1,120 @@
+"""
+Data-quality stage for MetricsHistory imports.
+
+The importer parses each chunk of CSV rows into an ImportChunk of float64
+NumPy columns (NaN = null) and runs it through the validators named in
+settings.IMPORT_VALIDATORS. A validator is a callable taking the chunk. It can
+rewrite columns (for example mapping sentinel zeros to null) or call
+``chunk.reject(mask, reason)`` to quarantine rows. Every check is a whole-
+column array operation, so validation costs about the same however many rows
+a chunk holds.
+"""
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# merge.csv writes 0 for "not measured" in every metric column.
+SENTINEL_ZERO_COLUMNS = [
+    'height', 'weight', 'ifVelo', 'ofVelo', 'cVelo', 'exitVelo', 'maxFB',
+    'popTime', 'sixtyyard', 'changeUp', 'curve', 'slider',
+]
+
+REQUIRED_COLUMNS = ['player_id', 'event_id']
+
+# Physically plausible (low, high) per metric for 12-20 year old players.
+# Override or extend with settings.IMPORT_METRIC_BOUNDS.
+DEFAULT_METRIC_BOUNDS = {
+    'height': (48, 90),
+    'weight': (70, 350),
+    'ifVelo': (30, 105),
+    'ofVelo': (30, 110),
+    'cVelo': (30, 100),
+    'exitVelo': (30, 125),
+    'maxFB': (30, 105),
+    'popTime': (1.5, 3.5),
+    'sixtyyard': (5.5, 12.0),
+    'changeUp': (30, 95),
+    'curve': (30, 95),
+    'slider': (30, 100),
+}
+
+DEFAULT_VALIDATORS = [
+    'main.validation.require_columns',
+    'main.validation.null_sentinel_zeros',
+    'main.validation.check_bounds',
+]
+
+
+class ImportChunk:
+    """
+    One chunk of parsed import rows.
+
+    ``columns`` maps field name -> float64 array, NaN where empty or
+    unparseable. ``rows`` keeps the raw CSV dicts for the reject table, and
+    ``line_numbers`` their position in the source file.
+    """
+
+    def __init__(self, columns, rows, line_numbers):
+        self.columns = columns
+        self.rows = rows
+        self.line_numbers = line_numbers
+        self.rejected = np.zeros(len(rows), dtype=bool)
+        self.reasons = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def reject(self, mask, reason):
+        """Quarantine rows where ``mask`` is True, recording ``reason`` for each"""
+        for index in np.flatnonzero(mask):
+            self.reasons.setdefault(int(index), []).append(reason)
+        self.rejected |= mask
+
+    @property
+    def accepted(self):
+        return np.flatnonzero(~self.rejected)
+
+
+def get_validators():
+    return [import_string(path) for path in getattr(settings, 'IMPORT_VALIDATORS', DEFAULT_VALIDATORS)]
+
+
+def get_bounds():
+    bounds = dict(DEFAULT_METRIC_BOUNDS)
+    bounds.update(getattr(settings, 'IMPORT_METRIC_BOUNDS', {}))
+    return bounds
+
+
+def validate(chunk, validators=None):
+    """Run every validator over ``chunk`` in order and return it"""
+    for validator in validators if validators is not None else get_validators():
+        validator(chunk)
+    return chunk
+
+
+def require_columns(chunk):
+    """Reject rows missing an identifier or with an unreadable event date"""
+    for name in REQUIRED_COLUMNS:
+        chunk.reject(np.isnan(chunk.columns[name]), f'missing {name}')
+    if 'event_date' in chunk.columns:
+        chunk.reject(np.isnan(chunk.columns['event_date']), 'invalid event date')
+
+
+def null_sentinel_zeros(chunk):
+    """Treat 0 in metric columns as "not measured" and store NULL instead"""
+    for name in SENTINEL_ZERO_COLUMNS:
+        column = chunk.columns.get(name)
+        if column is not None:
+            column[column == 0] = np.nan
+
+
+def check_bounds(chunk):
+    """Reject rows with a metric outside its plausible range"""
+    for name, (low, high) in get_bounds().items():
+        column = chunk.columns.get(name)
+        if column is None:
+            continue
+        with np.errstate(invalid='ignore'):
+            outside = (column < low) | (column > high)
+        if outside.any():
+            chunk.reject(outside, f'{name} outside {low}-{high}')
@@ -1,19 +1,46 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, Http404
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib import messages
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from django.core import signing
+from django.core.exceptions import ValidationError
 from decimal import Decimal
 from .forms import PlayerMetricForm, CaptureForm, PlayerProfileForm
-from .models import PlayerMetric, MetricsHistory, MetricsRange
+from .models import PlayerMetric, MetricsHistory, MetricsRange, PlayerProfile, WatchlistEntry, EventSummary
+from .instrumentation import registry as performance_registry
+from .routers import read_alias, use_read_replica
+from . import metrics
+from . import exports
+from . import similarity
+from . import projections
+from . import directory
+from . import evaluation
+from . import teams
+from . import reportcards
+from . import events
+from . import identity
+from . import observations
 import json
 import logging
+import os
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+EVALUATION_SALT = 'main.views.evaluation'
+# Shared results move only as new measurements reach the Observation store
+# (or compute_metric_ranges runs), so an hour of staleness is harmless.
+SHARED_RESULTS_MAX_AGE = 60 * 60
+
 # Create your views here.
 
 def index(request):
@@ -35,86 +62,109 @@ def calculate_percentile(min_val, max_val, current_val):
     return int(percentile)
 
 
+def _range_stats(metric_type, age, value):
+    """
+    {'min', 'max', 'avg', 'percentile'} of ``value`` among the observations
+    of its metric type and age, from the MetricsRange row when the
+    Observation store has none; None when neither does.
+    """
+    stats = observations.distribution(metric_type, age, value=value)
+    if stats is not None:
+        return {'min': stats['min'], 'max': stats['max'], 'avg': round(stats['avg'], 2),
+                'percentile': stats['percentile']}
+    metrics_range = MetricsRange.objects.filter(metricType=metric_type, playerAge=age).first()
+    if metrics_range is None:
+        return None
+    return {'min': metrics_range.Min, 'max': metrics_range.Max, 'avg': metrics_range.Avg,
+            'percentile': calculate_percentile(metrics_range.Min, metrics_range.Max, value)}
+
+
+def _comparison_data(player_metric):
+    """Compare a (possibly unsaved) PlayerMetric with the observations of its type and age"""
+    # Get the player's age for comparison
+    playerAge = int(player_metric.playerAge)
+
+    stats = _range_stats(player_metric.metricType, playerAge, player_metric.metric)
+    if stats is None:
+        # No range data for this metric type and age
+        return {
+            'no_data': True,
+            'playerAge': playerAge,
+            'player_age': playerAge,
+            'metric_type_display': player_metric.get_metricType_display()
+        }
+
+    return {
+        'min_value': stats['min'],
+        'max_value': stats['max'],
+        'average': stats['avg'],
+        'current_value': player_metric.metric,
+        'metric_type_display': player_metric.get_metricType_display(),
+        'metric_type': player_metric.metricType,
+        'playerAge': player_metric.playerAge,
+        'player_age': player_metric.playerAge,
+        'has_data': True,
+        'percentile': stats['percentile'],
+    }
+
 
 def results(request, metric_id):
     try:
         player_metric = PlayerMetric.objects.get(id=metric_id)
-
-        print('hello world')
-        print(player_metric.playerAge)
-        
-        # Get comparison data from MetricsRange for the same metric type and age
-        comparison_data = []
-        
-        # Get the player's age for comparison
-        playerAge = int(player_metric.playerAge)
-        
-        # Try to get the metrics range for this metric type and graduation class
-        try:
-            metrics_range = MetricsRange.objects.get(
-                metricType=player_metric.metricType,
-                playerAge=playerAge
-            )
-            
-            comparison_data = {
-                'min_value': metrics_range.Min,
-                'max_value': metrics_range.Max,
-                'average': metrics_range.Avg,
-                'current_value': player_metric.metric,
-                'metric_type_display': player_metric.get_metricType_display(),
-                'metric_type': player_metric.metricType,
-                'playerAge': player_metric.playerAge,
-                'player_age': player_metric.playerAge,
-                'has_data': True,
-                'percentile': calculate_percentile(metrics_range.Min, metrics_range.Max, player_metric.metric),
-                
-            }
-
-            print(comparison_data)
-            
-        except MetricsRange.DoesNotExist:
-            # No range data for this metric type and graduation class
-            comparison_data = {
-                'no_data': True,
-                'playerAge': playerAge,
-                'player_age': playerAge,
-                'metric_type_display': player_metric.get_metricType_display()
-            }
-        
-        return render(request, 'main/results.html', {
-            'player_metric': player_metric,
-            'comparison_data': comparison_data
-        })
     except PlayerMetric.DoesNotExist:
         return redirect('evaluate')
 
+    comparison_data = _comparison_data(player_metric)
+    logger.debug(f"Comparison data for metric {metric_id}: {comparison_data}")
+    return render(request, 'main/results.html', {
+        'player_metric': player_metric,
+        'comparison_data': comparison_data
+    })
+
+
+def sign_evaluation(player_metric):
+    """URL-safe signed token carrying an anonymous evaluation, in place of a PlayerMetric row"""
+    payload = {'t': player_metric.metricType, 'v': str(player_metric.metric), 'a': player_metric.playerAge}
+    return signing.dumps(payload, salt=EVALUATION_SALT, compress=True)
+
+
+def unsign_evaluation(token):
+    """Unsaved PlayerMetric from a sign_evaluation() token; raises signing.BadSignature if tampered with"""
+    payload = signing.loads(token, salt=EVALUATION_SALT)
+    player_metric = PlayerMetric(metricType=payload['t'], metric=Decimal(payload['v']), playerAge=int(payload['a']))
+    player_metric.full_clean(exclude=['user', 'gradClass'])
+    return player_metric
+
+
+@cache_control(public=True, max_age=SHARED_RESULTS_MAX_AGE)
+def shared_results(request, token):
+    """Results for an anonymous evaluation, read from the signed URL instead of the database"""
+    try:
+        player_metric = unsign_evaluation(token)
+    except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError, ArithmeticError):
+        raise Http404('Invalid evaluation link')
+    return render(request, 'main/results.html', {
+        'player_metric': player_metric,
+        'comparison_data': _comparison_data(player_metric),
+    })
+
+@use_read_replica
 def metrics_history(request):
     # Get search parameters
     search_query = request.GET.get('search', '')
     player_id = request.GET.get('player_id', '')
     event_id = request.GET.get('event_id', '')
     
-    # Start with all records
-    metrics_list = MetricsHistory.objects.all()
-    
-    # Apply filters
-    if search_query:
-        metrics_list = metrics_list.filter(
-            Q(player_id__icontains=search_query) |
-            Q(event_id__icontains=search_query) |
-            Q(gradYear__icontains=search_query)
-        )
-    
-    if player_id:
-        metrics_list = metrics_list.filter(player_id=player_id)
-    
-    if event_id:
-        metrics_list = metrics_list.filter(event_id=event_id)
+    # Apply filters (shared with the CSV/NDJSON export)
+    metrics_list = exports.filter_metrics_history(request.GET)
     
     # Pagination
     paginator = Paginator(metrics_list, 25)  # Show 25 records per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    linked = identity.linked_usernames({row.player_id for row in page_obj})
+    for row in page_obj:
+        row.linked_username = linked.get(row.player_id)
     
     context = {
         'page_obj': page_obj,
@@ -127,6 +177,116 @@ def metrics_history(request):
     return render(request, 'main/metrics_history.html', context)
 
 
+@use_read_replica
+def event_list(request):
+    """Events, newest first, from the EventSummary rollups"""
+    summaries = EventSummary.objects.only('event_id', 'event_date', 'participants', 'rows')
+    page_obj = Paginator(summaries, 25).get_page(request.GET.get('page'))
+    return render(request, 'main/events.html', {'page_obj': page_obj})
+
+
+@use_read_replica
+def event_detail(request, event_id):
+    """Participants, per-metric distributions and top performers of one event"""
+    summary = get_object_or_404(EventSummary, event_id=event_id)
+    return render(request, 'main/event_detail.html', {
+        'summary': summary,
+        'metric_rows': events.metric_rows(summary),
+        'quantile_labels': [f'P{round(q * 100)}' for q in events.QUANTILES],
+    })
+
+
+@use_read_replica
+def event_summary_json(request, event_id):
+    """An event's summary as JSON"""
+    summary = get_object_or_404(EventSummary, event_id=event_id)
+    return JsonResponse(events.as_json(summary))
+
+
+@use_read_replica
+def player_directory(request):
+    """Searchable player directory with keyset ("Next page") pagination"""
+    query = request.GET.get('q', '').strip()
+    state = request.GET.get('state', '')
+    position = request.GET.get('position', '')
+    graduation_year = request.GET.get('year', '')
+    if state not in dict(PlayerProfile.STATE_CHOICES):
+        state = ''
+    if position not in dict(PlayerProfile.POSITION_CHOICES):
+        position = ''
+    if not graduation_year.isdigit():
+        graduation_year = ''
+
+    players, next_cursor = directory.search(
+        query, state=state, graduation_year=graduation_year or None, position=position,
+        after=request.GET.get('after'), using=read_alias(),
+    )
+    context = {
+        'players': players,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
+        'query': query,
+        'state': state,
+        'position': position,
+        'graduation_year': graduation_year,
+        'state_choices': PlayerProfile.STATE_CHOICES,
+        'position_choices': PlayerProfile.POSITION_CHOICES,
+    }
+    return render(request, 'main/directory.html', context)
+
+
+@use_read_replica
+def player_suggest(request):
+    """Typeahead JSON for the directory search box"""
+    return JsonResponse({'results': directory.suggest(request.GET.get('q', ''), using=read_alias())})
+
+
+@use_read_replica
+def roster_dashboard(request, name, field='team'):
+    """Every player on a team (or school) with their latest metrics and percentiles"""
+    roster_html = teams.render_roster(field, name, using=read_alias())
+    if roster_html is None:
+        raise Http404(f'No players found for {field} {name!r}')
+    return render(request, 'main/team.html', {'name': name, 'kind': field, 'roster_html': roster_html})
+
+
+@use_read_replica
+def report_card(request, username, fmt):
+    """Redirect to the player's pre-rendered report card, queueing a render if it is missing"""
+    player_profile = get_object_or_404(PlayerProfile.objects.select_related('user'), user__username=username)
+    inputs = reportcards.card_inputs(player_profile)
+    digest = reportcards.content_hash(inputs)
+    url = reportcards.stored_url(reportcards.storage_name(digest, fmt))
+    if url:
+        return redirect(url)
+    reportcards.render_in_background(inputs, fmt, digest)
+    response = render(request, 'main/report_card_pending.html', {'username': username, 'fmt': fmt}, status=202)
+    response['Retry-After'] = '2'
+    return response
+
+
+@login_required
+@require_POST
+def toggle_watch(request, username):
+    """Follow or unfollow a player from their profile page"""
+    player_profile = get_object_or_404(PlayerProfile.objects.select_related('user'), user__username=username)
+    entry, created = WatchlistEntry.objects.get_or_create(user=request.user, profile=player_profile)
+    if created:
+        messages.success(request, f'Following {username}. New measurements will be in your watchlist digest.')
+    else:
+        entry.delete()
+        messages.info(request, f'Stopped following {username}.')
+    return redirect('profile_by_username', username=username)
+
+
+@login_required
+def watchlist(request):
+    """The players the current user follows, with their latest metrics"""
+    data = teams.dashboard(PlayerProfile.objects.filter(watchers__user=request.user))
+    roster_html = teams.render_dashboard(data) if data else None
+    return render(request, 'main/watchlist.html', {'roster_html': roster_html})
+
+
 @login_required
 def add(request):
     """View for capturing multiple metrics at once - requires login"""
@@ -178,6 +338,7 @@ def profile(request):
     return redirect('profile_by_username', username=request.user.username)
 
 
+@use_read_replica
 def profile_by_username(request, username):
     """View for displaying user profile by username - publicly accessible"""
     profile_user = get_object_or_404(User, username=username)
@@ -220,25 +381,37 @@ def profile_by_username(request, username):
     # Calculate percentile for latest metric of each type
     for metric_type, metric in latest_metrics.items():
         player_age = int(metric.playerAge)
-        try:
-            metrics_range = MetricsRange.objects.get(
-                metricType=metric_type,
-                playerAge=player_age
-            )
-            percentile = calculate_percentile(metrics_range.Min, metrics_range.Max, metric.metric)
+        stats = _range_stats(metric_type, player_age, metric.metric)
+        if stats is not None:
             metrics_data[metric_type]['latest_value'] = float(metric.metric)
             metrics_data[metric_type]['date_captured'] = metric.dateCaptured.strftime('%m/%d/%Y') if metric.dateCaptured else 'N/A'
-            metrics_data[metric_type]['percentile'] = percentile
+            metrics_data[metric_type]['percentile'] = stats['percentile']
             metrics_data[metric_type]['has_percentile'] = True
             metrics_data[metric_type]['player_age'] = player_age
-        except MetricsRange.DoesNotExist:
+        else:
             metrics_data[metric_type]['latest_value'] = float(metric.metric)
             metrics_data[metric_type]['date_captured'] = metric.dateCaptured.strftime('%Y-%m-%d') if metric.dateCaptured else 'N/A'
             metrics_data[metric_type]['has_percentile'] = False
             metrics_data[metric_type]['player_age'] = player_age
     
+    # Project each latest value forward with the fitted growth curves
+    growth_curves = projections.load_curves()
+    for metric_type, metric in latest_metrics.items():
+        if metric_type in metrics_data:
+            metrics_data[metric_type]['projection'] = projections.project(
+                metric_type, metric.playerAge, metric.metric, curves=growth_curves
+            )
+    
     # Check if viewing own profile
     is_own_profile = request.user.is_authenticated and request.user == profile_user
+    can_watch = request.user.is_authenticated and not is_own_profile
+    is_watching = can_watch and WatchlistEntry.objects.filter(user=request.user, profile=player_profile).exists()
+    
+    # Combine results from MetricsHistory players confirmed as this profile
+    combine_history = list(
+        MetricsHistory.objects.filter(player_id__in=identity.linked_player_ids(player_profile))
+        .order_by('-event_date')[:20]
+    )
     
     # Prepare context with JSON data for each metric
     context = {
@@ -246,6 +419,9 @@ def profile_by_username(request, username):
         'profile': player_profile,
         'total_metrics': user_metrics.count(),
         'is_own_profile': is_own_profile,
+        'can_watch': can_watch,
+        'is_watching': is_watching,
+        'combine_history': combine_history,
         'metrics_data': {
             metric_type: {
                 'dates': json.dumps(data['dates']),
@@ -260,6 +436,7 @@ def profile_by_username(request, username):
                 'percentile': data.get('percentile'),
                 'has_percentile': data.get('has_percentile', False),
                 'player_age': data.get('player_age'),
+                'projection': data.get('projection', []),
                 'metric_type': metric_type,
             }
             for metric_type, data in metrics_data.items()
@@ -272,11 +449,11 @@ def evaluate(request):
     if request.method == 'POST':
         form = PlayerMetricForm(request.POST)
         if form.is_valid():
-            # Set user based on authentication status
-            if request.user.is_authenticated:
-                form.instance.user = request.user
-            else:
-                form.instance.user = None  # Anonymous user
+            # Signed-in users keep their evaluations; anonymous ones are not
+            # stored and get a signed, shareable results URL instead.
+            if not request.user.is_authenticated:
+                return redirect('shared_results', token=sign_evaluation(form.instance))
+            form.instance.user = request.user
             player_metric = form.save()
             return redirect('results', metric_id=player_metric.id)
         else:
@@ -336,41 +513,38 @@ def playerevaluation(request):
     
     # Prepare comparison data for each metric type
     evaluation_data = []
+    growth_curves = projections.load_curves()
     
     for metric_type, metric in latest_metrics.items():
-        grad_class = int(metric.gradClass)
+        player_age = int(metric.playerAge)
+        projection = projections.project(metric_type, player_age, metric.metric, curves=growth_curves)
         
-        # Try to get the metrics range for this metric type and graduation class
-        try:
-            metrics_range = MetricsRange.objects.get(
-                metricType=metric_type,
-                gradClass=grad_class
-            )
-            
-            percentile = calculate_percentile(metrics_range.Min, metrics_range.Max, metric.metric)
-            
+        # Range and percentile for this metric type and age
+        stats = _range_stats(metric_type, player_age, metric.metric)
+        if stats is not None:
             evaluation_data.append({
                 'metric_type': metric_type,
                 'metric_type_display': metric.get_metricType_display(),
                 'current_value': metric.metric,
-                'min_value': metrics_range.Min,
-                'max_value': metrics_range.Max,
-                'average': metrics_range.Avg,
-                'grad_class': grad_class,
-                'percentile': percentile,
+                'min_value': stats['min'],
+                'max_value': stats['max'],
+                'average': stats['avg'],
+                'player_age': player_age,
+                'percentile': stats['percentile'],
                 'has_data': True,
                 'date_captured': metric.dateCaptured,
+                'projection': projection,
             })
-            
-        except MetricsRange.DoesNotExist:
-            # No range data for this metric type and graduation class
+        else:
+            # No range data for this metric type and age
             evaluation_data.append({
                 'metric_type': metric_type,
                 'metric_type_display': metric.get_metricType_display(),
                 'current_value': metric.metric,
-                'grad_class': grad_class,
+                'player_age': player_age,
                 'has_data': False,
                 'date_captured': metric.dateCaptured,
+                'projection': projection,
             })
     
     # Sort by metric type for consistent display
@@ -383,3 +557,139 @@ def playerevaluation(request):
     }
     
     return render(request, 'main/playerevaluation.html', context)
+
+
+
+@staff_member_required
+def performance_stats(request):
+    """Per-view latency percentiles and query counts collected by PerformanceMiddleware"""
+    if request.GET.get('reset') == '1':
+        performance_registry.reset()
+    return JsonResponse({'views': performance_registry.snapshot()})
+
+
+@staff_member_required
+def db_pool_status(request):
+    """Connection pool occupancy for the worker that serves the request"""
+    return JsonResponse({
+        'pid': os.getpid(),
+        'pooling': bool(getattr(settings, 'DB_POOL', False)),
+        'pools': metrics.db_pool_stats(),
+    })
+
+
+def metrics_endpoint(request):
+    """Prometheus exposition endpoint, for staff or scrapers sending the METRICS_TOKEN bearer token"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    scraper = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (scraper or request.user.is_staff):
+        return HttpResponse('Unauthorized', status=401)
+    metrics.db_pool_stats()
+    body, content_type = metrics.exposition()
+    return HttpResponse(body, content_type=content_type)
+
+
+def _export_response(request, kind, queryset):
+    """Stream ``queryset`` as CSV or NDJSON (optionally gzipped) based on GET params"""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return HttpResponse(f'Unsupported format: {fmt}', status=400)
+    compress = request.GET.get('gzip') == '1'
+
+    # The body streams after the view returns, outside the replica scope, so
+    # bind the queryset to the database chosen for this request now.
+    queryset = queryset.using(read_alias())
+    chunks = exports.stream_export(queryset, exports.EXPORT_FIELDS[kind], fmt=fmt, compress=compress)
+    if isinstance(request, ASGIRequest):
+        chunks = exports.as_async_chunks(chunks)
+
+    content_type = 'application/gzip' if compress else exports.FORMATS[fmt][0]
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{exports.export_filename(kind, fmt, compress)}"'
+    return response
+
+
+@login_required
+@use_read_replica
+def export_metrics_history(request):
+    """Export MetricsHistory rows matching the metrics_history filters"""
+    return _export_response(request, 'history', exports.filter_metrics_history(request.GET))
+
+
+@login_required
+@use_read_replica
+def export_player_metrics(request):
+    """Export PlayerMetric rows; staff get every player, everyone else only their own"""
+    queryset = PlayerMetric.objects.all()
+    if not request.user.is_staff:
+        queryset = queryset.filter(user=request.user)
+    return _export_response(request, 'metrics', exports.filter_player_metrics(request.GET, queryset))
+
+
+def similar_players(request):
+    """
+    Top-k MetricsHistory comps as JSON, for a site user (?username=) or a
+    MetricsHistory player (?player_id=, optional ?age=).
+    """
+    try:
+        k = max(1, min(int(request.GET.get('k', 10)), similarity.MAX_K))
+        age = int(request.GET['age']) if request.GET.get('age') else None
+        player_id = int(request.GET['player_id']) if request.GET.get('player_id') else None
+    except ValueError:
+        return JsonResponse({'error': 'k, age and player_id must be integers'}, status=400)
+
+    similarity.index.refresh_in_background()
+    if not similarity.index.ready:
+        response = JsonResponse({'error': 'The similarity index is still building, try again shortly'}, status=503)
+        response['Retry-After'] = '10'
+        return response
+    if request.GET.get('username'):
+        profile_user = get_object_or_404(User.objects.select_related('player_profile'), username=request.GET['username'])
+        user_age, vector = similarity.vector_for_user(profile_user)
+        exclude = None
+    elif player_id is not None:
+        user_age, vector = similarity.index.vector_for_player(player_id, age)
+        exclude = player_id
+    else:
+        return JsonResponse({'error': 'username or player_id is required'}, status=400)
+
+    if vector is None:
+        return JsonResponse({'age': None, 'comps': []})
+    matched_age, comps = similarity.index.similar(vector, age or user_age, k=k, exclude_player=exclude)
+    return JsonResponse({'age': matched_age, 'comps': comps})
+
+
+@csrf_exempt
+@require_POST
+def evaluate_batch(request):
+    """
+    Evaluate many (metricType, age, value) triples in one call. POST JSON
+    {"items": [{"metricType": "fbvelo", "age": 16, "value": 84.5}, ...]};
+    an item may also be a [metricType, age, value] array. Nothing is saved,
+    so the endpoint needs no CSRF token.
+    """
+    try:
+        items = json.loads(request.body)['items']
+        if not isinstance(items, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'expected a JSON object with an "items" array'}, status=400)
+    if len(items) > evaluation.MAX_BATCH:
+        return JsonResponse({'error': f'at most {evaluation.MAX_BATCH} items per request'}, status=400)
+
+    try:
+        triples = [
+            (item['metricType'], item['age'], item['value']) if isinstance(item, dict) else tuple(item)
+            for item in items
+        ]
+        if any(len(triple) != 3 or not isinstance(triple[0], str) for triple in triples):
+            raise TypeError
+        metric_types, ages, values = zip(*triples) if triples else ((), (), ())
+    except (KeyError, TypeError):
+        return JsonResponse({'error': 'each item needs metricType, age and value'}, status=400)
+
+    try:
+        results = evaluation.evaluate_batch(metric_types, ages, values)
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': results})
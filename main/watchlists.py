@@ -0,0 +1,175 @@
+"""
+Watchlists: users following players, and digests of the players' new metrics.
+
+Delivery is two set-based steps, both run by send_watchlist_digests:
+
+* fan_out() walks PlayerMetric and MetricsHistory by primary key, each from
+  its own Checkpoint, so rows saved one at a time by ``add`` and rows written
+  with bulk_create by the bulk API or import_csv_data (which send no signals)
+  are picked up alike. Imported rows reach the watchers of the profile their
+  player_id has a confirmed PlayerIdentityLink to. Each batch of new rows is
+  matched to WatchlistEntry in one query (two for history, through the links)
+  and the resulting (watcher, row) pairs are written as WatchNotification rows
+  with one bulk insert. The cost is per batch, not per row or per watcher.
+  A checkpoint first seen by fan_out() starts at the table's current end,
+  and a follow only covers rows saved after it, so nobody is sent a player's
+  whole history.
+* send_digests() groups pending notifications by watcher and sends one email
+  each over a single EMAIL_BACKEND connection.
+"""
+import logging
+from collections import defaultdict
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Max
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics import METRIC_TYPE_COLUMNS
+from .models import Checkpoint, MetricsHistory, PlayerIdentityLink, PlayerMetric, WatchNotification
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = 'watchlist_fan_out'
+HISTORY_CHECKPOINT = 'watchlist_fan_out_history'
+BATCH_SIZE = 5000
+
+
+def fan_out(batch_size=BATCH_SIZE):
+    """Queue a WatchNotification per watcher of each metric saved since the last run; returns how many"""
+    return (_walk(CHECKPOINT, PlayerMetric, _metric_notifications, batch_size)
+            + _walk(HISTORY_CHECKPOINT, MetricsHistory, _history_notifications, batch_size))
+
+
+def _walk(name, model, notifications_for, batch_size):
+    """Run notifications_for(lower, upper) over ``model`` ids in batches from Checkpoint ``name``"""
+    created = 0
+    last_id = model.objects.aggregate(last=Max('id'))['last'] or 0
+    while True:
+        # One short transaction per batch; the row lock keeps concurrent runs apart.
+        with transaction.atomic():
+            checkpoint, _ = Checkpoint.objects.select_for_update().get_or_create(
+                name=name, defaults={'position': last_id},
+            )
+            if checkpoint.position >= last_id:
+                return created
+            upper = min(checkpoint.position + batch_size, last_id)
+            notifications = notifications_for(checkpoint.position, upper)
+            WatchNotification.objects.bulk_create(notifications, ignore_conflicts=True)
+            created += len(notifications)
+            checkpoint.position = upper
+            checkpoint.save()
+
+
+def _metric_notifications(lower, upper):
+    pairs = (
+        PlayerMetric.objects
+        .filter(id__gt=lower, id__lte=upper,
+                user__player_profile__watchers__created_at__lte=F('created_at'))
+        .values_list('user__player_profile__watchers__user_id', 'id')
+    )
+    return [WatchNotification(user_id=user_id, metric_id=metric_id) for user_id, metric_id in pairs]
+
+
+def _history_notifications(lower, upper):
+    links = PlayerIdentityLink.objects.filter(status=PlayerIdentityLink.CONFIRMED)
+    rows = list(
+        MetricsHistory.objects
+        .filter(id__gt=lower, id__lte=upper, player_id__in=links.filter(profile__watchers__isnull=False).values('player_id'))
+        .values_list('id', 'player_id', 'created_at')
+    )
+    if not rows:
+        return []
+    watchers = defaultdict(list)
+    for player_id, user_id, followed_at in links.filter(player_id__in={row[1] for row in rows}).values_list(
+        'player_id', 'profile__watchers__user_id', 'profile__watchers__created_at',
+    ):
+        if user_id is not None:
+            watchers[player_id].append((user_id, followed_at))
+    return [
+        WatchNotification(user_id=user_id, history_id=history_id)
+        for history_id, player_id, created_at in rows
+        for user_id, followed_at in watchers[player_id]
+        if created_at >= followed_at
+    ]
+
+
+def measurements(notification):
+    """[{'label', 'value', 'age', 'date'}] for a notification's PlayerMetric or MetricsHistory row"""
+    if notification.metric_id is not None:
+        metric = notification.metric
+        return [{'label': metric.get_metricType_display(), 'value': metric.metric,
+                 'age': metric.playerAge, 'date': metric.dateCaptured}]
+    row = notification.history
+    return [
+        {'label': MetricsHistory._meta.get_field(column).verbose_name, 'value': getattr(row, column),
+         'age': row.playerage or None, 'date': row.event_date}
+        for column in METRIC_TYPE_COLUMNS.values()
+        if getattr(row, column) is not None
+    ]
+
+
+def digest_messages(notifications):
+    """
+    One EmailMessage per watcher for notifications ordered by watcher, then
+    player. Each notification carries the followed player's User as ``player``.
+    """
+    messages = []
+    for user, group in groupby(notifications, key=lambda notification: notification.user):
+        if not user.email:
+            continue
+        players = []
+        for player, items in groupby(group, key=lambda notification: notification.player):
+            players.append({
+                'name': player.get_full_name() or player.username,
+                'url': settings.SITE_URL + reverse('profile_by_username', args=[player.username]),
+                'metrics': [measurement for notification in items for measurement in measurements(notification)],
+            })
+        body = render_to_string('main/watchlist_digest.txt', {
+            'user': user,
+            'players': players,
+            'watchlist_url': settings.SITE_URL + reverse('watchlist'),
+        })
+        subject = f'New measurements for {len(players)} player{"s" if len(players) != 1 else ""} you follow'
+        messages.append(EmailMessage(subject, body, to=[user.email]))
+    return messages
+
+
+def send_digests(connection=None):
+    """Email every watcher with pending notifications and mark them sent; returns (emails, notifications)"""
+    pending = WatchNotification.objects.filter(sent_at=None)
+    last_id = pending.aggregate(last=Max('id'))['last']
+    if last_id is None:
+        return 0, 0
+    pending = pending.filter(id__lte=last_id)
+    notifications = list(pending.select_related('user', 'metric__user', 'history'))
+    linked = {
+        link.player_id: link.profile.user
+        for link in PlayerIdentityLink.objects.filter(
+            status=PlayerIdentityLink.CONFIRMED,
+            player_id__in={n.history.player_id for n in notifications if n.history is not None},
+        ).select_related('profile__user')
+    }
+    for notification in notifications:
+        if notification.metric is not None:
+            notification.player, notification.date = notification.metric.user, notification.metric.dateCaptured
+        elif notification.history is not None:
+            notification.player = linked.get(notification.history.player_id)
+            notification.date = notification.history.event_date.date()
+        else:
+            notification.player = None
+    # History rows may have been re-imported or unlinked since the fan-out; they are dropped.
+    notifications = [n for n in notifications if n.player is not None]
+    # By watcher, then player, then date with undated metrics first.
+    notifications.sort(key=lambda n: (n.user_id, n.player.pk, n.date is not None, n.date or 0, n.pk))
+    messages = digest_messages(notifications)
+    connection = connection or get_connection()
+    sent = connection.send_messages(messages) if messages else 0
+    # Watchers without an email address are marked too, so they do not pile up.
+    pending.update(sent_at=timezone.now())
+    logger.info('Sent %d watchlist digest(s) covering %d notification(s)', sent or 0, len(notifications))
+    return sent or 0, len(notifications)
@@ -64,7 +64,9 @@ ACCOUNT_AUTHENTICATION_METHOD = 'username_email'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.PerformanceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'main.routers.ReplicaStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -81,7 +83,7 @@ ROOT_URLCONF = 'statsprofile.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'main.instrumentation.TimedDjangoTemplates',
          "DIRS": [
             BASE_DIR / "templates"
         ],
@@ -119,6 +121,38 @@ DATABASES = {
     )
 }
 
+# Optional read-only replica for heavy read endpoints (main.routers). Reads are
+# routed there only from views marked @use_read_replica and snapshot builds;
+# a session that writes stays on the primary for REPLICA_STICKY_SECONDS.
+if os.environ.get('REPLICA_DATABASE_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.environ['REPLICA_DATABASE_URL'],
+        conn_max_age=600
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['main.routers.ReadReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "10"))
+
+# psycopg 3 connection pool (Django 5.1+). Each gunicorn/uvicorn worker holds
+# its own pool, so the connections Postgres sees top out at
+# WEB_CONCURRENCY * DB_POOL_MAX_SIZE; keep that under the plan's limit.
+# Pooling replaces persistent connections, so CONN_MAX_AGE must be 0.
+DB_POOL = os.environ.get("DB_POOL") == 'True'
+if DB_POOL:
+    for database in DATABASES.values():
+        if database.get('ENGINE') == 'django.db.backends.postgresql':
+            database['CONN_MAX_AGE'] = 0
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': int(os.environ.get("DB_POOL_MIN_SIZE", "1")),
+                'max_size': int(os.environ.get("DB_POOL_MAX_SIZE", "4")),
+                'timeout': float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+            }
+
+# Partition MetricsHistory by event year on Postgres (main.partitioning).
+# Read by migration 0006; later use metrics_history_partitions convert/ensure.
+METRICS_HISTORY_PARTITIONING = os.environ.get("METRICS_HISTORY_PARTITIONING") == 'True'
+
 
 AUTHENTICATION_BACKENDS = [
     
@@ -167,7 +201,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = '/profile/'
 LOGOUT_REDIRECT_URL = '/' 
 
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Console locally; set EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend
+# and the EMAIL_HOST* variables to deliver watchlist digests for real.
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "False").lower() == "true"
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "webmaster@localhost")
 
 # Force email verification
 ACCOUNT_EMAIL_REQUIRED = True
@@ -225,6 +267,67 @@ if DEBUG:
 
 
 
+# ================================
+# Performance instrumentation
+# ================================
+
+# Per-request timing (Server-Timing header, JSON log lines and the staff-only
+# /perf/ summary). Set PERFORMANCE_INSTRUMENTATION=False to switch it off.
+PERFORMANCE_INSTRUMENTATION = os.environ.get("PERFORMANCE_INSTRUMENTATION", "True") == 'True'
+
+# Bearer token Prometheus sends to scrape /metrics/. Without it only staff
+# sessions can read the endpoint.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Where snapshot_metrics_history writes the columnar MetricsHistory copy
+# read by main.analytics.
+ANALYTICS_SNAPSHOT_DIR = os.environ.get("ANALYTICS_SNAPSHOT_DIR", BASE_DIR / "snapshots")
+
+# How often each worker checks MetricsHistory, on a background thread, for
+# changes to fold into the in-memory similar-player index.
+SIMILARITY_REFRESH_SECONDS = int(os.environ.get("SIMILARITY_REFRESH_SECONDS", "60"))
+
+# Anonymous evaluations are no longer stored; compact_anonymous_metrics rolls
+# up and deletes anonymous PlayerMetric rows older than this many days.
+ANONYMOUS_METRIC_RETENTION_DAYS = int(os.environ.get("ANONYMOUS_METRIC_RETENTION_DAYS", "90"))
+
+# Absolute base URL for links in emails sent outside a request (watchlist digests).
+SITE_URL = os.environ.get("SITE_URL", "http://localhost:8000").rstrip("/")
+
+# Threads per process rendering report cards (main.reportcards) in the background.
+REPORT_CARD_WORKERS = int(os.environ.get("REPORT_CARD_WORKERS", "2"))
+
+# Import validation (main.validation). Bounds here override the defaults per
+# metric, e.g. {"exitVelo": (30, 120)}; IMPORT_VALIDATORS replaces the
+# validator pipeline with a list of dotted paths. IMPORT_ADAPTERS does the
+# same for the export layouts import_csv_data recognises (main.importers).
+IMPORT_METRIC_BOUNDS = {}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'performance': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'loggers': {
+        'main.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 SOCIALACCOUNT_LOGIN_ON_GET = True
 ACCOUNT_LOGOUT_ON_GET = True
 